@@ -3,7 +3,7 @@ Flask应用初始化
 医药价格发现系统Web界面
 """
 from flask import Flask
-from config import DATABASE_URL
+from config import DATABASE_URL, ENABLE_SCHEDULER
 
 
 def create_app(config_name: str = 'default') -> Flask:
@@ -22,6 +22,7 @@ def create_app(config_name: str = 'default') -> Flask:
     app.config['SECRET_KEY'] = 'pharma-price-discovery-secret-key'
     app.config['SQLALCHEMY_DATABASE_URI'] = DATABASE_URL
     app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
+    app.config['ENABLE_SCHEDULER'] = ENABLE_SCHEDULER
     
     # 注册蓝图
     from app.routes import main_bp
@@ -2,14 +2,17 @@
 数据模型定义
 使用SQLAlchemy ORM定义Drug和PriceRecord模型
 """
+import sqlite3
 from datetime import datetime
 from decimal import Decimal
 from typing import Optional
 
 from sqlalchemy import (
     Column, Integer, String, DateTime, ForeignKey,
-    Numeric, Index, create_engine
+    Numeric, Index, create_engine, event, func, literal_column, select, text
 )
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateIndex
 from sqlalchemy.orm import declarative_base, relationship, Session
 
 Base = declarative_base()
@@ -43,6 +46,21 @@ class Drug(Base):
         return f'<Drug {self.name}>'
 
 
+# 药品唯一键：名称 + 规格 + 厂家（同名同规格的不同厂家视为不同商品）
+# 规格、厂家为 NULL（旧数据和 CrawlService 写入）与空字符串（采集管道写入）视为相同；
+# 空字符串以字面量渲染，ON CONFLICT 的冲突目标才能与索引表达式一致
+_EMPTY = literal_column("''")
+DRUG_IDENTITY = (
+    Drug.name,
+    func.coalesce(Drug.specification, _EMPTY),
+    func.coalesce(Drug.manufacturer, _EMPTY),
+)
+DRUG_UNIQUE_INDEX = Index('uq_drugs_identity', *DRUG_IDENTITY, unique=True)
+
+# 旧版本创建的唯一索引（直接索引列，NULL 互不冲突）
+_LEGACY_DRUG_UNIQUE_INDEX = 'uq_drugs_name_spec_manufacturer'
+
+
 class PriceRecord(Base):
     """价格记录模型"""
     __tablename__ = 'price_records'
@@ -78,6 +96,54 @@ class DrugAlias(Base):
         return f'<DrugAlias {self.alias_name}>'
 
 
+# SQLite 连接参数：WAL 日志 + NORMAL 同步减少提交时的 fsync，
+# 256MB 内存映射读取、64MB 页缓存、临时表放内存
+SQLITE_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',
+)
+
+
+def apply_sqlite_pragmas(dbapi_connection, connection_record=None) -> None:
+    """
+    为 SQLite 连接设置性能参数
+    
+    可直接作为 SQLAlchemy 的 connect 事件监听器使用
+    """
+    cursor = dbapi_connection.cursor()
+    for pragma in SQLITE_PRAGMAS:
+        cursor.execute(pragma)
+    cursor.close()
+
+
+def open_sqlite(path: str) -> sqlite3.Connection:
+    """
+    打开 SQLite 数据库（供迁移、修复等脚本直接使用 sqlite3 时调用）
+    
+    Args:
+        path: 数据库文件路径
+        
+    Returns:
+        已设置性能参数的 sqlite3 连接
+    """
+    conn = sqlite3.connect(path)
+    apply_sqlite_pragmas(conn)
+    return conn
+
+
+# 连接池参数：长时间运行（爬虫、定时任务）时使用前先 ping，
+# 并定期回收连接，避免使用已被服务端断开的连接
+ENGINE_POOL_OPTIONS = {
+    'pool_size': 8,
+    'max_overflow': 16,
+    'pool_pre_ping': True,
+    'pool_recycle': 1800,
+}
+
+
 def init_db(database_url: str) -> tuple:
     """
     初始化数据库，创建所有表结构
@@ -88,13 +154,51 @@ def init_db(database_url: str) -> tuple:
     Returns:
         tuple: (engine, Session类)
     """
-    engine = create_engine(database_url)
+    url = make_url(database_url)
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        # 内存数据库只有单个连接，不使用连接池参数
+        engine = create_engine(database_url)
+    else:
+        engine = create_engine(database_url, **ENGINE_POOL_OPTIONS)
+    if engine.dialect.name == 'sqlite':
+        event.listen(engine, 'connect', apply_sqlite_pragmas)
     Base.metadata.create_all(engine)
     from sqlalchemy.orm import sessionmaker
     SessionLocal = sessionmaker(bind=engine)
     return engine, SessionLocal
 
 
+def ensure_drug_unique_index(engine) -> None:
+    """
+    为已有数据库创建药品唯一索引
+    
+    建表早于唯一索引的数据库中可能已有重复药品（如规格、厂家一条为 NULL、一条为空字符串），
+    此时无法创建索引，需要先运行 migrate_merge_duplicate_drugs.py 合并重复药品
+    
+    Args:
+        engine: 数据库引擎
+        
+    Raises:
+        RuntimeError: 已有重复药品
+    """
+    with engine.begin() as conn:
+        conn.execute(text(f'DROP INDEX IF EXISTS {_LEGACY_DRUG_UNIQUE_INDEX}'))
+        
+        duplicates = conn.execute(
+            select(func.count()).select_from(
+                select(*DRUG_IDENTITY).group_by(*DRUG_IDENTITY).having(func.count() > 1).subquery()
+            )
+        ).scalar()
+        if duplicates:
+            raise RuntimeError(
+                f"drugs 表中有 {duplicates} 组重复药品，无法创建唯一索引，"
+                f"请先运行 migrate_merge_duplicate_drugs.py 合并"
+            )
+        
+        # 表达式索引无法通过反射检查是否存在，使用 IF NOT EXISTS
+        conn.execute(CreateIndex(DRUG_UNIQUE_INDEX, if_not_exists=True))
+
+
 def get_session(database_url: str) -> Session:
     """
     获取数据库会话
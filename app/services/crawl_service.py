@@ -4,6 +4,7 @@
 """
 import json
 import logging
+import re
 import subprocess
 import threading
 from datetime import datetime, timedelta
@@ -18,6 +19,38 @@ from app.models import Base, init_db
 logger = logging.getLogger(__name__)
 
 
+def _keyword_regex(keywords: List[str]) -> 're.Pattern':
+    """将关键词列表编译为单个正则，一次 search 完成所有关键词匹配"""
+    return re.compile('|'.join(re.escape(k) for k in keywords))
+
+
+# 商品类别关键词规则（按优先级排列）：(正则, 类别, 置信度, 识别依据前缀)
+_CATEGORY_KEYWORD_RULES = (
+    # 化妆品 - 使用更精确的关键词
+    (_keyword_regex(['珍珠霜', '珍珠膏', '面霜', '乳液', '精华液',
+                     '洗面奶', '面膜', '眼霜', '护肤水', '化妆水', '皇后牌']),
+     'cosmetic', 0.9, '化妆品关键词'),
+    # 医疗器械 - 明确的器械名称
+    (_keyword_regex(['血糖仪', '血压计', '体温计', '雾化器', '医用口罩',
+                     '外科口罩', '注射器', '输液器', '导尿管', '轮椅', '创可贴']),
+     'medical_device', 0.9, '医疗器械'),
+    # 药品剂型（中高置信度）
+    (_keyword_regex(['片', '胶囊', '颗粒', '口服液', '注射液', '注射剂',
+                     '软膏', '乳膏', '贴剂', '滴眼液', '滴剂', '糖浆',
+                     '丸', '散', '膏药', '栓剂', '喷雾剂', '混悬剂']),
+     'drug', 0.85, '药品剂型'),
+    # 保健品关键词（只有在不包含药品剂型的情况下才会走到这里）
+    (_keyword_regex(['益生菌软糖', '蛋白粉', '鱼油', '保健食品', '营养品']),
+     'health_product', 0.8, '保健品'),
+)
+
+# 维生素类药品的剂型词
+_VITAMIN_DRUG_FORM_RE = _keyword_regex(['片', '胶囊', '滴剂', '口服液', '颗粒'])
+
+# 医疗器械 - 低置信度
+_DEVICE_LOW_RE = _keyword_regex(['口罩', '手套', '纱布', '绷带', '拐杖'])
+
+
 class CrawlTaskStatus(str, Enum):
     """采集任务状态"""
     PENDING = 'pending'      # 等待执行
@@ -1613,49 +1646,24 @@ class CrawlService:
         if '医疗器械' in mfr_lower:
             return {'category': 'medical_device', 'confidence': 0.95, 'reason': '医疗器械厂家'}
         
-        # 优先级3: 高置信度关键词（精确匹配）
-        # 化妆品 - 使用更精确的关键词
-        cosmetic_high = ['珍珠霜', '珍珠膏', '面霜', '乳液', '精华液', 
-                         '洗面奶', '面膜', '眼霜', '护肤水', '化妆水', '皇后牌']
-        for keyword in cosmetic_high:
-            if keyword in name_lower:
-                return {'category': 'cosmetic', 'confidence': 0.9, 'reason': f'化妆品关键词: {keyword}'}
-        
-        # 医疗器械 - 明确的器械名称
-        device_high = ['血糖仪', '血压计', '体温计', '雾化器', '医用口罩', 
-                       '外科口罩', '注射器', '输液器', '导尿管', '轮椅', '创可贴']
-        for keyword in device_high:
-            if keyword in name_lower:
-                return {'category': 'medical_device', 'confidence': 0.9, 'reason': f'医疗器械: {keyword}'}
-        
-        # 优先级4: 药品剂型（中高置信度）
-        drug_forms = ['片', '胶囊', '颗粒', '口服液', '注射液', '注射剂',
-                      '软膏', '乳膏', '贴剂', '滴眼液', '滴剂', '糖浆',
-                      '丸', '散', '膏药', '栓剂', '喷雾剂', '混悬剂']
-        for form in drug_forms:
-            if form in name_lower:
-                return {'category': 'drug', 'confidence': 0.85, 'reason': f'药品剂型: {form}'}
-        
-        # 优先级5: 保健品关键词（需要排除药品）
-        # 只有在不包含药品剂型的情况下才判定为保健品
-        health_keywords = ['益生菌软糖', '蛋白粉', '鱼油', '保健食品', '营养品']
-        for keyword in health_keywords:
-            if keyword in name_lower:
-                return {'category': 'health_product', 'confidence': 0.8, 'reason': f'保健品: {keyword}'}
+        # 优先级3-5: 化妆品/医疗器械高置信度关键词、药品剂型、保健品关键词
+        for pattern, category, confidence, reason in _CATEGORY_KEYWORD_RULES:
+            match = pattern.search(name_lower)
+            if match:
+                return {'category': category, 'confidence': confidence, 'reason': f'{reason}: {match.group()}'}
         
         # 优先级6: 维生素类（需要更多上下文判断）
         if '维生素' in name_lower:
             # 如果有剂型词，判定为药品
-            if any(form in name_lower for form in ['片', '胶囊', '滴剂', '口服液', '颗粒']):
+            if _VITAMIN_DRUG_FORM_RE.search(name_lower):
                 return {'category': 'drug', 'confidence': 0.75, 'reason': '维生素类药品（含剂型）'}
             else:
                 return {'category': 'health_product', 'confidence': 0.6, 'reason': '维生素类保健品'}
         
         # 优先级7: 医疗器械 - 低置信度
-        device_low = ['口罩', '手套', '纱布', '绷带', '拐杖']
-        for keyword in device_low:
-            if keyword in name_lower:
-                return {'category': 'medical_device', 'confidence': 0.7, 'reason': f'医疗用品: {keyword}'}
+        match = _DEVICE_LOW_RE.search(name_lower)
+        if match:
+            return {'category': 'medical_device', 'confidence': 0.7, 'reason': f'医疗用品: {match.group()}'}
         
         # 默认: 药品（低置信度）
         return {'category': 'drug', 'confidence': 0.5, 'reason': '默认分类'}
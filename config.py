@@ -25,6 +25,22 @@ SCRAPER_CONFIG = {
     'RETRY_HTTP_CODES': [500, 502, 503, 504, 408],
 }
 
+# 爬虫HTTP缓存（开发调试时设置 SCRAPY_HTTPCACHE=1，重复运行时直接读取本地缓存的页面）
+SCRAPY_HTTPCACHE = os.environ.get('SCRAPY_HTTPCACHE', '').lower() in ('1', 'true', 'yes')
+
+# 原始数据项暂存（设置 SCRAPY_STAGE_RAW_ITEMS=1 时清洗前的数据项写入 raw_drug_items 表，
+# 清洗规则更新后可用 python -m scraper.reclean 离线重新清洗）
+SCRAPY_STAGE_RAW_ITEMS = os.environ.get('SCRAPY_STAGE_RAW_ITEMS', '').lower() in ('1', 'true', 'yes')
+
+# 爬虫任务目录（设置后待处理请求保存在磁盘队列中，内存占用不随队列增长，且中断后可续爬）
+SCRAPY_JOBDIR = os.environ.get('SCRAPY_JOBDIR')
+
+# 定时任务调度器（设置 ENABLE_SCHEDULER=1 启用，调度器线程运行在 Web 进程中）
+ENABLE_SCHEDULER = os.environ.get('ENABLE_SCHEDULER', '').lower() in ('1', 'true', 'yes')
+
+# Redis配置（设置后爬虫使用 Redis 布隆过滤器去重，未设置时使用 Scrapy 默认的内存去重）
+REDIS_URL = os.environ.get('REDIS_URL')
+
 # 测试配置
 class TestConfig(Config):
     """测试环境配置"""
@@ -4,10 +4,57 @@
 
 展示快速模式和完整模式的区别和应用场景
 """
+import asyncio
+import heapq
 import time
 from app.services.crawl_service import CrawlService
 
-def demo_two_modes():
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 有效价格不少于该数量时才用 numpy 向量化统计，数量少时内置循环开销更低
+NUMPY_MIN_PRICES = 32
+
+async def _timed(func, **kwargs):
+    """在线程中运行同步采集函数，返回 (结果, 耗时秒数)"""
+    start = time.perf_counter()
+    result = await asyncio.to_thread(func, **kwargs)
+    return result, time.perf_counter() - start
+
+def _print_top5(providers):
+    """打印价格最低的 5 个供应商（无价格的排在最后）"""
+    top5 = heapq.nsmallest(5, providers, key=lambda x: x.get('price', 0) or float('inf'))
+    print(f'\n  前5个供应商:')
+    for i, p in enumerate(top5, 1):
+        print(f'    {i}. {p["provider_name"]}: ¥{p["price"]:.2f}')
+
+def _price_stats(providers):
+    """计算有效价格的 (最低, 最高, 平均)，无有效价格时返回 None"""
+    prices = (p['price'] for p in providers if (p.get('price') or 0) > 0)
+    if np is not None and len(providers) >= NUMPY_MIN_PRICES:
+        prices = np.fromiter(prices, dtype=np.float64)
+        if prices.size >= NUMPY_MIN_PRICES:
+            return float(prices.min()), float(prices.max()), float(prices.mean())
+        prices = prices.tolist()
+    
+    # 价格较少时单次遍历同时求最低、最高、合计
+    low = high = None
+    total = 0.0
+    count = 0
+    for price in prices:
+        if low is None or price < low:
+            low = price
+        if high is None or price > high:
+            high = price
+        total += price
+        count += 1
+    if not count:
+        return None
+    return low, high, total / count
+
+async def demo_two_modes():
     """对比两种模式"""
     service = CrawlService()
     keyword = '天麻蜜环菌片'
@@ -18,6 +65,13 @@ def demo_two_modes():
     print(f'测试药品: {keyword}')
     print('='*70)
     
+    # 两种模式互不依赖（API 与 Playwright），并发执行，总耗时取两者最大值
+    print('\n⏳ 两种模式并发采集中...')
+    (quick_result, quick_time), (complete_result, complete_time) = await asyncio.gather(
+        _timed(service.crawl_quick_mode, keyword=keyword, save_to_db=False),
+        _timed(service.crawl_complete_mode, keyword=keyword, save_to_db=False),
+    )
+    
     # 模式1: 快速模式
     print('\n⚡ 模式1: 快速模式（API 热销价格）')
     print('-'*70)
@@ -25,13 +79,6 @@ def demo_two_modes():
     print('特点: 速度快、资源占用低')
     print('-'*70)
     
-    start = time.time()
-    quick_result = service.crawl_quick_mode(
-        keyword=keyword,
-        save_to_db=False
-    )
-    quick_time = time.time() - start
-    
     print(f'\n结果:')
     print(f'  成功: {"✅" if quick_result["success"] else "❌"}')
     print(f'  耗时: {quick_time:.2f} 秒')
@@ -39,10 +86,7 @@ def demo_two_modes():
     print(f'  数据来源: API（热销商品）')
     
     if quick_result['providers']:
-        providers = sorted(quick_result['providers'], key=lambda x: x.get('price', 0))
-        print(f'\n  前5个供应商:')
-        for i, p in enumerate(providers[:5], 1):
-            print(f'    {i}. {p["provider_name"]}: ¥{p["price"]:.2f}')
+        _print_top5(quick_result['providers'])
     
     if quick_result.get('error'):
         print(f'  提示: {quick_result["error"]}')
@@ -55,13 +99,6 @@ def demo_two_modes():
     print('特点: 数据完整、速度较慢')
     print('-'*70)
     
-    start = time.time()
-    complete_result = service.crawl_complete_mode(
-        keyword=keyword,
-        save_to_db=False
-    )
-    complete_time = time.time() - start
-    
     print(f'\n结果:')
     print(f'  成功: {"✅" if complete_result["success"] else "❌"}')
     print(f'  耗时: {complete_time:.2f} 秒')
@@ -69,19 +106,17 @@ def demo_two_modes():
     print(f'  数据来源: Playwright（页面完整数据）')
     
     if complete_result['providers']:
-        providers = sorted(complete_result['providers'], key=lambda x: x.get('price', 0))
-        print(f'\n  前5个供应商:')
-        for i, p in enumerate(providers[:5], 1):
-            print(f'    {i}. {p["provider_name"]}: ¥{p["price"]:.2f}')
+        _print_top5(complete_result['providers'])
         
         # 价格统计
-        prices = [p['price'] for p in providers if p.get('price', 0) > 0]
-        if prices:
+        stats = _price_stats(complete_result['providers'])
+        if stats:
+            low, high, avg = stats
             print(f'\n  价格统计:')
-            print(f'    最低: ¥{min(prices):.2f}')
-            print(f'    最高: ¥{max(prices):.2f}')
-            print(f'    平均: ¥{sum(prices)/len(prices):.2f}')
-            print(f'    价差: ¥{max(prices) - min(prices):.2f}')
+            print(f'    最低: ¥{low:.2f}')
+            print(f'    最高: ¥{high:.2f}')
+            print(f'    平均: ¥{avg:.2f}')
+            print(f'    价差: ¥{high - low:.2f}')
     
     # 对比总结
     print('\n' + '='*70)
@@ -153,4 +188,4 @@ def demo_two_modes():
     print('\n' + '='*70)
 
 if __name__ == '__main__':
-    demo_two_modes()
+    asyncio.run(demo_two_modes())
@@ -6,49 +6,63 @@
 """
 import asyncio
 import json
+from collections import defaultdict
+from scraper.utils.browser_pool import BrowserPool
 from scraper.utils.playwright_crawler import YSBangPlaywrightCrawler
 
-async def discover_api():
+# 关注的 API 名称（与爬虫拦截的端点一致），一次正则扫描完成分类
+_API_PAT = YSBangPlaywrightCrawler.API_PATTERN
+
+# 待分析的药品关键词，共用一个浏览器池并发采集
+KEYWORDS = ['天麻蜜环菌片']
+
+async def _crawl(pool, keyword):
+    """使用浏览器池采集单个关键词，返回带拦截记录的爬虫"""
+    crawler = YSBangPlaywrightCrawler(headless=True, pool=pool)
+    
+    # 执行采集（会拦截 API）
+    await crawler.get_drug_provider_prices(keyword)
+    return crawler
+
+async def discover_api(keywords=KEYWORDS):
     """发现 API 接口"""
-    keyword = '天麻蜜环菌片'
+    # 浏览器只启动一次，各关键词各用一个页面
+    async with BrowserPool(headless=True) as pool:
+        crawlers = await asyncio.gather(*[_crawl(pool, keyword) for keyword in keywords])
+    
+    for keyword, crawler in zip(keywords, crawlers):
+        report_api(keyword, crawler)
     
+    print('\n' + '='*70)
+    print('💡 结论')
+    print('='*70)
+    print('找到了获取供应商价格的 API: getWholesaleListForPc')
+    print('下一步: 实现纯 API 调用，不再依赖 Playwright')
+    print('='*70)
+
+def report_api(keyword, crawler):
+    """分析并打印单个关键词拦截到的 API"""
     print('='*70)
     print('🔍 使用 Playwright 发现 API 接口')
     print('='*70)
     print(f'药品: {keyword}')
     print('-'*70)
     
-    crawler = YSBangPlaywrightCrawler(headless=True)
-    
-    # 执行采集（会拦截 API）
-    result = await crawler.get_drug_provider_prices(keyword)
-    
     # 分析拦截到的 API
     print('\n📡 拦截到的 API 请求:')
     print('-'*70)
     
-    api_summary = {}
+    api_summary = defaultdict(lambda: {
+        'count': 0,
+        'urls': [],
+        'sample_data': None
+    })
     for resp in crawler._api_responses:
         url = resp['url']
         
         # 提取 API 名称
-        if 'getWholesaleListForPc' in url:
-            api_name = 'getWholesaleListForPc'
-        elif 'facetWholesaleList' in url:
-            api_name = 'facetWholesaleList'
-        elif 'getRegularSearchPurchaseList' in url:
-            api_name = 'getRegularSearchPurchaseList'
-        elif 'getHotWholesalesForProvider' in url:
-            api_name = 'getHotWholesalesForProvider'
-        else:
-            api_name = 'other'
-        
-        if api_name not in api_summary:
-            api_summary[api_name] = {
-                'count': 0,
-                'urls': [],
-                'sample_data': None
-            }
+        match = _API_PAT.search(url)
+        api_name = match.group(1) if match else 'other'
         
         api_summary[api_name]['count'] += 1
         if len(api_summary[api_name]['urls']) < 2:
@@ -112,15 +126,6 @@ async def discover_api():
                 
                 print(f'\n完整字段列表:')
                 print(f'  {list(item.keys())}')
-    
-    await crawler._close_browser()
-    
-    print('\n' + '='*70)
-    print('💡 结论')
-    print('='*70)
-    print('找到了获取供应商价格的 API: getWholesaleListForPc')
-    print('下一步: 实现纯 API 调用，不再依赖 Playwright')
-    print('='*70)
 
 if __name__ == '__main__':
     asyncio.run(discover_api())
@@ -5,32 +5,59 @@
 目的：拦截浏览器请求，找到获取供应商价格的正确 API
 """
 import asyncio
-import json
 import logging
+from collections import defaultdict
+import orjson
+from scraper.utils.browser_pool import BrowserPool
 from scraper.utils.playwright_crawler import YSBangPlaywrightCrawler
 
 # 设置日志
 logging.basicConfig(level=logging.INFO, format='%(message)s')
 logger = logging.getLogger(__name__)
 
-async def discover_api():
+# 关注的 API 名称（与爬虫拦截的端点一致），一次正则扫描完成分类
+_API_PAT = YSBangPlaywrightCrawler.API_PATTERN
+
+# 待分析的药品关键词，共用一个浏览器池并发采集
+KEYWORDS = ['天麻蜜环菌片']
+
+async def _crawl(pool, keyword):
+    """使用浏览器池采集单个关键词，返回带拦截记录的爬虫"""
+    # 拦截时只保留关注的 API，其余响应不读取也不保存
+    crawler = YSBangPlaywrightCrawler(headless=True, pool=pool, api_filter=_API_PAT)
+    
+    # 执行采集（会拦截 API）
+    logger.info(f"开始采集 {keyword}，拦截 API 请求...")
+    await crawler.get_drug_provider_prices(keyword)
+    
+    logger.info(f"{keyword} 采集完成，拦截到 {len(crawler._api_responses)} 个 API 请求")
+    return crawler
+
+async def discover_api(keywords=KEYWORDS):
     """发现 API 接口"""
-    keyword = '天麻蜜环菌片'
+    # 浏览器只启动一次，各关键词各用一个页面
+    async with BrowserPool(headless=True) as pool:
+        crawlers = await asyncio.gather(*[_crawl(pool, keyword) for keyword in keywords])
+    
+    for keyword, crawler in zip(keywords, crawlers):
+        report_api(keyword, crawler)
     
+    print('\n' + '='*70)
+    print('💡 下一步')
+    print('='*70)
+    print('1. 找到了 API 接口和参数')
+    print('2. 实现纯 API 调用')
+    print('3. 替换 Playwright 采集')
+    print('='*70)
+
+def report_api(keyword, crawler):
+    """分析并打印单个关键词拦截到的 API"""
     print('='*70)
     print('🔍 使用 Playwright 发现 API 接口')
     print('='*70)
     print(f'药品: {keyword}')
     print('-'*70)
     
-    crawler = YSBangPlaywrightCrawler(headless=True)
-    
-    # 执行采集（会拦截 API）
-    logger.info("开始采集，拦截 API 请求...")
-    result = await crawler.get_drug_provider_prices(keyword)
-    
-    logger.info(f"采集完成，拦截到 {len(crawler._api_responses)} 个 API 请求")
-    
     # 分析拦截到的 API
     print('\n📡 拦截到的 API 请求:')
     print('-'*70)
@@ -41,25 +68,17 @@ async def discover_api():
         print('  1. Token 失效')
         print('  2. 页面加载失败')
         print('  3. API 拦截器未正常工作')
-        await crawler._close_browser()
         return
     
     # 按 API 类型分组
-    api_groups = {}
+    api_groups = defaultdict(list)
     for resp in crawler._api_responses:
         url = resp['url']
         
         # 提取 API 名称
-        api_name = 'unknown'
-        for pattern in ['getWholesaleListForPc', 'facetWholesaleList', 
-                       'getRegularSearchPurchaseList', 'getHotWholesalesForProvider',
-                       'getDrugDetail']:
-            if pattern in url:
-                api_name = pattern
-                break
+        match = _API_PAT.search(url)
+        api_name = match.group(1) if match else 'unknown'
         
-        if api_name not in api_groups:
-            api_groups[api_name] = []
         api_groups[api_name].append(resp)
     
     # 显示每个 API 的信息
@@ -126,7 +145,7 @@ async def discover_api():
                     if items:
                         print(f'\n供应商数据示例:')
                         item = items[0]
-                        print(json.dumps(item, ensure_ascii=False, indent=2)[:500])
+                        print(orjson.dumps(item, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS).decode()[:500])
                         
                         print(f'\n关键字段:')
                         for key in ['drugname', 'price', 'abbreviation', 'providerId', 
@@ -139,16 +158,6 @@ async def discover_api():
         print('  1. 滚动页面加载更多')
         print('  2. 点击查看更多供应商')
         print('  3. 检查 API 拦截器配置')
-    
-    await crawler._close_browser()
-    
-    print('\n' + '='*70)
-    print('💡 下一步')
-    print('='*70)
-    print('1. 找到了 API 接口和参数')
-    print('2. 实现纯 API 调用')
-    print('3. 替换 Playwright 采集')
-    print('='*70)
 
 if __name__ == '__main__':
     asyncio.run(discover_api())
@@ -4,21 +4,140 @@
 
 策略：
 1. 先获取药品的 drugId
-2. 再获取该药品的所有供应商价格
+2. 再并发探测所有候选 API，任一返回供应商价格即结束
 """
-import requests
-import json
+import asyncio
+import hashlib
+import os
+import time
+from pathlib import Path
+
+import httpx
+import orjson
+
+TOKEN_CACHE_FILE = Path('.token_cache.json')
+
+# 探测结果本地缓存：相同 URL + 请求体在 TTL 内直接使用缓存，不再请求网络
+PROBE_CACHE_DIR = Path('.probe_cache')
+PROBE_CACHE_TTL = 300  # 秒
+
+# 上次读取的 (Token 文件修改时间, Token)，文件未修改时不再重新读取
+_token_cache = (None, '')
 
 def get_token():
-    """获取 Token"""
+    """获取 Token（Token 文件未修改时直接返回上次读取的结果；读取失败不缓存，下次调用重新读取）"""
+    global _token_cache
     try:
-        with open('.token_cache.json', 'r') as f:
-            cache = json.load(f)
-            return cache.get('token', '')
-    except:
+        mtime = os.stat(TOKEN_CACHE_FILE).st_mtime
+        if mtime != _token_cache[0]:
+            _token_cache = (mtime, orjson.loads(TOKEN_CACHE_FILE.read_bytes()).get('token', ''))
+        return _token_cache[1]
+    except Exception:
         return ''
 
-def test_provider_price_api():
+def _find_price_items(result):
+    """从 API 返回的 data 中找出带 price 字段的供应商列表，找不到返回 None"""
+    if isinstance(result, list):
+        print(f'   ✅ 返回列表: {len(result)} 条')
+        if result and 'price' in result[0]:
+            return result
+    
+    elif isinstance(result, dict):
+        print(f'   ✅ 返回字典: {list(result.keys())}')
+        
+        # 检查嵌套列表
+        for key in ['list', 'wholesales', 'items', 'records']:
+            if key in result:
+                items = result[key]
+                if isinstance(items, list) and items:
+                    print(f'   └─ {key}: {len(items)} 条')
+                    if 'price' in items[0]:
+                        return items
+    return None
+
+def _probe_cache_path(url, body):
+    """缓存文件路径，以 (url, 请求体) 的 sha1 为键"""
+    key = hashlib.sha1(url.encode() + orjson.dumps(body, option=orjson.OPT_SORT_KEYS)).hexdigest()
+    return PROBE_CACHE_DIR / f'{key}.json'
+
+async def _cached_post(client, url, body):
+    """
+    带本地缓存的 POST 请求
+    
+    2xx 和 404 响应都会缓存，重复探测时直接返回，不再访问网络
+    """
+    cache_path = _probe_cache_path(url, body)
+    try:
+        cached = orjson.loads(cache_path.read_bytes())
+        if cached['ts'] > time.time() - PROBE_CACHE_TTL:
+            return httpx.Response(cached['status_code'], content=cached['content'].encode('utf-8'))
+    except (OSError, ValueError, KeyError):
+        pass
+    
+    resp = await client.post(url, json=body)
+    if resp.is_success or resp.status_code == 404:
+        try:
+            PROBE_CACHE_DIR.mkdir(exist_ok=True)
+            cache_path.write_bytes(orjson.dumps({
+                'ts': time.time(),
+                'status_code': resp.status_code,
+                'content': resp.content.decode('utf-8', errors='replace')
+            }))
+        except OSError:
+            pass
+    return resp
+
+async def _probe(client, test):
+    """发送单个候选 API 请求，异常也作为结果返回"""
+    try:
+        resp = await _cached_post(client, test['url'], test['body'])
+        return test, resp, None
+    except Exception as e:
+        return test, None, e
+
+def _report_probe(test, resp, error):
+    """打印单个候选 API 的探测结果，找到供应商价格时返回 True"""
+    print(f'\n📡 测试: {test["name"]}')
+    print(f'   URL: {test["url"]}')
+    
+    if error is not None:
+        print(f'   ❌ 异常: {error}')
+        return False
+    
+    if resp.status_code == 404:
+        print(f'   ❌ 404 Not Found')
+        return False
+    
+    try:
+        data = orjson.loads(resp.content)
+    except Exception as e:
+        print(f'   ❌ 异常: {e}')
+        return False
+    
+    code = data.get('code')
+    message = data.get('message', '')
+    
+    print(f'   状态: {resp.status_code}, code: {code}')
+    
+    if code not in ['0', 0, '40001']:
+        print(f'   ❌ 错误: {message}')
+        return False
+    
+    items = _find_price_items(data.get('data', {}))
+    if not items:
+        return False
+    
+    print(f'   ✅✅ 找到供应商价格！')
+    print(f'   示例: {items[0].get("drugname", "")}: ¥{items[0].get("price", 0)}')
+    print(f'   供应商: {items[0].get("abbreviation", "")}')
+    
+    # 显示更多示例
+    print(f'\n   前5个供应商:')
+    for i, item in enumerate(items[:5], 1):
+        print(f'   {i}. {item.get("abbreviation", "未知")}: ¥{item.get("price", 0)}')
+    return True
+
+async def test_provider_price_api():
     """测试获取供应商价格的 API"""
     
     token = get_token()
@@ -44,128 +163,89 @@ def test_provider_price_api():
     }
     cookies = {'Token': token}
     
-    # 步骤1: 获取药品信息（包含 drugId）
-    print('\n步骤1: 获取药品信息')
-    print('-'*70)
-    
-    url1 = 'https://dian.ysbang.cn/wholesale-drug/sales/getRegularSearchPurchaseListForPc/v5430'
-    body1 = {'keyword': keyword, 'page': 1, 'pageSize': 10}
-    
-    try:
-        resp1 = requests.post(url1, json=body1, headers=headers, cookies=cookies, timeout=15)
-        data1 = resp1.json()
+    # 同一个 client 复用连接（只握手一次），候选 API 通过 HTTP/2 多路复用并发发送
+    # 连接失败时自动重试，保活连接数与并发探测数一致
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=2,
+        limits=httpx.Limits(max_connections=4, max_keepalive_connections=4, keepalive_expiry=30)
+    )
+    async with httpx.AsyncClient(headers=headers, cookies=cookies, timeout=15, transport=transport) as client:
+        # 步骤1: 获取药品信息（包含 drugId）
+        print('\n步骤1: 获取药品信息')
+        print('-'*70)
+        
+        url1 = 'https://dian.ysbang.cn/wholesale-drug/sales/getRegularSearchPurchaseListForPc/v5430'
+        body1 = {'keyword': keyword, 'page': 1, 'pageSize': 10}
         
-        if data1.get('code') in ['0', 0, '40001']:
-            items = data1.get('data', [])
-            if items:
-                # 取第一个药品
-                first_item = items[0]
-                drug = first_item.get('drug', {})
-                drug_id = drug.get('drugId')
-                drug_name = drug.get('drugName', '')
-                min_price = drug.get('minprice', '')
-                max_price = drug.get('maxprice', '')
-                wholesale_num = drug.get('wholesaleNum', 0)
-                
-                print(f'✅ 找到药品:')
-                print(f'   drugId: {drug_id}')
-                print(f'   名称: {drug_name}')
-                print(f'   价格范围: ¥{min_price} - ¥{max_price}')
-                print(f'   供应商数: {wholesale_num}')
-                
-                # 步骤2: 使用 drugId 获取供应商列表
-                print(f'\n步骤2: 获取该药品的所有供应商价格')
-                print('-'*70)
-                
-                # 尝试多个可能的 API
-                test_apis = [
-                    {
-                        'name': 'getWholesaleListForPc (带drugId)',
-                        'url': 'https://dian.ysbang.cn/wholesale-drug/sales/getWholesaleListForPc',
-                        'body': {'drugId': drug_id, 'page': 1, 'pageSize': 100}
-                    },
-                    {
-                        'name': 'facetWholesaleList (带drugId)',
-                        'url': 'https://dian.ysbang.cn/wholesale-drug/sales/facetWholesaleList/v4270',
-                        'body': {'drugId': drug_id}
-                    },
-                    {
-                        'name': 'getWholesalesByDrugId',
-                        'url': 'https://dian.ysbang.cn/wholesale-drug/sales/getWholesalesByDrugId',
-                        'body': {'drugId': drug_id, 'page': 1, 'pageSize': 100}
-                    },
-                    {
-                        'name': 'getDrugWholesales',
-                        'url': 'https://dian.ysbang.cn/wholesale-drug/sales/getDrugWholesales',
-                        'body': {'drugId': drug_id, 'page': 1, 'pageSize': 100}
-                    },
-                ]
-                
-                for test in test_apis:
-                    print(f'\n📡 测试: {test["name"]}')
-                    print(f'   URL: {test["url"]}')
+        try:
+            resp1 = await _cached_post(client, url1, body1)
+            data1 = orjson.loads(resp1.content)
+            
+            if data1.get('code') in ['0', 0, '40001']:
+                items = data1.get('data', [])
+                if items:
+                    # 取第一个药品
+                    first_item = items[0]
+                    drug = first_item.get('drug', {})
+                    drug_id = drug.get('drugId')
+                    drug_name = drug.get('drugName', '')
+                    min_price = drug.get('minprice', '')
+                    max_price = drug.get('maxprice', '')
+                    wholesale_num = drug.get('wholesaleNum', 0)
+                    
+                    print(f'✅ 找到药品:')
+                    print(f'   drugId: {drug_id}')
+                    print(f'   名称: {drug_name}')
+                    print(f'   价格范围: ¥{min_price} - ¥{max_price}')
+                    print(f'   供应商数: {wholesale_num}')
+                    
+                    # 步骤2: 使用 drugId 获取供应商列表
+                    print(f'\n步骤2: 获取该药品的所有供应商价格')
+                    print('-'*70)
                     
+                    # 尝试多个可能的 API
+                    test_apis = [
+                        {
+                            'name': 'getWholesaleListForPc (带drugId)',
+                            'url': 'https://dian.ysbang.cn/wholesale-drug/sales/getWholesaleListForPc',
+                            'body': {'drugId': drug_id, 'page': 1, 'pageSize': 100}
+                        },
+                        {
+                            'name': 'facetWholesaleList (带drugId)',
+                            'url': 'https://dian.ysbang.cn/wholesale-drug/sales/facetWholesaleList/v4270',
+                            'body': {'drugId': drug_id}
+                        },
+                        {
+                            'name': 'getWholesalesByDrugId',
+                            'url': 'https://dian.ysbang.cn/wholesale-drug/sales/getWholesalesByDrugId',
+                            'body': {'drugId': drug_id, 'page': 1, 'pageSize': 100}
+                        },
+                        {
+                            'name': 'getDrugWholesales',
+                            'url': 'https://dian.ysbang.cn/wholesale-drug/sales/getDrugWholesales',
+                            'body': {'drugId': drug_id, 'page': 1, 'pageSize': 100}
+                        },
+                    ]
+                    
+                    # 并发发送所有候选请求，按完成顺序处理结果
+                    tasks = [asyncio.create_task(_probe(client, test)) for test in test_apis]
                     try:
-                        resp = requests.post(
-                            test['url'],
-                            json=test['body'],
-                            headers=headers,
-                            cookies=cookies,
-                            timeout=15
-                        )
-                        
-                        if resp.status_code == 404:
-                            print(f'   ❌ 404 Not Found')
-                            continue
-                        
-                        data = resp.json()
-                        code = data.get('code')
-                        message = data.get('message', '')
-                        
-                        print(f'   状态: {resp.status_code}, code: {code}')
-                        
-                        if code in ['0', 0, '40001']:
-                            result = data.get('data', {})
-                            
-                            if isinstance(result, list):
-                                print(f'   ✅ 返回列表: {len(result)} 条')
-                                if result and 'price' in result[0]:
-                                    print(f'   ✅✅ 找到供应商价格！')
-                                    print(f'   示例: {result[0].get("drugname", "")}: ¥{result[0].get("price", 0)}')
-                                    print(f'   供应商: {result[0].get("abbreviation", "")}')
-                                    return  # 找到了！
-                            
-                            elif isinstance(result, dict):
-                                print(f'   ✅ 返回字典: {list(result.keys())}')
-                                
-                                # 检查嵌套列表
-                                for key in ['list', 'wholesales', 'items', 'records']:
-                                    if key in result:
-                                        items = result[key]
-                                        if isinstance(items, list) and items:
-                                            print(f'   └─ {key}: {len(items)} 条')
-                                            if 'price' in items[0]:
-                                                print(f'   ✅✅ 找到供应商价格！')
-                                                print(f'   示例: {items[0].get("drugname", "")}: ¥{items[0].get("price", 0)}')
-                                                print(f'   供应商: {items[0].get("abbreviation", "")}')
-                                                
-                                                # 显示更多示例
-                                                print(f'\n   前5个供应商:')
-                                                for i, item in enumerate(items[:5], 1):
-                                                    print(f'   {i}. {item.get("abbreviation", "未知")}: ¥{item.get("price", 0)}')
-                                                return  # 找到了！
-                        else:
-                            print(f'   ❌ 错误: {message}')
-                            
-                    except Exception as e:
-                        print(f'   ❌ 异常: {e}')
-                
-                print(f'\n❌ 未找到获取供应商价格的 API')
-                
-    except Exception as e:
-        print(f'❌ 步骤1失败: {e}')
+                        for next_done in asyncio.as_completed(tasks):
+                            test, resp, error = await next_done
+                            if _report_probe(test, resp, error):
+                                return  # 找到了！
+                    finally:
+                        # 找到结果后取消仍在进行的请求
+                        for task in tasks:
+                            task.cancel()
+                    
+                    print(f'\n❌ 未找到获取供应商价格的 API')
+                    
+        except Exception as e:
+            print(f'❌ 步骤1失败: {e}')
     
     print('\n' + '='*70)
 
 if __name__ == '__main__':
-    test_provider_price_api()
+    asyncio.run(test_provider_price_api())
@@ -1,15 +1,45 @@
 """
 修复数据库中的商品类别误判
 """
-import sqlite3
+import sys
+import hashlib
+from collections import Counter
+from datetime import datetime
+from app.models import open_sqlite
 from app.services.crawl_service import CrawlService
 
-def fix_categories():
-    """修复已知的误判"""
+def _name_digest(name, manufacturer):
+    """药品名称 + 厂家的摘要，用于判断该商品是否已检测过"""
+    return hashlib.md5(f'{name}\x00{manufacturer or ""}'.encode('utf-8')).hexdigest()[:16]
+
+def fix_categories(full_rescan=False):
+    """
+    修复已知的误判
+    
+    Args:
+        full_rescan: 是否忽略上次检测记录，重新检测全部商品（检测规则更新后使用）
+    """
     
-    conn = sqlite3.connect('pharma_prices.db')
+    conn = open_sqlite('pharma_prices.db')
+    conn.create_function('name_digest', 2, _name_digest, deterministic=True)
     cursor = conn.cursor()
     
+    # 类别索引，供后续按类别统计和排序使用
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_drugs_category ON drugs(category)")
+    
+    # 检测记录：摘要 → 上次检测后的类别，名称/厂家/类别均未变化的商品无需重新检测
+    cursor.execute("""
+        CREATE TABLE IF NOT EXISTS detection_runs (
+            digest TEXT PRIMARY KEY,
+            category TEXT,
+            confidence REAL,
+            detected_at TIMESTAMP
+        )
+    """)
+    if full_rescan:
+        cursor.execute("DELETE FROM detection_runs")
+    conn.commit()
+    
     print("=" * 70)
     print("修复商品类别误判")
     print("=" * 70)
@@ -40,72 +70,81 @@ def fix_categories():
     
     conn.commit()
     
-    # 3. 重新检测所有商品的类别
-    print("\n3. 重新检测所有商品类别...")
+    # 3. 重新检测新增或有变化的商品类别
+    print("\n3. 重新检测商品类别...")
     
     service = CrawlService()
     
-    cursor.execute("SELECT id, name, manufacturer FROM drugs")
+    # 一次查询取出当前类别，跳过上次检测后未变化的商品
+    cursor.execute("""
+        SELECT d.id, d.name, d.manufacturer, d.category 
+        FROM drugs d 
+        LEFT JOIN detection_runs r ON r.digest = name_digest(d.name, d.manufacturer)
+        WHERE r.digest IS NULL OR r.category IS NOT d.category
+    """)
     drugs = cursor.fetchall()
+    print(f"   待检测 {len(drugs)} 条记录")
     
-    updated = 0
-    for drug_id, name, manufacturer in drugs:
+    updates = []
+    detections = []
+    detected_at = datetime.now().isoformat()
+    for drug_id, name, manufacturer, current_category in drugs:
         result = service._detect_product_category(name, manufacturer or '')
         new_category = result['category']
         confidence = result['confidence']
         
-        # 获取当前类别
-        cursor.execute("SELECT category FROM drugs WHERE id = ?", (drug_id,))
-        current_category = cursor.fetchone()[0]
-        
         # 如果类别不同且新类别置信度高，则更新
+        final_category = current_category
         if current_category != new_category and confidence >= 0.8:
-            cursor.execute("""
-                UPDATE drugs 
-                SET category = ? 
-                WHERE id = ?
-            """, (new_category, drug_id))
-            updated += 1
+            updates.append((new_category, drug_id))
+            final_category = new_category
             print(f"   更新: {name}")
             print(f"     {current_category} → {new_category} (置信度={confidence:.2f})")
+        
+        # 记录检测后的最终类别，下次运行时类别未变即可跳过
+        detections.append((_name_digest(name, manufacturer), final_category, confidence, detected_at))
+    
+    # 在单个事务中批量更新
+    conn.execute('BEGIN')
+    cursor.executemany("""
+        UPDATE drugs 
+        SET category = ? 
+        WHERE id = ?
+    """, updates)
+    cursor.executemany("""
+        INSERT OR REPLACE INTO detection_runs (digest, category, confidence, detected_at) 
+        VALUES (?, ?, ?, ?)
+    """, detections)
+    updated = len(updates)
     
     conn.commit()
     print(f"\n   ✓ 更新了 {updated} 条记录")
     
-    # 4. 显示最终统计
+    # 4. 显示最终统计（统计与非药品列表共用一次查询）
     print("\n4. 最终统计:")
     cursor.execute("""
-        SELECT category, COUNT(*) as count 
+        SELECT category, name 
         FROM drugs 
-        GROUP BY category 
-        ORDER BY count DESC
+        ORDER BY category, name
     """)
+    rows = cursor.fetchall()
+    
+    category_names = {
+        'drug': '药品',
+        'cosmetic': '化妆品',
+        'medical_device': '医疗器械',
+        'health_product': '保健品'
+    }
     
-    for category, count in cursor.fetchall():
-        category_names = {
-            'drug': '药品',
-            'cosmetic': '化妆品',
-            'medical_device': '医疗器械',
-            'health_product': '保健品'
-        }
+    for category, count in Counter(category for category, _ in rows).most_common():
         name = category_names.get(category, category)
         print(f"   {name}: {count}个")
     
     # 5. 显示非药品商品
     print("\n5. 非药品商品列表:")
-    cursor.execute("""
-        SELECT name, category 
-        FROM drugs 
-        WHERE category != 'drug' 
-        ORDER BY category, name
-    """)
-    
-    for name, category in cursor.fetchall():
-        category_names = {
-            'cosmetic': '化妆品',
-            'medical_device': '医疗器械',
-            'health_product': '保健品'
-        }
+    for category, name in rows:
+        if category is None or category == 'drug':
+            continue
         cat_name = category_names.get(category, category)
         print(f"   [{cat_name}] {name}")
     
@@ -116,4 +155,4 @@ def fix_categories():
     print("=" * 70)
 
 if __name__ == '__main__':
-    fix_categories()
+    fix_categories(full_rescan='--full' in sys.argv)
@@ -2,49 +2,149 @@
 生成代码统计报告
 """
 import os
+import re
+import json
+import mmap
+import shutil
+import subprocess
 from pathlib import Path
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+EXCLUDE_DIRS = {'venv', '.hypothesis', '.pytest_cache', '__pycache__', '.git', 'node_modules'}
+
+# 超过该大小的文件用 mmap 统计，小文件 mmap 建立映射的开销反而更大
+MMAP_THRESHOLD = 64 * 1024
+MMAP_CHUNK_SIZE = 1024 * 1024
+
+# 注释行：行首（可有空白）以 # 开头；空行：只含空白
+COMMENT_LINE_RE = re.compile(rb'(?m)^[ \t\f\v]*#')
+BLANK_LINE_RE = re.compile(rb'(?m)^[ \t\r\f\v]*$')
+
+def _empty_stats():
+    return {'files': 0, 'total': 0, 'code': 0, 'comment': 0, 'blank': 0}
+
+def _module_of(dir_path, root_dir):
+    """目录所属模块（根目录下的一级目录名）"""
+    rel_path = os.path.relpath(dir_path, root_dir)
+    if rel_path == '.':
+        return 'root'
+    return rel_path.split(os.sep)[0]
+
+def _count_lines_mmap(file_path):
+    """大文件统计：mmap 映射文件，不把内容复制到 Python 堆上"""
+    with open(file_path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        ends_with_newline = mm[-1:] == b'\n'
+        # 分块计数换行（mmap.count 需要 Python 3.13+）
+        newlines = sum(chunk.count(b'\n') for chunk in iter(lambda: mm.read(MMAP_CHUNK_SIZE), b''))
+        total = newlines + (0 if ends_with_newline else 1)
+        comment_lines = len(COMMENT_LINE_RE.findall(mm))
+        blank_lines = len(BLANK_LINE_RE.findall(mm))
+    # 以换行结尾时，正则会在文件末尾多匹配一个空行
+    if ends_with_newline:
+        blank_lines -= 1
+    return total, total - comment_lines - blank_lines, comment_lines, blank_lines
 
 def count_lines(file_path):
     """统计文件行数"""
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            lines = f.readlines()
-            code_lines = len([l for l in lines if l.strip() and not l.strip().startswith('#')])
-            comment_lines = len([l for l in lines if l.strip().startswith('#')])
-            blank_lines = len([l for l in lines if not l.strip()])
-            return len(lines), code_lines, comment_lines, blank_lines
+        if os.path.getsize(file_path) > MMAP_THRESHOLD:
+            return _count_lines_mmap(file_path)
+        with open(file_path, 'rb') as f:
+            data = f.read()
     except:
         return 0, 0, 0, 0
+    
+    # 直接在字节上单次遍历，同时统计代码、注释、空行，无需解码
+    code_lines = comment_lines = blank_lines = 0
+    for line in data.splitlines():
+        stripped = line.lstrip()
+        if not stripped:
+            blank_lines += 1
+        elif stripped.startswith(b'#'):
+            comment_lines += 1
+        else:
+            code_lines += 1
+    return code_lines + comment_lines + blank_lines, code_lines, comment_lines, blank_lines
+
+def _flatten_tokei_stats(stats):
+    """合并 tokei 报告中嵌入语言（blobs）的行数"""
+    code, comment, blank = stats['code'], stats['comments'], stats['blanks']
+    for blob in stats.get('blobs', {}).values():
+        c, m, b = _flatten_tokei_stats(blob)
+        code, comment, blank = code + c, comment + m, blank + b
+    return code, comment, blank
+
+def analyze_with_tokei(root_dir, extensions_list):
+    """
+    使用 tokei 一次性统计目录，未安装 tokei 或执行失败时返回 None
+    
+    返回与 extensions_list 一一对应的统计列表，结构同 analyze_directory
+    """
+    tokei = shutil.which('tokei')
+    if not tokei:
+        return None
+    
+    cmd = [tokei, '--output', 'json']
+    for d in sorted(EXCLUDE_DIRS):
+        cmd += ['--exclude', d]
+    cmd.append(root_dir)
+    
+    try:
+        result = subprocess.run(cmd, capture_output=True, check=True)
+        languages = json.loads(result.stdout)
+    except (OSError, subprocess.CalledProcessError, ValueError):
+        return None
+    
+    results = [defaultdict(_empty_stats) for _ in extensions_list]
+    for lang_name, language in languages.items():
+        if lang_name == 'Total':
+            continue
+        for report in language.get('reports', []):
+            file_path = report['name']
+            ext = os.path.splitext(file_path)[1]
+            for extensions, stats in zip(extensions_list, results):
+                if ext not in extensions:
+                    continue
+                code, comment, blank = _flatten_tokei_stats(report['stats'])
+                module_stats = stats[_module_of(os.path.dirname(file_path), root_dir)]
+                module_stats['files'] += 1
+                module_stats['total'] += code + comment + blank
+                module_stats['code'] += code
+                module_stats['comment'] += comment
+                module_stats['blank'] += blank
+    
+    return results
 
 def analyze_directory(root_dir, extensions):
     """分析目录"""
-    stats = defaultdict(lambda: {'files': 0, 'total': 0, 'code': 0, 'comment': 0, 'blank': 0})
-    
-    exclude_dirs = {'venv', '.hypothesis', '.pytest_cache', '__pycache__', '.git', 'node_modules'}
+    stats = defaultdict(_empty_stats)
     
+    # 先一次遍历收集所有待统计文件
+    modules = []
+    paths = []
     for root, dirs, files in os.walk(root_dir):
         # 排除目录
-        dirs[:] = [d for d in dirs if d not in exclude_dirs]
+        dirs[:] = [d for d in dirs if d not in EXCLUDE_DIRS]
         
-        # 获取相对路径
-        rel_path = os.path.relpath(root, root_dir)
-        if rel_path == '.':
-            module = 'root'
-        else:
-            module = rel_path.split(os.sep)[0]
+        module = _module_of(root, root_dir)
         
         for file in files:
             ext = os.path.splitext(file)[1]
             if ext in extensions:
-                file_path = os.path.join(root, file)
-                total, code, comment, blank = count_lines(file_path)
-                
-                stats[module]['files'] += 1
-                stats[module]['total'] += total
-                stats[module]['code'] += code
-                stats[module]['comment'] += comment
-                stats[module]['blank'] += blank
+                modules.append(module)
+                paths.append(os.path.join(root, file))
+    
+    # 文件读取是 IO 密集型，read() 期间释放 GIL，多线程可重叠 IO
+    max_workers = min(32, (os.cpu_count() or 1) * 4)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        counts = executor.map(count_lines, paths)
+        for module, (total, code, comment, blank) in zip(modules, counts):
+            stats[module]['files'] += 1
+            stats[module]['total'] += total
+            stats[module]['code'] += code
+            stats[module]['comment'] += comment
+            stats[module]['blank'] += blank
     
     return stats
 
@@ -54,9 +154,14 @@ def generate_report():
     print("医药价格发现系统 - 代码统计报告")
     print("=" * 80)
     
+    # 优先用 tokei 一次扫描全部文件，不可用时逐个文件统计
+    all_stats = analyze_with_tokei('.', [['.py'], ['.html'], ['.md']])
+    if all_stats is None:
+        all_stats = [analyze_directory('.', ext) for ext in (['.py'], ['.html'], ['.md'])]
+    py_stats, html_stats, md_stats = all_stats
+    
     # Python文件统计
     print("\n## Python代码统计\n")
-    py_stats = analyze_directory('.', ['.py'])
     
     print(f"{'模块':<20} {'文件数':>8} {'总行数':>10} {'代码行':>10} {'注释行':>10} {'空行':>10}")
     print("-" * 80)
@@ -74,7 +179,6 @@ def generate_report():
     
     # HTML文件统计
     print("\n## HTML模板统计\n")
-    html_stats = analyze_directory('.', ['.html'])
     
     html_total = sum(s['total'] for s in html_stats.values())
     html_files = sum(s['files'] for s in html_stats.values())
@@ -84,7 +188,6 @@ def generate_report():
     
     # Markdown文件统计
     print("\n## 文档统计\n")
-    md_stats = analyze_directory('.', ['.md'])
     
     md_total = sum(s['total'] for s in md_stats.values())
     md_files = sum(s['files'] for s in md_stats.values())
@@ -0,0 +1,35 @@
+"""
+Gunicorn 生产环境配置
+
+启动命令: gunicorn -c gunicorn_conf.py run:app
+"""
+import os
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, '').lower() in ('1', 'true', 'yes')
+
+
+# Cloud Run 使用 PORT 环境变量
+bind = f"0.0.0.0:{os.environ.get('PORT', 5001)}"
+
+# 多进程 + 多线程：Flask 开发服务器串行处理请求，这里可真正并发
+# 每个 worker 各自启动共享的 Chromium、各有一份内存价格缓存，默认只开 2 个进程
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+# Playwright 完整模式采集一次可能需要 30 秒以上
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 120))
+
+# 主进程导入应用后再 fork（GUNICORN_PRELOAD=1 启用），worker 通过写时复制共享内存，缩短冷启动
+preload_app = _env_flag('GUNICORN_PRELOAD')
+
+# 启用定时任务时，调度器线程在创建应用的进程中启动（fork 后的子进程中不会运行），
+# 任务管理接口也只能操作本进程的调度器：只启动一个 worker，且不预加载应用
+if _env_flag('ENABLE_SCHEDULER'):
+    workers = 1
+    preload_app = False
+
+accesslog = '-'
+errorlog = '-'
@@ -5,16 +5,19 @@
 - is_outlier: 价格异常标注 (0=正常, 1=异常高, -1=异常低, 2=占位价格)
 - outlier_reason: 异常原因说明
 """
-import sqlite3
+from app.models import open_sqlite
 
 def migrate():
-    conn = sqlite3.connect('pharma_prices.db')
+    conn = open_sqlite('pharma_prices.db')
     cursor = conn.cursor()
     
     try:
+        # 整个迁移放在一个事务中，只在提交时落盘一次
+        conn.execute('BEGIN IMMEDIATE')
+        
         # 检查字段是否已存在
-        cursor.execute("PRAGMA table_info(price_records)")
-        columns = [col[1] for col in cursor.fetchall()]
+        columns = {col[1] for col in cursor.execute("PRAGMA table_info(price_records)").fetchall()}
+        drug_columns = {col[1] for col in cursor.execute("PRAGMA table_info(drugs)").fetchall()}
         
         # 添加 is_outlier 字段
         if 'is_outlier' not in columns:
@@ -39,9 +42,6 @@ def migrate():
             print("outlier_reason 字段已存在")
         
         # 检查 drugs 表的 category 字段
-        cursor.execute("PRAGMA table_info(drugs)")
-        drug_columns = [col[1] for col in cursor.fetchall()]
-        
         if 'category' not in drug_columns:
             print("添加 category 字段到 drugs 表...")
             cursor.execute("""
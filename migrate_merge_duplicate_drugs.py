@@ -0,0 +1,79 @@
+"""
+数据库迁移脚本：合并重复药品并创建药品唯一索引
+
+药品唯一键为 名称 + 规格 + 厂家，规格、厂家为 NULL 与空字符串视为相同。
+建表早于唯一索引的数据库中可能已有重复药品，采集管道打开时会因此报错。
+
+每组重复药品保留ID最小的记录:
+- 保留的记录没有批准文号时，使用重复记录中的批准文号
+- price_records、drug_aliases、price_alerts 中的 drug_id 改为保留的记录
+- 删除其余重复记录
+"""
+from app.models import open_sqlite
+
+# 与 app.models.DRUG_IDENTITY 一致
+IDENTITY = "name, COALESCE(specification, ''), COALESCE(manufacturer, '')"
+
+# 引用 drugs.id 的表
+REFERENCING_TABLES = ('price_records', 'drug_aliases', 'price_alerts')
+
+
+def migrate(db_path='pharma_prices.db'):
+    conn = open_sqlite(db_path)
+    cursor = conn.cursor()
+
+    try:
+        # 整个迁移放在一个事务中，只在提交时落盘一次
+        conn.execute('BEGIN IMMEDIATE')
+
+        tables = {row[0] for row in cursor.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+        referencing_tables = [table for table in REFERENCING_TABLES if table in tables]
+
+        groups = cursor.execute(f"""
+            SELECT MIN(id), {IDENTITY} FROM drugs
+            GROUP BY {IDENTITY}
+            HAVING COUNT(*) > 1
+        """).fetchall()
+        print(f"发现 {len(groups)} 组重复药品")
+
+        merged = 0
+        for keep_id, *key in groups:
+            duplicate_ids = [row[0] for row in cursor.execute(f"""
+                SELECT id FROM drugs
+                WHERE ({IDENTITY}) = (?, ?, ?) AND id != ?
+            """, (*key, keep_id))]
+            placeholders = ', '.join('?' * len(duplicate_ids))
+
+            cursor.execute(f"""
+                UPDATE drugs
+                SET approval_number = (
+                    SELECT MAX(approval_number) FROM drugs WHERE id IN ({placeholders})
+                )
+                WHERE id = ? AND (approval_number IS NULL OR approval_number = '')
+            """, (*duplicate_ids, keep_id))
+            for table in referencing_tables:
+                cursor.execute(
+                    f"UPDATE {table} SET drug_id = ? WHERE drug_id IN ({placeholders})",
+                    (keep_id, *duplicate_ids)
+                )
+            cursor.execute(f"DELETE FROM drugs WHERE id IN ({placeholders})", duplicate_ids)
+            merged += len(duplicate_ids)
+
+        if merged:
+            print(f"✓ 已合并 {merged} 条重复药品记录")
+
+        cursor.execute("DROP INDEX IF EXISTS uq_drugs_name_spec_manufacturer")
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS uq_drugs_identity ON drugs ({IDENTITY})")
+        print("✓ 药品唯一索引已创建")
+
+        conn.commit()
+        print("\n✅ 数据库迁移完成！")
+
+    except Exception as e:
+        print(f"❌ 迁移失败: {e}")
+        conn.rollback()
+    finally:
+        conn.close()
+
+if __name__ == '__main__':
+    migrate()
@@ -2,6 +2,7 @@
 应用启动入口
 """
 import os
+import shutil
 from app import create_app
 
 app = create_app()
@@ -13,4 +14,12 @@ if __name__ == '__main__':
     print("医药价格发现系统")
     print(f"访问地址: http://0.0.0.0:{port}")
     print("=" * 50)
-    app.run(debug=False, host='0.0.0.0', port=port)
+    
+    # 已安装 gunicorn 时使用生产服务器替换当前进程
+    if shutil.which('gunicorn'):
+        base_dir = os.path.dirname(os.path.abspath(__file__))
+        conf = os.path.join(base_dir, 'gunicorn_conf.py')
+        os.execvp('gunicorn', ['gunicorn', '--chdir', base_dir, '-c', conf, 'run:app'])
+    
+    # 未安装 gunicorn（如 Windows 本地开发）时退回 Flask 内置服务器
+    app.run(debug=False, host='0.0.0.0', port=port, threaded=True, use_reloader=False)
@@ -2,38 +2,66 @@
 Scrapy数据项定义
 定义DrugItem用于存储爬取的药品信息
 """
-import scrapy
+from dataclasses import dataclass, fields
+from typing import Any, Union
 
 
-class DrugItem(scrapy.Item):
+@dataclass(slots=True)
+class DrugItem:
     """
     药品数据项
-    
+
     用于在爬虫和管道之间传递药品信息
+    使用 slots 数据类（Scrapy 原生支持，ItemAdapter 自动识别），
+    字段访问为属性访问，比 scrapy.Item 的字典存储更快、占用内存更少；
+    同时保留 item['name'] 形式的字段读写
     """
     # 药品名称
-    name = scrapy.Field()
-    
+    name: str = ''
+
     # 规格（如：10mg*24片）
-    specification = scrapy.Field()
-    
-    # 价格（字符串格式，需在管道中清洗）
-    price = scrapy.Field()
-    
+    specification: str = ''
+
+    # 价格（爬虫提取的字符串，经清洗管道转换为 float）
+    price: Union[str, float, None] = ''
+
     # 来源URL
-    source_url = scrapy.Field()
-    
+    source_url: str = ''
+
     # 来源网站名称
-    source_name = scrapy.Field()
-    
+    source_name: str = ''
+
     # 剂型（可选）
-    dosage_form = scrapy.Field()
-    
+    dosage_form: str = ''
+
     # 生产厂家（可选）
-    manufacturer = scrapy.Field()
-    
+    manufacturer: str = ''
+
     # 批准文号（如：国药准字Z35020243）
-    approval_number = scrapy.Field()
-    
+    approval_number: str = ''
+
     # 产品类别（drug=药品, medical_device=医疗器械, cosmetic=化妆品, other=其他）
-    category = scrapy.Field()
+    category: str = 'drug'
+
+    def __getitem__(self, key: str) -> Any:
+        if key not in _FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key: str, value: Any):
+        if key not in _FIELD_NAMES:
+            raise KeyError(f"DrugItem does not support field: {key}")
+        setattr(self, key, value)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """与 scrapy.Item 一致的字段读取，未知字段返回默认值"""
+        if key not in _FIELD_NAMES:
+            return default
+        return getattr(self, key)
+
+    def keys(self):
+        """字段名列表，支持 dict(item)"""
+        return [field.name for field in fields(self)]
+
+
+_FIELD_NAMES = frozenset(field.name for field in fields(DrugItem))
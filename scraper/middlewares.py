@@ -3,6 +3,7 @@ Scrapy中间件
 实现错误处理、重试机制和日志记录
 """
 import logging
+from collections import deque
 from datetime import datetime
 from typing import Optional
 
@@ -23,9 +24,13 @@ class ErrorLoggingMiddleware:
     记录所有请求错误和异常，便于监控和调试
     """
     
+    # 关闭时显示的最近错误数
+    RECENT_ERRORS = 10
+    
     def __init__(self, stats):
         self.stats = stats
-        self.error_log = []
+        # 只保留最近的错误用于展示，错误总数和分类计数记录在 Scrapy 统计中
+        self.error_log = deque(maxlen=self.RECENT_ERRORS)
     
     @classmethod
     def from_crawler(cls, crawler):
@@ -37,13 +42,14 @@ class ErrorLoggingMiddleware:
     def spider_opened(self, spider):
         """爬虫启动时初始化"""
         logger.info(f"错误日志中间件已启动: {spider.name}")
-        self.error_log = []
+        self.error_log.clear()
     
     def spider_closed(self, spider):
         """爬虫关闭时输出错误统计"""
         if self.error_log:
-            logger.warning(f"爬虫 {spider.name} 共发生 {len(self.error_log)} 个错误")
-            for error in self.error_log[-10:]:  # 只显示最后10个错误
+            total = self.stats.get_value('error_log/total', 0)
+            logger.warning(f"爬虫 {spider.name} 共发生 {total} 个错误")
+            for error in self.error_log:  # 只显示最近的错误
                 logger.warning(f"  - {error['url']}: {error['error']}")
         else:
             logger.info(f"爬虫 {spider.name} 运行完成，无错误")
@@ -56,7 +62,8 @@ class ErrorLoggingMiddleware:
             self._log_error(
                 url=request.url,
                 error=f"HTTP {response.status}: {response_status_message(response.status)}",
-                spider=spider
+                spider=spider,
+                error_type=f'HTTP_{response.status}'
             )
         return response
     
@@ -67,11 +74,12 @@ class ErrorLoggingMiddleware:
         self._log_error(
             url=request.url,
             error=f"{type(exception).__name__}: {str(exception)}",
-            spider=spider
+            spider=spider,
+            error_type=type(exception).__name__
         )
         return None  # 让其他中间件继续处理
     
-    def _log_error(self, url: str, error: str, spider: Spider):
+    def _log_error(self, url: str, error: str, spider: Spider, error_type: str = 'other'):
         """记录错误到日志"""
         error_entry = {
             'url': url,
@@ -83,6 +91,7 @@ class ErrorLoggingMiddleware:
         
         # 更新统计
         self.stats.inc_value('error_log/total')
+        self.stats.inc_value(f'error_log/by_type/{error_type}')
         
         logger.error(f"[{spider.name}] 请求错误 - URL: {url}, 错误: {error}")
 
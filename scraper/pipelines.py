@@ -4,18 +4,57 @@ Scrapy数据处理管道
 """
 import logging
 import re
-from decimal import Decimal, InvalidOperation
+from collections import OrderedDict
+from dataclasses import fields
+from datetime import datetime
 from typing import Optional
 
 from itemadapter import ItemAdapter
 from scrapy.exceptions import DropItem
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, Text, case, func, or_
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import scoped_session
+from twisted.internet.defer import Deferred, DeferredLock
+from twisted.internet.threads import deferToThread
 
 from config import DATABASE_URL
-from app.models import Drug, PriceRecord, init_db
+from app.models import DRUG_IDENTITY, Drug, PriceRecord, ensure_drug_unique_index, init_db
+from scraper.items import DrugItem
 
 
 logger = logging.getLogger(__name__)
 
+# 清洗用正则（模块加载时编译一次）
+_RE_WS = re.compile(r'\s+')
+_RE_PRICE_NUM = re.compile(r'(\d+\.?\d*)')
+
+# 名称：连续空白（第1组）替换为单个空格，特殊字符直接移除，一次扫描完成
+_RE_NAME_CLEAN = re.compile(r'(\s+)|[^\u4e00-\u9fa5a-zA-Z0-9\s\(\)（）\-]+')
+
+# 规格单位：一次扫描统一大小写，交替分支中 mg/ml 在前，会先于单独的 g/l 匹配
+_RE_UNIT = re.compile(r'(?i)(mg|ml|g|l)')
+_UNIT_MAP = {'mg': 'mg', 'ml': 'ml', 'g': 'g', 'l': 'L'}
+
+# 价格中的货币符号和单位（str.translate 删除，比正则替换更快）
+_PRICE_SYMBOLS = str.maketrans('', '', '¥￥元')
+
+# 原始数据项暂存表（清洗前的爬虫输出，各字段以原始文本保存，供 scraper.reclean 离线重新清洗）
+_RAW_ITEM_FIELDS = tuple(field.name for field in fields(DrugItem))
+RAW_ITEMS_TABLE = Table(
+    'raw_drug_items', MetaData(),
+    Column('id', Integer, primary_key=True, autoincrement=True),
+    *(Column(name, Text) for name in _RAW_ITEM_FIELDS),
+    Column('crawled_at', DateTime, default=datetime.utcnow),
+)
+
+
+def _name_repl(match: re.Match) -> str:
+    return ' ' if match.group(1) else ''
+
+
+def _unit_repl(match: re.Match) -> str:
+    return _UNIT_MAP[match.group(1).lower()]
+
 
 class DataCleaningPipeline:
     """
@@ -60,6 +99,41 @@ class DataCleaningPipeline:
         
         return item
     
+    @classmethod
+    def clean_dataframe(cls, df):
+        """
+        批量清洗 DataFrame（离线重新清洗时使用，规则与 process_item 一致）
+        
+        使用 pandas 的 .str 方法按列处理，而不是逐条数据项处理
+        
+        Args:
+            df: 包含 name、price、specification 等列的 pandas DataFrame
+            
+        Returns:
+            清洗后的 DataFrame（原 DataFrame 不变）
+        """
+        df = df.copy()
+        
+        if 'name' in df:
+            df['name'] = df['name'].fillna('').str.strip().str.replace(_RE_NAME_CLEAN, _name_repl, regex=True)
+        
+        if 'price' in df:
+            df['price'] = (
+                df['price'].fillna('').astype(str)
+                .str.translate(_PRICE_SYMBOLS)
+                .str.extract(_RE_PRICE_NUM, expand=False)
+                .astype(float)
+            )
+        
+        if 'specification' in df:
+            df['specification'] = df['specification'].fillna('').str.strip().str.replace(_RE_UNIT, _unit_repl, regex=True)
+        
+        for field in ['dosage_form', 'manufacturer', 'source_name']:
+            if field in df:
+                df[field] = df[field].fillna('').str.strip().str.replace(_RE_WS, ' ', regex=True)
+        
+        return df
+    
     def _clean_name(self, name: str) -> str:
         """
         清洗药品名称
@@ -71,41 +145,36 @@ class DataCleaningPipeline:
         if not name:
             return ''
         
-        # 去除首尾空格
-        name = name.strip()
-        
-        # 将多个连续空格替换为单个空格
-        name = re.sub(r'\s+', ' ', name)
-        
-        # 移除特殊字符，保留中文、字母、数字、括号、空格
-        name = re.sub(r'[^\u4e00-\u9fa5a-zA-Z0-9\s\(\)（）\-]', '', name)
-        
-        return name
+        # 去除首尾空格后，一次替换完成空格合并和特殊字符移除
+        return _RE_NAME_CLEAN.sub(_name_repl, name.strip())
     
-    def _clean_price(self, price: str) -> str:
+    def _clean_price(self, price: str) -> Optional[float]:
         """
-        清洗价格字符串
+        清洗价格字符串并转换为数值
         
         提取数字部分，支持格式如：
         - ¥12.50
         - 12.50元
         - 12.5
+        
+        Returns:
+            价格数值，无法提取时返回 None
         """
         if not price:
-            return ''
-        
-        # 移除货币符号和单位
-        price = re.sub(r'[¥￥元]', '', price)
+            return None
+        if isinstance(price, (int, float)):
+            return float(price)
         
-        # 去除空格
-        price = price.strip()
+        # 快速路径：已是纯数字（API 采集的价格均为此格式），无需替换和正则匹配
+        if price.isascii() and price[0].isdigit() and price.replace('.', '', 1).isdigit():
+            return float(price)
         
-        # 提取数字（包括小数点）
-        match = re.search(r'(\d+\.?\d*)', price)
+        # 移除货币符号和单位后提取数字（包括小数点）
+        match = _RE_PRICE_NUM.search(price.translate(_PRICE_SYMBOLS))
         if match:
-            return match.group(1)
+            return float(match.group(1))
         
-        return ''
+        return None
     
     def _clean_specification(self, spec: str) -> str:
         """
@@ -116,21 +185,14 @@ class DataCleaningPipeline:
         if not spec:
             return ''
         
-        spec = spec.strip()
-        
-        # 标准化单位（按顺序处理，先处理复合单位）
-        spec = re.sub(r'(?i)ml', 'ml', spec)  # 先处理ml
-        spec = re.sub(r'(?i)mg', 'mg', spec)  # 再处理mg
-        spec = re.sub(r'(?i)(?<!m)g(?!m)', 'g', spec)  # g但不是mg的一部分
-        spec = re.sub(r'(?i)(?<!m)l(?!m)', 'L', spec)  # L但不是ml的一部分
-        
-        return spec
+        # 标准化单位（查表替换）
+        return _RE_UNIT.sub(_unit_repl, spec.strip())
     
     def _clean_text(self, text: str) -> str:
         """通用文本清洗"""
         if not text:
             return ''
-        return re.sub(r'\s+', ' ', text.strip())
+        return _RE_WS.sub(' ', text.strip())
 
 
 class ValidationPipeline:
@@ -146,6 +208,9 @@ class ValidationPipeline:
     # 是否只保留药品（False 表示允许化妆品、医疗器械等入库）
     DRUG_ONLY = False
     
+    # 视为缺失的厂家名称
+    INVALID_MANUFACTURERS = frozenset(['未知厂家', '未知', '-', 'None'])
+    
     def process_item(self, item, spider):
         """
         验证数据项
@@ -162,28 +227,15 @@ class ValidationPipeline:
         """
         adapter = ItemAdapter(item)
         
-        # 验证必填字段
+        # 先做开销小的必填字段检查，价格数值转换和范围校验放在最后
         name = adapter.get('name', '')
         if not name:
             raise DropItem("缺少药品名称")
         
-        price = adapter.get('price', '')
-        if not price:
+        price = adapter.get('price')
+        if price is None or price == '':
             raise DropItem(f"缺少价格信息: {name}")
         
-        # 验证价格是否为有效数字
-        try:
-            price_decimal = Decimal(price)
-            if price_decimal <= 0:
-                raise DropItem(f"价格必须大于0: {name}")
-        except InvalidOperation:
-            raise DropItem(f"无效的价格格式: {price}")
-        
-        # 基本价格范围校验
-        price_float = float(price_decimal)
-        if price_float < self.PRICE_RANGE[0] or price_float > self.PRICE_RANGE[1]:
-            raise DropItem(f"价格超出合理范围: {name} ¥{price}")
-        
         # 规格校验 - 必须有规格信息
         specification = adapter.get('specification', '').strip()
         if not specification:
@@ -196,7 +248,7 @@ class ValidationPipeline:
         
         # 厂家校验 - 必须有有效厂家
         manufacturer = adapter.get('manufacturer', '').strip()
-        if not manufacturer or manufacturer in ['未知厂家', '未知', '-', 'None']:
+        if not manufacturer or manufacturer in self.INVALID_MANUFACTURERS:
             raise DropItem(f"缺少有效厂家信息: {name}")
         
         source_url = adapter.get('source_url', '')
@@ -207,27 +259,126 @@ class ValidationPipeline:
         if not source_name:
             raise DropItem(f"缺少来源网站名称: {name}")
         
+        # 验证价格是否为有效数字（清洗后已是 float，未经清洗的字符串在此转换）
+        if not isinstance(price, float):
+            try:
+                price = float(price)
+            except (TypeError, ValueError):
+                raise DropItem(f"无效的价格格式: {price}")
+            adapter['price'] = price
+        if not price > 0:  # 同时排除 NaN
+            raise DropItem(f"价格必须大于0: {name}")
+        
+        # 基本价格范围校验
+        if price < self.PRICE_RANGE[0] or price > self.PRICE_RANGE[1]:
+            raise DropItem(f"价格超出合理范围: {name} ¥{price}")
+        
         return item
 
 
+class RawItemStagingPipeline:
+    """
+    原始数据项暂存管道（可选，设置环境变量 SCRAPY_STAGE_RAW_ITEMS=1 启用）
+    
+    在清洗管道之前运行，将爬虫产出的原始数据项按批写入暂存表 raw_drug_items；
+    清洗规则更新后用 python -m scraper.reclean 从暂存表重新清洗，无需重新爬取。
+    暂存写入失败只记录日志，不影响数据项继续处理
+    """
+    
+    # 每批写入的数据项数量
+    BATCH_SIZE = 500
+    
+    def __init__(self):
+        self.engine = None
+        self._buffer = []
+        self._write_lock = DeferredLock()
+    
+    def open_spider(self, spider):
+        """爬虫启动时连接数据库并创建暂存表"""
+        self._buffer = []
+        self.engine, _ = init_db(DATABASE_URL)
+        RAW_ITEMS_TABLE.create(self.engine, checkfirst=True)
+    
+    def close_spider(self, spider):
+        """
+        爬虫关闭时写入剩余数据项
+        
+        Returns:
+            Deferred，剩余数据项写入完成后触发
+        """
+        if self.engine is None:
+            return None
+        return self._flush()
+    
+    def process_item(self, item, spider):
+        """记录原始数据项（字段转为文本），缓冲区满时在线程池中批量写入"""
+        adapter = ItemAdapter(item)
+        row = {}
+        for field in _RAW_ITEM_FIELDS:
+            value = adapter.get(field)
+            row[field] = None if value is None else str(value)
+        self._buffer.append(row)
+        if len(self._buffer) >= self.BATCH_SIZE:
+            self._flush()
+        return item
+    
+    def _flush(self) -> Deferred:
+        """取出缓冲区中的数据项，在线程池中按顺序写入"""
+        batch, self._buffer = self._buffer, []
+        d = self._write_lock.run(deferToThread, self._write_batch, batch)
+        return d.addErrback(lambda failure: logger.error(f"暂存原始数据项失败: {failure.value}"))
+    
+    def _write_batch(self, batch: list):
+        """将一批原始数据项写入暂存表（在线程池中执行）"""
+        if not batch:
+            return
+        with self.engine.begin() as conn:
+            conn.execute(RAW_ITEMS_TABLE.insert(), batch)
+
+
 class DatabasePipeline:
     """
     数据库存储管道
     
     将清洗和验证后的数据保存到数据库
+    数据项先缓存在内存中，每 BATCH_SIZE 条在线程池中批量写入一次，
+    一个批次只执行一次药品 upsert、提交一次事务；
+    批次写入失败时逐条重试，仍失败的数据项计入 item_dropped_count 统计
     """
     
-    def __init__(self):
+    # 每批写入的数据项数量
+    BATCH_SIZE = 500
+    
+    # 进程内药品缓存的最大条目数（超出后淘汰最久未使用的）
+    DRUG_CACHE_SIZE = 50000
+    
+    def __init__(self, stats=None):
+        self.stats = stats
         self.session = None
         self.engine = None
+        self._buffer = []
+        self._saved = 0
+        self._write_lock = DeferredLock()
+        # (名称, 规格, 厂家) → (药品ID, 批准文号, 类别)
+        self._drug_cache = OrderedDict()
+    
+    @classmethod
+    def from_crawler(cls, crawler):
+        return cls(crawler.stats)
     
     def open_spider(self, spider):
         """
         爬虫启动时初始化数据库连接
         """
+        self._buffer = []
+        self._saved = 0
+        self._drug_cache = OrderedDict()
         try:
             self.engine, SessionLocal = init_db(DATABASE_URL)
-            self.session = SessionLocal()
+            # 已有数据库建表时没有唯一索引，upsert 依赖该索引（已有重复药品时报错，需先运行迁移脚本）
+            ensure_drug_unique_index(self.engine)
+            # 线程本地会话：在线程池中写入时每个线程使用各自的会话
+            self.session = scoped_session(SessionLocal)
             logger.info("数据库连接已建立")
         except Exception as e:
             logger.error(f"数据库连接失败: {e}")
@@ -235,100 +386,210 @@ class DatabasePipeline:
     
     def close_spider(self, spider):
         """
-        爬虫关闭时关闭数据库连接
+        爬虫关闭时写入剩余数据并关闭数据库连接
+        
+        Returns:
+            Deferred，剩余数据写入完成后触发
         """
-        if self.session:
-            self.session.close()
-            logger.info("数据库连接已关闭")
+        if not self.session:
+            return None
+        
+        def _close(result):
+            self.session.remove()
+            logger.info("数据库连接已关闭，共保存 %d 项", self._saved)
+            return result
+        
+        return self._flush().addBoth(_close)
     
     def process_item(self, item, spider):
         """
-        将数据项保存到数据库
+        将数据项加入写入缓冲区，缓冲区满时批量保存到数据库
         
         Args:
             item: DrugItem数据项
             spider: 爬虫实例
             
         Returns:
-            处理后的item
+            处理后的item；触发批量写入时返回 Deferred，写入完成后得到 item
         """
-        adapter = ItemAdapter(item)
+        row = ItemAdapter(item).asdict()
+        self._buffer.append(row)
+        if len(self._buffer) >= self.BATCH_SIZE:
+            return self._flush(row).addCallback(lambda _: item)
+        return item
+    
+    def _flush(self, item_row: dict = None) -> Deferred:
+        """
+        取出缓冲区中的数据项，在线程池中批量写入
+        
+        数据库 IO 不阻塞 Twisted reactor（下载可继续进行）；
+        各批次通过锁按顺序写入，不会同时争用数据库写锁和药品缓存
+        
+        Args:
+            item_row: 触发本次写入的数据项（写入失败时该数据项以 DropItem 结束）
+        """
+        batch, self._buffer = self._buffer, []
+        d = self._write_lock.run(deferToThread, self._write_batch, batch)
+        return d.addCallback(self._record_failed, item_row)
+    
+    def _record_failed(self, failed: list, item_row: dict = None):
+        """
+        统计写入失败的数据项（在 reactor 线程中执行）
+        
+        已返回给 Scrapy 的数据项计入 item_dropped_count；触发写入的数据项
+        自身失败时抛出 DropItem，由 Scrapy 记录丢弃
+        """
+        item_failed = any(row is item_row for row in failed)
+        dropped = len(failed) - item_failed
+        if dropped and self.stats is not None:
+            self.stats.inc_value('item_dropped_count', dropped)
+            self.stats.inc_value('item_dropped_reasons_count/DatabaseError', dropped)
+        if item_failed:
+            raise DropItem(f"保存数据失败: {item_row.get('name')}")
+    
+    def _write_batch(self, batch: list) -> list:
+        """
+        将一批数据项写入数据库（在线程池中执行）
+        
+        整批在一个事务中写入；失败时逐条重试，找出无法写入的数据项
+        
+        Returns:
+            list: 写入失败的数据项
+        """
+        if not batch:
+            return []
         
         try:
-            # 查找或创建药品记录
-            drug = self._get_or_create_drug(adapter)
+            try:
+                self._write_rows(batch)
+            except Exception as e:
+                logger.warning(f"批量保存失败，逐条重试: {e}")
+                failed = []
+                for row in batch:
+                    try:
+                        self._write_rows([row])
+                    except Exception as e:
+                        logger.error(f"保存数据失败: {row.get('name')}: {e}")
+                        failed.append(row)
+                logger.info("已保存 %d 项，本批次 %d 项保存失败", self._saved, len(failed))
+                return failed
             
-            # 创建价格记录
-            self._create_price_record(drug, adapter)
+            # 每批只输出一行汇总日志，使用 % 延迟格式化（日志级别关闭时不拼接字符串）
+            logger.info("已保存 %d 项 (最新: %s)", self._saved, batch[-1].get('name'))
+            return []
+        finally:
+            # 归还当前线程的会话连接
+            self.session.remove()
+    
+    def _write_rows(self, rows: list):
+        """在一个事务中写入数据项，失败时回滚并抛出异常"""
+        try:
+            # 插入或更新涉及的全部药品记录
+            drug_ids = self._upsert_drugs(rows)
             
-            self.session.commit()
-            logger.info(f"已保存: {adapter.get('name')} - ¥{adapter.get('price')}")
+            # 批量创建价格记录
+            self.session.bulk_insert_mappings(PriceRecord, [
+                {
+                    'drug_id': drug_ids[self._drug_key(row)],
+                    'price': row.get('price'),  # float，写入 Numeric(10, 2) 列时由数据库转换
+                    'source_url': row.get('source_url'),
+                    'source_name': row.get('source_name')
+                }
+                for row in rows
+            ])
             
-        except Exception as e:
+            self.session.commit()
+            self._saved += len(rows)
+        except Exception:
             self.session.rollback()
-            logger.error(f"保存数据失败: {e}")
+            # 回滚后本事务新建的药品ID已失效
+            self._drug_cache.clear()
             raise
-        
-        return item
     
-    def _get_or_create_drug(self, adapter: ItemAdapter) -> Drug:
-        """
-        获取或创建药品记录
-        
-        Args:
-            adapter: ItemAdapter实例
-            
-        Returns:
-            Drug: 药品记录
+    @staticmethod
+    def _drug_key(row: dict) -> tuple:
+        """药品唯一键：(名称, 规格, 厂家)，与 drugs 表的唯一索引一致"""
+        return (row.get('name'), row.get('specification') or '', row.get('manufacturer') or '')
+    
+    @staticmethod
+    def _updates_drug(cached: tuple, row: dict) -> bool:
+        """数据项是否会更新已缓存药品的批准文号或类别（与 upsert 的更新规则一致）"""
+        _, approval_number, category = cached
+        if not approval_number and row.get('approval_number'):
+            return True
+        return (not category or category == 'drug') and row.get('category', 'drug') != category
+    
+    def _cache_drug(self, key: tuple, value: tuple):
+        """写入药品缓存，超出容量时淘汰最久未使用的条目"""
+        self._drug_cache[key] = value
+        self._drug_cache.move_to_end(key)
+        if len(self._drug_cache) > self.DRUG_CACHE_SIZE:
+            self._drug_cache.popitem(last=False)
+    
+    def _upsert_drugs(self, rows: list) -> dict:
         """
-        name = adapter.get('name')
-        specification = adapter.get('specification', '')
+        批量插入或更新药品记录
         
-        # 尝试查找现有药品
-        drug = self.session.query(Drug).filter(
-            Drug.name == name,
-            Drug.specification == specification
-        ).first()
-        
-        if not drug:
-            # 创建新药品记录
-            drug = Drug(
-                name=name,
-                standard_name=name,  # 初始时标准名称与名称相同
-                specification=specification,
-                dosage_form=adapter.get('dosage_form', ''),
-                manufacturer=adapter.get('manufacturer', ''),
-                approval_number=adapter.get('approval_number', ''),
-                category=adapter.get('category', 'drug')
-            )
-            self.session.add(drug)
-            self.session.flush()  # 获取ID
-            logger.info(f"创建新药品记录: {name}")
-        else:
-            # 更新批准文号和类别（如果之前没有）
-            if not drug.approval_number and adapter.get('approval_number'):
-                drug.approval_number = adapter.get('approval_number')
-            if not drug.category or drug.category == 'drug':
-                drug.category = adapter.get('category', 'drug')
-        
-        return drug
-    
-    def _create_price_record(self, drug: Drug, adapter: ItemAdapter) -> PriceRecord:
-        """
-        创建价格记录
+        已缓存且无需更新的药品直接使用缓存的ID，其余药品使用
+        INSERT ... ON CONFLICT DO UPDATE ... RETURNING，一条语句完成
         
         Args:
-            drug: 药品记录
-            adapter: ItemAdapter实例
+            rows: 数据项字典列表
             
         Returns:
-            PriceRecord: 价格记录
+            dict: (名称, 规格, 厂家) → 药品ID
         """
-        price_record = PriceRecord(
-            drug_id=drug.id,
-            price=Decimal(adapter.get('price')),
-            source_url=adapter.get('source_url'),
-            source_name=adapter.get('source_name')
+        drug_ids = {}
+        values = {}
+        for row in rows:
+            key = self._drug_key(row)
+            cached = self._drug_cache.get(key)
+            if cached is not None and not self._updates_drug(cached, row):
+                self._drug_cache.move_to_end(key)
+                drug_ids[key] = cached[0]
+                continue
+            if key in values:
+                # 同一批次内重复的药品，补充批准文号
+                if not values[key]['approval_number'] and row.get('approval_number'):
+                    values[key]['approval_number'] = row.get('approval_number')
+                continue
+            name, specification, manufacturer = key
+            values[key] = {
+                'name': name,
+                'standard_name': name,  # 初始时标准名称与名称相同
+                'specification': specification,
+                'dosage_form': row.get('dosage_form', ''),
+                'manufacturer': manufacturer,
+                'approval_number': row.get('approval_number', ''),
+                'category': row.get('category', 'drug')
+            }
+        
+        if not values:
+            return drug_ids
+        
+        insert = postgresql.insert if self.engine.dialect.name == 'postgresql' else sqlite.insert
+        stmt = insert(Drug).values(list(values.values()))
+        columns = Drug.__table__.c
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(DRUG_IDENTITY),
+            set_={
+                # 更新批准文号和类别（如果之前没有）
+                'approval_number': func.coalesce(
+                    func.nullif(columns.approval_number, ''), stmt.excluded.approval_number
+                ),
+                'category': case(
+                    (or_(columns.category.is_(None), columns.category == 'drug'), stmt.excluded.category),
+                    else_=columns.category
+                ),
+                'updated_at': datetime.utcnow()
+            }
+        ).returning(
+            # 规格、厂家按唯一键的形式返回（NULL 转为空字符串），与 _drug_key 一致
+            columns.id, *DRUG_IDENTITY, columns.approval_number, columns.category
         )
-        self.session.add(price_record)
-        return price_record
+        
+        for drug_id, name, specification, manufacturer, approval_number, category in self.session.execute(stmt):
+            key = (name, specification, manufacturer)
+            drug_ids[key] = drug_id
+            self._cache_drug(key, (drug_id, approval_number, category))
+        return drug_ids
@@ -0,0 +1,95 @@
+"""
+离线重新清洗爬取数据
+
+从暂存表（或 Scrapy 导出的 JSON Lines 文件）分块读取原始数据项，
+用 DataCleaningPipeline.clean_dataframe 按列批量清洗后写入结果表。
+清洗规则更新后回填历史数据时使用，无需重新爬取。
+
+用法:
+    # 从暂存表 raw_drug_items 读取，写入 raw_drug_items_clean
+    # （暂存表由 RawItemStagingPipeline 写入，爬取时设置 SCRAPY_STAGE_RAW_ITEMS=1）
+    python -m scraper.reclean
+
+    # 从 Scrapy 导出文件读取（scrapy crawl xxx -o raw.jsonl）
+    python -m scraper.reclean --feed raw.jsonl
+
+依赖 pandas（pip install pandas）
+"""
+import argparse
+import logging
+
+from sqlalchemy import create_engine, inspect
+
+from config import DATABASE_URL
+from scraper.pipelines import RAW_ITEMS_TABLE, DataCleaningPipeline
+
+
+logger = logging.getLogger(__name__)
+
+# 原始数据项暂存表
+STAGING_TABLE = RAW_ITEMS_TABLE.name
+
+
+def _read_chunks(engine, table: str, feed: str, chunksize: int):
+    """分块读取原始数据项"""
+    import pandas as pd
+
+    if feed:
+        return pd.read_json(feed, lines=True, dtype=False, chunksize=chunksize)
+    return pd.read_sql_table(table, engine, chunksize=chunksize)
+
+
+def reclean(table: str = STAGING_TABLE, feed: str = None, output: str = None,
+            chunksize: int = 10000) -> int:
+    """
+    重新清洗原始数据项
+
+    Args:
+        table: 暂存表名
+        feed: Scrapy 导出的 JSON Lines 文件（指定时代替暂存表）
+        output: 结果表名，默认为 "<table>_clean"
+        chunksize: 每次读取的行数
+
+    Returns:
+        int: 清洗的行数
+        
+    Raises:
+        ValueError: 没有指定导出文件且暂存表不存在
+    """
+    engine = create_engine(DATABASE_URL)
+    if not feed and not inspect(engine).has_table(table):
+        raise ValueError(f"暂存表 {table} 不存在：爬取时设置 SCRAPY_STAGE_RAW_ITEMS=1 写入暂存表，或使用 --feed 指定导出文件")
+    output = output or f'{table}_clean'
+
+    total = 0
+    for i, chunk in enumerate(_read_chunks(engine, table, feed, chunksize)):
+        cleaned = DataCleaningPipeline.clean_dataframe(chunk)
+        cleaned.to_sql(
+            output, engine,
+            if_exists='replace' if i == 0 else 'append',
+            index=False, method='multi', chunksize=1000
+        )
+        total += len(cleaned)
+        logger.info("已清洗 %d 行", total)
+
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='离线重新清洗爬取数据')
+    parser.add_argument('--table', default=STAGING_TABLE, help='暂存表名')
+    parser.add_argument('--feed', help='Scrapy 导出的 JSON Lines 文件（代替暂存表）')
+    parser.add_argument('--output', help='结果表名（默认 <table>_clean）')
+    parser.add_argument('--chunksize', type=int, default=10000, help='每次读取的行数')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s [%(name)s] %(levelname)s: %(message)s')
+    try:
+        total = reclean(args.table, args.feed, args.output, args.chunksize)
+    except ValueError as e:
+        parser.error(str(e))
+    print(f"清洗完成，共 {total} 行")
+
+
+if __name__ == '__main__':
+    main()
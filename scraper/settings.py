@@ -8,7 +8,7 @@ import sys
 PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.insert(0, PROJECT_ROOT)
 
-from config import SCRAPER_CONFIG
+from config import SCRAPER_CONFIG, REDIS_URL, SCRAPY_HTTPCACHE, SCRAPY_JOBDIR, SCRAPY_STAGE_RAW_ITEMS
 
 # Scrapy基础设置
 BOT_NAME = 'pharma_scraper'
@@ -33,6 +33,9 @@ RETRY_HTTP_CODES = SCRAPER_CONFIG.get('RETRY_HTTP_CODES', [500, 502, 503, 504, 4
 # 超时配置
 DOWNLOAD_TIMEOUT = 30
 
+# 使用 asyncio reactor，爬虫的 async def start() 等协程中可直接 await asyncio 接口
+TWISTED_REACTOR = 'twisted.internet.asyncioreactor.AsyncioSelectorReactor'
+
 # 启用的管道
 ITEM_PIPELINES = {
     'scraper.pipelines.DataCleaningPipeline': 100,
@@ -40,6 +43,10 @@ ITEM_PIPELINES = {
     'scraper.pipelines.DatabasePipeline': 300,
 }
 
+# 清洗前先暂存原始数据项，供离线重新清洗（python -m scraper.reclean）
+if SCRAPY_STAGE_RAW_ITEMS:
+    ITEM_PIPELINES['scraper.pipelines.RawItemStagingPipeline'] = 50
+
 # 下载中间件配置
 DOWNLOADER_MIDDLEWARES = {
     'scraper.middlewares.ErrorLoggingMiddleware': 100,
@@ -48,6 +55,23 @@ DOWNLOADER_MIDDLEWARES = {
     'scrapy.downloadermiddlewares.retry.RetryMiddleware': None,  # 禁用默认重试
 }
 
+# 调度队列配置
+# 设置 JOBDIR 时待处理请求写入磁盘队列（请求需可 pickle，回调须为爬虫的绑定方法），
+# 大规模采集时内存占用不随待处理请求数增长
+JOBDIR = SCRAPY_JOBDIR
+
+# 请求去重与分布式调度配置
+# 配置了 Redis 时使用布隆过滤器去重：位数组大小固定（2^30 位 = 128MB），
+# 不会像默认的指纹集合那样随 URL 数量线性增长；
+# 请求队列同样保存在 Redis 中，可在多台机器上启动多个爬虫进程共同消费
+if REDIS_URL:
+    SCHEDULER = 'scrapy_redis_bloomfilter.scheduler.Scheduler'
+    DUPEFILTER_CLASS = 'scrapy_redis_bloomfilter.dupefilter.RFPDupeFilter'
+    BLOOMFILTER_HASH_NUMBER = 6
+    BLOOMFILTER_BIT = 30
+    # 爬虫关闭时保留队列和去重记录，其他进程可继续处理
+    SCHEDULER_PERSIST = True
+
 # 重试延迟配置（指数退避：1秒、2秒、4秒）
 RETRY_DELAYS = [1, 2, 4]
 
@@ -71,7 +95,11 @@ AUTOTHROTTLE_START_DELAY = 1
 AUTOTHROTTLE_MAX_DELAY = 10
 AUTOTHROTTLE_TARGET_CONCURRENCY = 2.0
 
-# 缓存配置（开发时可启用）
-# HTTPCACHE_ENABLED = True
-# HTTPCACHE_EXPIRATION_SECS = 3600
-# HTTPCACHE_DIR = 'httpcache'
+# 缓存配置（开发时设置环境变量 SCRAPY_HTTPCACHE=1 启用）
+# RFC2616 策略遵循 Cache-Control，并用 If-Modified-Since / ETag 条件请求校验缓存
+HTTPCACHE_ENABLED = SCRAPY_HTTPCACHE
+HTTPCACHE_EXPIRATION_SECS = 3600
+HTTPCACHE_DIR = 'httpcache'
+HTTPCACHE_POLICY = 'scrapy.extensions.httpcache.RFC2616Policy'
+HTTPCACHE_STORAGE = 'scrapy.extensions.httpcache.FilesystemCacheStorage'
+HTTPCACHE_GZIP = True
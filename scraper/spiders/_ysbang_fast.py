@@ -0,0 +1,191 @@
+"""
+药师帮商品解析热点函数
+
+每个商品都会调用一次，全部为字符串和字典操作。
+本模块为带完整类型注解的纯 Python 代码，可直接用 mypyc 编译为扩展模块：
+
+    mypyc scraper/spiders/_ysbang_fast.py
+
+编译产物与本文件同名，存在时 import 会优先加载编译版本，未编译时按纯 Python 运行
+"""
+import re
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import ahocorasick  # type: ignore
+except ImportError:
+    ahocorasick = None  # type: ignore
+
+
+# 商品字段的候选键名（按优先级排列，取第一个非空值）
+NAME_ALIASES: Tuple[str, ...] = ('drugName', 'goodsName', 'name', 'productName')
+SPEC_ALIASES: Tuple[str, ...] = ('specification', 'spec', 'goodsSpec', 'packSpec')
+MANUFACTURER_ALIASES: Tuple[str, ...] = ('factory', 'manufacturer', 'produceFactory', 'companyName')
+APPROVAL_ALIASES: Tuple[str, ...] = ('approvalNumber', 'approval_number', 'registerNo', 'licenseNo')
+ID_ALIASES: Tuple[str, ...] = ('drugId', 'id', 'goodsId')
+
+# 价格字段，优先使用最低价（药师帮返回minprice和maxprice）
+PRICE_ALIASES: Tuple[str, ...] = (
+    'minprice', 'minPrice', 'price', 'salePrice', 'sellPrice',
+    'retailPrice', 'goodsPrice', 'unitPrice', 'showPrice'
+)
+
+# 批准文号格式（严格模式下使用，默认用前缀比较判断）
+_APPROVAL_DRUG = re.compile(r'国药准字[HZSJB]\d{8}')
+_APPROVAL_DEVICE = re.compile(r'国械注[准进]')
+
+# 名称/厂家中的类别关键词，每个类别合并为一个正则，一次扫描完成匹配
+_COSMETIC_KEYWORDS: Tuple[str, ...] = ('珍珠霜', '珍珠膏', '护肤', '面霜', '乳液', '精华', '面膜', '化妆')
+_DEVICE_KEYWORDS: Tuple[str, ...] = ('口罩', '注射器', '体温计', '血压计', '绷带', '纱布')
+_COSMETIC_RE = re.compile('|'.join(map(re.escape, _COSMETIC_KEYWORDS)))
+_DEVICE_RE = re.compile('|'.join(map(re.escape, _DEVICE_KEYWORDS)))
+
+# 已安装 pyahocorasick 时，用一个 Aho-Corasick 自动机一次扫描匹配全部类别关键词
+_KEYWORD_AUTOMATON: Any = None
+if ahocorasick is not None:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _kw in _DEVICE_KEYWORDS:
+        _KEYWORD_AUTOMATON.add_word(_kw, 'medical_device')
+    for _kw in _COSMETIC_KEYWORDS:
+        _KEYWORD_AUTOMATON.add_word(_kw, 'cosmetic')
+    _KEYWORD_AUTOMATON.make_automaton()
+
+# 价格字符串中需删除的货币符号、单位和空白字符
+_PRICE_STRIP = str.maketrans('', '', '¥￥元 \t\n\r')
+
+
+def first_value(get: Callable[..., Any], aliases: Tuple[str, ...]) -> Any:
+    """
+    按候选键名顺序取第一个非空字段值，都为空时返回空字符串
+
+    Args:
+        get: 商品的 get 方法（字典或支持 get 的 msgspec 结构体），
+             由调用方绑定一次，逐个键名查找时不再重复查找方法
+        aliases: 候选键名
+    """
+    for key in aliases:
+        value = get(key)
+        if value:
+            return value
+    return ''
+
+
+def extract_price(goods: Any) -> Optional[float]:
+    """
+    提取价格 - 优先使用最低价
+    """
+    get = goods.get
+    for field in PRICE_ALIASES:
+        price = get(field)
+        if price is not None:
+            try:
+                # 处理价格字符串（一次删除货币符号、单位和空白字符）
+                if isinstance(price, str):
+                    price = price.translate(_PRICE_STRIP)
+                return float(price)
+            except (ValueError, TypeError):
+                continue
+
+    return None
+
+
+def determine_category(approval_number: str, name: str, manufacturer: str, strict: bool = False) -> str:
+    """
+    根据批准文号和名称判断产品类别
+
+    批准文号格式：
+    - 国药准字H/Z/S/J/B + 8位数字 = 药品
+    - 国械注准/进 = 医疗器械
+    - 卫妆准字/国妆特字 = 化妆品
+
+    Args:
+        strict: 批准文号是否使用正则严格匹配（False 时用字符串前缀比较，结果一致但更快）
+
+    Returns:
+        category: drug, medical_device, cosmetic, other
+    """
+    approval = (approval_number or '').upper()
+
+    if strict:
+        if _APPROVAL_DRUG.match(approval):
+            return 'drug'
+        if _APPROVAL_DEVICE.match(approval):
+            return 'medical_device'
+
+    # 药品：国药准字 + H/Z/S/J/B + 8位数字
+    elif (approval.startswith('国药准字') and len(approval) >= 13
+            and approval[4] in 'HZSJB' and approval[5:13].isdecimal()):
+        return 'drug'
+
+    # 医疗器械：国械注准、国械注进
+    elif approval.startswith('国械注') and len(approval) > 3 and approval[3] in '准进':
+        return 'medical_device'
+
+    # 化妆品：卫妆准字、国妆特字（含"化妆"的文号也必然含"妆"，一次查找即可）
+    if '妆' in approval:
+        return 'cosmetic'
+
+    # 根据名称和厂家判断
+    full_text = f"{name} {manufacturer}"
+
+    if _KEYWORD_AUTOMATON is not None:
+        # 化妆品关键词优先于医疗器械关键词（与出现位置无关）
+        category = 'drug'
+        for _, tag in _KEYWORD_AUTOMATON.iter(full_text):
+            if tag == 'cosmetic':
+                return tag
+            category = tag
+        return category
+
+    if _COSMETIC_RE.search(full_text):
+        return 'cosmetic'
+
+    if _DEVICE_RE.search(full_text):
+        return 'medical_device'
+
+    # 默认为药品（如果没有批准文号但也不是明显的非药品）
+    return 'drug'
+
+
+def parse_goods(item_data: Any, source_url: str, strict: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    解析单个商品数据的各字段
+
+    Args:
+        item_data: 列表中的商品（字典或 msgspec 结构体，数据可能嵌套在drug字段中）
+        source_url: 没有商品ID时使用的来源URL
+        strict: 批准文号是否使用正则严格匹配
+
+    Returns:
+        字段字典（name, price, source_url, specification, manufacturer,
+        approval_number, category），无法提取价格时 price 为 None；
+        没有药品名称时返回 None
+    """
+    goods = item_data.get('drug') or item_data
+    get = goods.get
+
+    name = first_value(get, NAME_ALIASES)
+    if not name:
+        return None
+
+    # 规格，单位不在规格中时附加在后面
+    specification = first_value(get, SPEC_ALIASES)
+    unit = get('unit', '')
+    if unit and specification and unit not in specification:
+        specification = f"{specification}/{unit}"
+
+    manufacturer = first_value(get, MANUFACTURER_ALIASES)
+    approval_number = first_value(get, APPROVAL_ALIASES)
+
+    # 构建详情页URL
+    drug_id = first_value(get, ID_ALIASES)
+
+    return {
+        'name': name,
+        'price': extract_price(goods),
+        'source_url': f"https://dian.ysbang.cn/#/drug/{drug_id}" if drug_id else source_url,
+        'specification': specification,
+        'manufacturer': manufacturer,
+        'approval_number': approval_number,
+        'category': determine_category(approval_number, name, manufacturer, strict),
+    }
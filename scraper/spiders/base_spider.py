@@ -52,7 +52,9 @@ class BaseDrugSpider(scrapy.Spider):
         source_url: str,
         specification: str = '',
         dosage_form: str = '',
-        manufacturer: str = ''
+        manufacturer: str = '',
+        approval_number: str = '',
+        category: str = 'drug'
     ) -> DrugItem:
         """
         创建药品数据项的辅助方法
@@ -64,19 +66,23 @@ class BaseDrugSpider(scrapy.Spider):
             specification: 规格
             dosage_form: 剂型
             manufacturer: 生产厂家
+            approval_number: 批准文号
+            category: 产品类别
             
         Returns:
             DrugItem: 填充好的药品数据项
         """
-        item = DrugItem()
-        item['name'] = name.strip() if name else ''
-        item['price'] = price.strip() if price else ''
-        item['source_url'] = source_url
-        item['source_name'] = self.source_name
-        item['specification'] = specification.strip() if specification else ''
-        item['dosage_form'] = dosage_form.strip() if dosage_form else ''
-        item['manufacturer'] = manufacturer.strip() if manufacturer else ''
-        return item
+        return DrugItem(
+            name=name.strip() if name else '',
+            price=price.strip() if price else '',
+            source_url=source_url,
+            source_name=self.source_name,
+            specification=specification.strip() if specification else '',
+            dosage_form=dosage_form.strip() if dosage_form else '',
+            manufacturer=manufacturer.strip() if manufacturer else '',
+            approval_number=approval_number or '',
+            category=category
+        )
     
     def extract_text(self, response: Response, selector: str, default: str = '') -> str:
         """
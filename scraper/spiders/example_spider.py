@@ -12,11 +12,79 @@ import logging
 from typing import Iterator, Optional
 from urllib.parse import urljoin, urlparse, parse_qs, urlencode
 
-from scrapy.http import Response, Request
+from parsel.csstranslator import HTMLTranslator
+from scrapy.http import HtmlResponse, Response, Request
 
 from scraper.items import DrugItem
 from scraper.spiders.base_spider import BaseDrugSpider
 
+try:
+    from scrapy_redis.spiders import RedisSpider
+except ImportError:
+    RedisSpider = None
+
+# selectolax（可选）：HTML 解析比 lxml + CSS 转 XPath 快数倍，未安装时使用 Scrapy 选择器
+try:
+    from selectolax.parser import HTMLParser
+except ImportError:
+    HTMLParser = None
+
+
+def extract_first(node, selectors) -> Optional[str]:
+    """
+    从 selectolax 节点中依次尝试备选选择器，返回第一个非空文本
+    
+    Args:
+        node: selectolax 节点
+        selectors: CSS 选择器列表（按优先级排列）
+    """
+    for selector in selectors:
+        found = node.css_first(selector)
+        if found is not None:
+            text = found.text(deep=False)
+            if text:
+                return text
+    return None
+
+
+def _node_href(node) -> Optional[str]:
+    """selectolax 节点中第一个链接的 href"""
+    link = node.css_first('a')
+    return link.attributes.get('href') if link is not None else None
+
+
+_CSS_TRANSLATOR = HTMLTranslator()
+
+# 详情页链接（等价于 CSS 'a::attr(href)'）
+_XP_HREF = 'descendant-or-self::a/@href'
+
+
+def _text_xpath(selectors) -> str:
+    """
+    将多个备选 CSS 选择器合并为一个提取文本的 XPath
+    
+    简单选择器（如 '.drug-name'）合并为同一步骤内的 or 条件，只需遍历一次元素树；
+    其他选择器退回到 XPath 并集
+    """
+    prefix = 'descendant-or-self::*['
+    conditions = []
+    for selector in selectors:
+        xpath = _CSS_TRANSLATOR.css_to_xpath(selector)
+        if not (xpath.startswith(prefix) and xpath.endswith(']')):
+            return ' | '.join(_CSS_TRANSLATOR.css_to_xpath(f'{s}::text') for s in selectors)
+        conditions.append(f'({xpath[len(prefix):-1]})')
+    return f"{prefix}{' or '.join(conditions)}]/text()"
+
+
+def _selector_first(element, xpath: str) -> Optional[str]:
+    """从 Scrapy 选择器中提取合并 XPath 匹配到的第一个文本（文档顺序）"""
+    return element.xpath(xpath).get()
+
+
+def _selector_href(element) -> Optional[str]:
+    """Scrapy 选择器中第一个链接的 href"""
+    return element.xpath(_XP_HREF).get()
+
 
 class ExampleDrugSpider(BaseDrugSpider):
     """
@@ -38,6 +106,25 @@ class ExampleDrugSpider(BaseDrugSpider):
     name = 'example_drug_spider'
     source_name = '示例药品网'
     
+    # 药品列表项选择器（按优先级排列）
+    ITEM_SELECTORS = ('.drug-list .drug-item', '.product-list .product-item')
+    
+    # 各字段的备选选择器（按优先级排列）
+    FIELD_SELECTORS = {
+        'name': ('.drug-name', '.product-name'),
+        'price': ('.drug-price', '.price'),
+        'specification': ('.drug-spec', '.specification'),
+        'dosage_form': ('.drug-form', '.dosage-form'),
+        'manufacturer': ('.drug-manufacturer', '.manufacturer'),
+    }
+    
+    # 各字段备选选择器合并成的单个 XPath（Scrapy 选择器解析时使用）：
+    # 预先转换避免每次调用都转换 CSS，合并后每个字段只需遍历一次元素树
+    FIELD_XPATHS = {
+        field: _text_xpath(selectors)
+        for field, selectors in FIELD_SELECTORS.items()
+    }
+    
     # 自定义设置
     custom_settings = {
         'DOWNLOAD_DELAY': 1,
@@ -78,7 +165,8 @@ class ExampleDrugSpider(BaseDrugSpider):
                 url=url,
                 callback=self.parse,
                 errback=self.errback_handler,
-                meta={'page': 1}
+                # 分页URL前缀只解析一次，随请求传递给后续页
+                meta={'page': 1, 'page_prefix': self._page_prefix(url)}
             )
     
     def parse(self, response: Response) -> Iterator[DrugItem]:
@@ -100,12 +188,20 @@ class ExampleDrugSpider(BaseDrugSpider):
             self.logger.warning(f"页面返回非200状态码: {response.status}")
             return
         
-        # 解析药品列表
-        drug_items = response.css('.drug-list .drug-item')
+        # 解析药品列表（安装了 selectolax 时用其解析 HTML）
+        if HTMLParser is not None and isinstance(response, HtmlResponse):
+            tree = HTMLParser(response.text)
+            extract, extract_href, field_selectors = extract_first, _node_href, self.FIELD_SELECTORS
+        else:
+            tree = response
+            extract, extract_href, field_selectors = _selector_first, _selector_href, self.FIELD_XPATHS
         
-        if not drug_items:
-            # 尝试备用选择器
-            drug_items = response.css('.product-list .product-item')
+        drug_items = None
+        for selector in self.ITEM_SELECTORS:
+            # 未找到时尝试备用选择器
+            drug_items = tree.css(selector)
+            if drug_items:
+                break
         
         if not drug_items:
             self.logger.warning(f"未找到药品列表，页面可能结构变化: {response.url}")
@@ -113,7 +209,7 @@ class ExampleDrugSpider(BaseDrugSpider):
         
         items_count = 0
         for drug_element in drug_items:
-            item = self._parse_drug_item(drug_element, response)
+            item = self._parse_drug_item(drug_element, response, extract, extract_href, field_selectors)
             if item:
                 items_count += 1
                 yield item
@@ -125,53 +221,48 @@ class ExampleDrugSpider(BaseDrugSpider):
         if next_page_request:
             yield next_page_request
     
-    def _parse_drug_item(self, element, response: Response) -> Optional[DrugItem]:
+    def _parse_drug_item(self, element, response: Response,
+                         extract=_selector_first, extract_href=_selector_href,
+                         field_selectors=None) -> Optional[DrugItem]:
         """
         解析单个药品元素
         
         Args:
-            element: 药品HTML元素
+            element: 药品HTML元素（Scrapy 选择器或 selectolax 节点）
             response: 响应对象
+            extract: 按备选选择器提取文本的函数
+            extract_href: 提取链接的函数
+            field_selectors: 字段 → 选择器（selectolax 为备选 CSS 列表，Scrapy 为合并 XPath），
+                默认为 FIELD_XPATHS
             
         Returns:
             DrugItem或None（解析失败时）
         """
+        if field_selectors is None:
+            field_selectors = self.FIELD_XPATHS
+        
         try:
             # 提取药品名称
-            name = element.css('.drug-name::text').get()
-            if not name:
-                name = element.css('.product-name::text').get()
+            name = extract(element, field_selectors['name'])
             
             if not name:
                 self.logger.debug("跳过无名称的药品项")
                 return None
             
             # 提取价格
-            price = element.css('.drug-price::text').get()
-            if not price:
-                price = element.css('.price::text').get()
+            price = extract(element, field_selectors['price'])
             
             if not price:
                 self.logger.debug(f"跳过无价格的药品: {name}")
                 return None
             
-            # 提取规格
-            specification = element.css('.drug-spec::text').get()
-            if not specification:
-                specification = element.css('.specification::text').get()
-            
-            # 提取剂型
-            dosage_form = element.css('.drug-form::text').get()
-            if not dosage_form:
-                dosage_form = element.css('.dosage-form::text').get()
-            
-            # 提取生产厂家
-            manufacturer = element.css('.drug-manufacturer::text').get()
-            if not manufacturer:
-                manufacturer = element.css('.manufacturer::text').get()
+            # 提取规格、剂型、生产厂家
+            specification = extract(element, field_selectors['specification'])
+            dosage_form = extract(element, field_selectors['dosage_form'])
+            manufacturer = extract(element, field_selectors['manufacturer'])
             
             # 获取详情页URL（如果有）
-            detail_url = element.css('a::attr(href)').get()
+            detail_url = extract_href(element)
             source_url = urljoin(response.url, detail_url) if detail_url else response.url
             
             # 创建药品数据项
@@ -228,13 +319,14 @@ class ExampleDrugSpider(BaseDrugSpider):
                 max_page = max(int(p.strip()) for p in page_numbers if p.strip().isdigit())
                 if current_page < max_page:
                     # 构建下一页URL
-                    next_url = self._build_page_url(response.url, current_page + 1)
+                    page_prefix = response.meta.get('page_prefix') or self._page_prefix(response.url)
+                    next_url = self._build_page_url(response.url, current_page + 1, page_prefix)
                     self.logger.info(f"构建下一页URL: {next_url}")
                     return Request(
                         url=next_url,
                         callback=self.parse,
                         errback=self.errback_handler,
-                        meta={'page': current_page + 1}
+                        meta={'page': current_page + 1, 'page_prefix': page_prefix}
                     )
             except ValueError:
                 pass
@@ -242,23 +334,39 @@ class ExampleDrugSpider(BaseDrugSpider):
         self.logger.info(f"已到达最后一页（第 {current_page} 页）")
         return None
     
-    def _build_page_url(self, base_url: str, page: int) -> str:
+    def _page_prefix(self, url: str) -> str:
+        """
+        解析URL，生成不含页码值的分页URL前缀
+        
+        Args:
+            url: 列表页URL
+            
+        Returns:
+            以 "page=" 结尾的URL前缀，拼接页码即为分页URL
+        """
+        parsed = urlparse(url)
+        query_params = parse_qs(parsed.query)
+        query_params.pop('page', None)
+        
+        base_query = urlencode(query_params, doseq=True)
+        separator = f'?{base_query}&' if base_query else '?'
+        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}{separator}page="
+    
+    def _build_page_url(self, base_url: str, page: int, page_prefix: Optional[str] = None) -> str:
         """
         构建分页URL
         
         Args:
             base_url: 基础URL
             page: 页码
+            page_prefix: 预先生成的分页URL前缀（未提供时解析 base_url 生成）
             
         Returns:
             带页码参数的URL
         """
-        parsed = urlparse(base_url)
-        query_params = parse_qs(parsed.query)
-        query_params['page'] = [str(page)]
-        
-        new_query = urlencode(query_params, doseq=True)
-        return f"{parsed.scheme}://{parsed.netloc}{parsed.path}?{new_query}"
+        if page_prefix is None:
+            page_prefix = self._page_prefix(base_url)
+        return f"{page_prefix}{page}"
     
     def errback_handler(self, failure):
         """
@@ -283,3 +391,38 @@ class ExampleDrugSpider(BaseDrugSpider):
         # 统计错误（可用于监控）
         self.crawler.stats.inc_value('error_count')
         self.crawler.stats.inc_value(f'error_count/{failure.type.__name__}')
+
+
+if RedisSpider is not None:
+    class DistributedExampleDrugSpider(RedisSpider, ExampleDrugSpider):
+        """
+        分布式示例药品爬虫
+        
+        起始URL从 Redis 列表读取，多个进程（可在不同机器上）共享同一个请求队列。
+        需设置 REDIS_URL 环境变量，并安装 scrapy-redis。
+        
+        用法:
+            # 每台机器启动任意数量的工作进程
+            scrapy crawl distributed_example_drug_spider
+            # 投放起始URL
+            redis-cli lpush example:start_urls http://example-pharmacy.com/drugs
+        """
+        
+        name = 'distributed_example_drug_spider'
+        redis_key = 'example:start_urls'
+        
+        def __init__(self, allowed_domains: str = None, *args, **kwargs):
+            """
+            初始化爬虫
+            
+            Args:
+                allowed_domains: 可选的允许域名（逗号分隔），用于命令行指定；
+                    未指定时不限制域名，从 Redis 投放的任意站点的起始URL都可继续跟进链接
+            """
+            super().__init__(*args, **kwargs)
+            # 起始URL来自 Redis，不使用单机爬虫的默认起始URL和示例域名
+            self.start_urls = []
+            self.allowed_domains = (
+                [domain.strip() for domain in allowed_domains.split(',') if domain.strip()]
+                if allowed_domains else []
+            )
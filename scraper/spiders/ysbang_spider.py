@@ -13,15 +13,99 @@ Token获取方式：
 1. 手动：登录网站后从浏览器开发者工具获取
 2. 自动：使用 TokenManager 工具管理Token
 """
-import json
+import asyncio
 import logging
-from typing import Iterator, Optional, Dict, Any
+from typing import Iterator, Optional, Dict, Any, List, Union
 from urllib.parse import urlencode
 
+import orjson
 from scrapy.http import Request, Response, JsonRequest
 
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
 from scraper.items import DrugItem
 from scraper.spiders.base_spider import BaseDrugSpider
+from scraper.spiders._ysbang_fast import determine_category, extract_price, parse_goods
+
+
+# 已安装 msgspec 时按声明的结构解码API响应：只创建解析用到的字段，其余字段跳过不解码
+_RESPONSE_DECODER = None
+if msgspec is not None:
+    class _ApiStruct(msgspec.Struct):
+        """
+        API结构体基类，get 和真值判断与字典一致
+        
+        响应中没有的字段为 UNSET，视为不存在（值为 null 的字段仍为 None）；
+        没有任何已声明字段时为假
+        """
+        
+        def get(self, key: str, default: Any = None) -> Any:
+            value = getattr(self, key, msgspec.UNSET)
+            return default if value is msgspec.UNSET else value
+        
+        def __bool__(self) -> bool:
+            return any(getattr(self, field) is not msgspec.UNSET for field in self.__struct_fields__)
+    
+    class _Goods(_ApiStruct):
+        """商品字段（与 _ysbang_fast 中各字段的候选键名一致）"""
+        drugName: Any = msgspec.UNSET
+        goodsName: Any = msgspec.UNSET
+        name: Any = msgspec.UNSET
+        productName: Any = msgspec.UNSET
+        specification: Any = msgspec.UNSET
+        spec: Any = msgspec.UNSET
+        goodsSpec: Any = msgspec.UNSET
+        packSpec: Any = msgspec.UNSET
+        unit: Any = msgspec.UNSET
+        factory: Any = msgspec.UNSET
+        manufacturer: Any = msgspec.UNSET
+        produceFactory: Any = msgspec.UNSET
+        companyName: Any = msgspec.UNSET
+        approvalNumber: Any = msgspec.UNSET
+        approval_number: Any = msgspec.UNSET
+        registerNo: Any = msgspec.UNSET
+        licenseNo: Any = msgspec.UNSET
+        drugId: Any = msgspec.UNSET
+        id: Any = msgspec.UNSET
+        goodsId: Any = msgspec.UNSET
+        minprice: Any = msgspec.UNSET
+        minPrice: Any = msgspec.UNSET
+        price: Any = msgspec.UNSET
+        salePrice: Any = msgspec.UNSET
+        sellPrice: Any = msgspec.UNSET
+        retailPrice: Any = msgspec.UNSET
+        goodsPrice: Any = msgspec.UNSET
+        unitPrice: Any = msgspec.UNSET
+        showPrice: Any = msgspec.UNSET
+    
+    class _GoodsEntry(_Goods):
+        """列表中的商品（数据可能嵌套在 drug 字段中）"""
+        drug: Optional[_Goods] = msgspec.UNSET
+    
+    class _GoodsPage(_ApiStruct):
+        """分页数据"""
+        list: Optional[List[_GoodsEntry]] = msgspec.UNSET
+        items: Optional[List[_GoodsEntry]] = msgspec.UNSET
+        wholesaleList: Optional[List[_GoodsEntry]] = msgspec.UNSET
+        records: Optional[List[_GoodsEntry]] = msgspec.UNSET
+        totalPages: Any = msgspec.UNSET
+        pages: Any = msgspec.UNSET
+        total: Any = msgspec.UNSET
+        totalCount: Any = msgspec.UNSET
+        pageSize: Any = msgspec.UNSET
+        size: Any = msgspec.UNSET
+        hasNext: Any = msgspec.UNSET
+        hasMore: Any = msgspec.UNSET
+    
+    class _ApiResponse(_ApiStruct):
+        code: Any = msgspec.UNSET
+        message: Any = msgspec.UNSET
+        data: Union[_GoodsPage, List[_GoodsEntry], None] = msgspec.UNSET
+    
+    _RESPONSE_DECODER = msgspec.json.Decoder(_ApiResponse)
 
 
 class YsbangSpider(BaseDrugSpider):
@@ -50,9 +134,16 @@ class YsbangSpider(BaseDrugSpider):
     # 自动补全接口
     AUTO_COMPLETE_API = '/wholesale-drug/sales/autoComplete/v5185'
     
+    # 批准文号是否使用正则严格匹配（False 时用字符串前缀比较，结果一致但更快）
+    _STRICT_MODE = False
+    
     # 自定义设置
+    # 各页请求在启动时一次性发出，由并发数和 AutoThrottle 控制请求速率
     custom_settings = {
-        'DOWNLOAD_DELAY': 2,  # 请求间隔2秒
+        'DOWNLOAD_DELAY': 0.25,
+        'CONCURRENT_REQUESTS_PER_DOMAIN': 8,
+        'AUTOTHROTTLE_ENABLED': True,
+        'AUTOTHROTTLE_TARGET_CONCURRENCY': 8.0,
         'RETRY_TIMES': 3,
         'RETRY_HTTP_CODES': [500, 502, 503, 504, 408, 429],
         'DEFAULT_REQUEST_HEADERS': {
@@ -89,62 +180,100 @@ class YsbangSpider(BaseDrugSpider):
         self.keyword = keyword
         self.max_pages = int(max_pages)
         self.cookies = cookies or ''
-        
-        if not self.token:
-            self.logger.warning("未提供Token，尝试从缓存加载...")
-            try:
-                from scraper.utils.token_manager import TokenManager
-                manager = TokenManager()
-                cached_token = manager._load_cached_token()
-                if cached_token and manager._verify_token(cached_token):
-                    self.token = cached_token
-                    self.logger.info("✅ 从缓存加载Token成功")
-                else:
-                    self.logger.warning("请登录 https://dian.ysbang.cn 后从浏览器获取Token")
-                    self.logger.warning("或使用 TokenManager.set_token_manually('your_token') 缓存Token")
-            except ImportError:
-                self.logger.warning("请登录 https://dian.ysbang.cn 后从浏览器获取Token")
+        # Cookie字符串在爬虫运行期间不变，只解析一次
+        self._cookie_dict = self._parse_cookies(self.cookies)
+        
+        # 搜索请求的URL和请求体模板，每页只替换关键词和页码
+        self._search_url = f"{self.API_BASE_URL}{self.SEARCH_API}"
+        self._base_body = {'keyword': None, 'page': 0, 'pageSize': 20}
+        # 请求头和Cookie只取决于Token，Token变化时才重新生成
+        self._auth_token = None
+        self._cached_headers = None
+        self._cached_cookies = None
+        # 已知的最后一页（有数据的最后一页或第一个无数据页），之后的页面结果直接丢弃
+        self._last_page = None
+        
+        # 未提供Token时，在生成初始请求前从缓存加载（需联网验证，不在初始化时阻塞）
+        self._token_checked = bool(self.token)
         
         self.logger.info(f"药师帮爬虫初始化完成")
         self.logger.info(f"  - 关键词: {self.keyword or '(默认:感冒)'}")
         self.logger.info(f"  - 最大页数: {self.max_pages}")
     
+    async def start(self):
+        """
+        生成初始请求（Scrapy 2.13+）
+        
+        缓存Token的联网验证在线程中执行，不阻塞reactor
+        """
+        if not self._token_checked:
+            await asyncio.to_thread(self._load_token_from_cache)
+        for request in self.start_requests():
+            yield request
+    
     def start_requests(self):
         """
         生成初始请求
+        
+        一次性生成第 1 ~ max_pages 页的请求并发下载，
+        不再等待上一页解析完成后才请求下一页
         """
-        if self.keyword:
-            # 搜索模式
-            yield self._create_search_request(self.keyword, page=1)
-        else:
+        if not self._token_checked:
+            # Scrapy 2.13 之前的版本不调用 start()，在此同步加载
+            self._load_token_from_cache()
+        
+        keyword = self.keyword
+        if not keyword:
             # 默认搜索常用药品
             self.logger.info("未指定关键词，使用默认搜索词'感冒'")
-            yield self._create_search_request('感冒', page=1)
+            keyword = '感冒'
+        
+        for page in range(1, self.max_pages + 1):
+            yield self._create_search_request(keyword, page)
+    
+    def _load_token_from_cache(self):
+        """
+        从缓存加载Token并验证是否有效
+        """
+        self._token_checked = True
+        self.logger.warning("未提供Token，尝试从缓存加载...")
+        try:
+            from scraper.utils.token_manager import TokenManager
+            manager = TokenManager()
+            cached_token = manager._load_cached_token()
+            if cached_token and manager._verify_token(cached_token):
+                self.token = cached_token
+                self.logger.info("✅ 从缓存加载Token成功")
+            else:
+                self.logger.warning("请登录 https://dian.ysbang.cn 后从浏览器获取Token")
+                self.logger.warning("或使用 TokenManager.set_token_manually('your_token') 缓存Token")
+        except ImportError:
+            self.logger.warning("请登录 https://dian.ysbang.cn 后从浏览器获取Token")
     
     def _create_search_request(self, keyword: str, page: int) -> Request:
         """
         创建搜索请求
         """
-        url = f"{self.API_BASE_URL}{self.SEARCH_API}"
+        if self._cached_headers is None or self._auth_token != self.token:
+            self._auth_token = self.token
+            self._cached_headers = self._get_headers()
+            self._cached_cookies = self._get_cookies()
         
-        body = {
-            'keyword': keyword,
-            'page': page,
-            'pageSize': 20,
-        }
+        body = {**self._base_body, 'keyword': keyword, 'page': page}
         
         return JsonRequest(
-            url=url,
+            url=self._search_url,
             data=body,
             callback=self.parse_search_results,
             errback=self.errback_handler,
-            headers=self._get_headers(),
+            priority=-page,  # 页码小的先下载
+            headers=self._cached_headers,
             meta={
                 'page': page,
                 'keyword': keyword,
                 'request_type': 'search'
             },
-            cookies=self._get_cookies()
+            cookies=self._cached_cookies
         )
     
     def _get_headers(self) -> Dict[str, str]:
@@ -169,13 +298,20 @@ class YsbangSpider(BaseDrugSpider):
         cookies = {}
         if self.token:
             cookies['Token'] = self.token
-        if self.cookies:
-            # 解析Cookie字符串
-            for item in self.cookies.split(';'):
-                item = item.strip()
-                if '=' in item:
-                    key, value = item.split('=', 1)
-                    cookies[key.strip()] = value.strip()
+        cookies.update(self._cookie_dict)
+        return cookies
+    
+    @staticmethod
+    def _parse_cookies(cookie_string: str) -> Dict[str, str]:
+        """
+        解析Cookie字符串为字典
+        """
+        cookies = {}
+        for item in cookie_string.split(';'):
+            item = item.strip()
+            if '=' in item:
+                key, value = item.split('=', 1)
+                cookies[key.strip()] = value.strip()
         return cookies
     
     def parse_search_results(self, response: Response) -> Iterator[DrugItem]:
@@ -197,11 +333,15 @@ class YsbangSpider(BaseDrugSpider):
         current_page = response.meta.get('page', 1)
         request_type = response.meta.get('request_type', 'unknown')
         
+        if self._last_page is not None and current_page > self._last_page:
+            self.logger.debug(f"第 {current_page} 页在最后一页 {self._last_page} 之后，跳过")
+            return
+        
         self.logger.info(f"解析第 {current_page} 页 ({request_type})")
         
         try:
-            data = json.loads(response.text)
-        except json.JSONDecodeError as e:
+            data = self._decode_response(response.body)
+        except orjson.JSONDecodeError as e:
             self.logger.error(f"JSON解析失败: {e}")
             return
         
@@ -223,13 +363,14 @@ class YsbangSpider(BaseDrugSpider):
         
         if not result:
             self.logger.info(f"第 {current_page} 页无数据")
+            self._mark_last_page(current_page)
             return
         
         # 处理列表格式的响应
         items_list = []
         if isinstance(result, list):
             items_list = result
-        elif isinstance(result, dict):
+        elif hasattr(result, 'get'):  # 字典或 msgspec 结构体
             items_list = (
                 result.get('list') or
                 result.get('items') or
@@ -240,6 +381,7 @@ class YsbangSpider(BaseDrugSpider):
         
         if not items_list:
             self.logger.info(f"第 {current_page} 页无商品数据")
+            self._mark_last_page(current_page)
             return
         
         # 解析每个商品
@@ -252,45 +394,34 @@ class YsbangSpider(BaseDrugSpider):
         
         self.logger.info(f"第 {current_page} 页解析完成，提取 {items_count} 个药品")
         
-        # 处理分页
-        if current_page < self.max_pages and len(items_list) >= 20:
-            next_request = self._create_next_page_request(response, current_page + 1)
-            if next_request:
-                yield next_request
+        # 根据分页信息（总页数、总数、hasNext）判断是否为最后一页，不足一页也视为最后一页；
+        # 最后一页之后已并发请求的页面结果直接丢弃
+        if len(items_list) < self._base_body['pageSize'] or not self._has_more_pages(data, current_page):
+            self._mark_last_page(current_page)
     
-    def _check_response_status(self, data: Dict[str, Any]) -> bool:
-        """
-        检查API响应状态
+    @staticmethod
+    def _decode_response(body: bytes) -> Any:
         """
-        # 常见的API响应格式
-        code = data.get('code') or data.get('status') or data.get('errCode')
+        解码API响应（直接解析响应字节，无需先解码为 response.text）
         
-        if code is not None and code not in [0, 200, '0', '200', 'success']:
-            msg = data.get('msg') or data.get('message') or data.get('errMsg') or '未知错误'
-            self.logger.error(f"API返回错误: code={code}, msg={msg}")
-            return False
+        已安装 msgspec 时按声明的结构解码，结构不符时回退为 orjson 完整解析
         
-        return True
+        Raises:
+            orjson.JSONDecodeError: 响应不是有效的JSON
+        """
+        if _RESPONSE_DECODER is not None:
+            try:
+                return _RESPONSE_DECODER.decode(body)
+            except msgspec.DecodeError:
+                pass
+        return orjson.loads(body)
     
-    def _extract_goods_list(self, data: Dict[str, Any]) -> list:
+    def _mark_last_page(self, page: int):
         """
-        从响应中提取商品列表
+        记录最后一页的页码（取最小值），之后页面的结果不再解析
         """
-        # 尝试多种可能的数据结构
-        if 'data' in data:
-            inner_data = data['data']
-            if isinstance(inner_data, list):
-                return inner_data
-            elif isinstance(inner_data, dict):
-                return (
-                    inner_data.get('list') or
-                    inner_data.get('goods') or
-                    inner_data.get('items') or
-                    inner_data.get('records') or
-                    []
-                )
-        
-        return data.get('list') or data.get('goods') or data.get('items') or []
+        if self._last_page is None or page < self._last_page:
+            self._last_page = page
     
     def _parse_goods_item(self, item_data: Dict[str, Any], source_url: str) -> Optional[DrugItem]:
         """
@@ -313,81 +444,26 @@ class YsbangSpider(BaseDrugSpider):
         }
         """
         try:
-            # 药师帮的数据可能嵌套在drug字段中
-            goods = item_data.get('drug') or item_data
-            
-            # 提取药品名称
-            name = (
-                goods.get('drugName') or
-                goods.get('goodsName') or
-                goods.get('name') or
-                goods.get('productName') or
-                ''
-            )
-            
-            if not name:
+            fields = parse_goods(item_data, source_url, self._STRICT_MODE)
+            if fields is None:
                 return None
             
-            # 提取价格 - 优先使用最低价
-            price = self._extract_price(goods)
+            price = fields['price']
             if not price:
-                self.logger.debug(f"跳过无价格商品: {name}")
+                self.logger.debug(f"跳过无价格商品: {fields['name']}")
                 return None
             
-            # 提取规格
-            specification = (
-                goods.get('specification') or
-                goods.get('spec') or
-                goods.get('goodsSpec') or
-                goods.get('packSpec') or
-                ''
-            )
-            
-            # 提取单位
-            unit = goods.get('unit', '')
-            if unit and specification and unit not in specification:
-                specification = f"{specification}/{unit}"
-            
-            # 提取生产厂家
-            manufacturer = (
-                goods.get('factory') or
-                goods.get('manufacturer') or
-                goods.get('produceFactory') or
-                goods.get('companyName') or
-                ''
-            )
-            
-            # 提取批准文号
-            approval_number = (
-                goods.get('approvalNumber') or
-                goods.get('approval_number') or
-                goods.get('registerNo') or
-                goods.get('licenseNo') or
-                ''
-            )
-            
-            # 根据批准文号判断产品类别
-            category = self._determine_category(approval_number, name, manufacturer)
-            
-            # 构建详情页URL
-            drug_id = goods.get('drugId') or goods.get('id') or goods.get('goodsId')
-            detail_url = f"https://dian.ysbang.cn/#/drug/{drug_id}" if drug_id else source_url
-            
-            item = self.create_drug_item(
-                name=name,
+            return self.create_drug_item(
+                name=fields['name'],
                 price=str(price),
-                source_url=detail_url,
-                specification=specification,
+                source_url=fields['source_url'],
+                specification=fields['specification'],
                 dosage_form='',  # 药师帮API未返回剂型
-                manufacturer=manufacturer
+                manufacturer=fields['manufacturer'],
+                approval_number=fields['approval_number'],
+                category=fields['category']
             )
             
-            # 添加批准文号和类别
-            item['approval_number'] = approval_number
-            item['category'] = category
-            
-            return item
-            
         except Exception as e:
             self.logger.error(f"解析商品失败: {e}")
             return None
@@ -396,69 +472,16 @@ class YsbangSpider(BaseDrugSpider):
         """
         根据批准文号和名称判断产品类别
         
-        批准文号格式：
-        - 国药准字H/Z/S/J/B + 8位数字 = 药品
-        - 国械注准/进 = 医疗器械
-        - 卫妆准字/国妆特字 = 化妆品
-        
         Returns:
             category: drug, medical_device, cosmetic, other
         """
-        import re
-        
-        approval = (approval_number or '').upper()
-        
-        # 药品：国药准字
-        if re.match(r'国药准字[HZSJB]\d{8}', approval):
-            return 'drug'
-        
-        # 医疗器械：国械注准、国械注进
-        if re.match(r'国械注[准进]', approval):
-            return 'medical_device'
-        
-        # 化妆品：卫妆准字、国妆特字
-        if '妆' in approval or '化妆' in approval:
-            return 'cosmetic'
-        
-        # 根据名称和厂家判断
-        cosmetic_keywords = ['珍珠霜', '珍珠膏', '护肤', '面霜', '乳液', '精华', '面膜', '化妆']
-        device_keywords = ['口罩', '注射器', '体温计', '血压计', '绷带', '纱布']
-        
-        full_text = f"{name} {manufacturer}"
-        
-        for kw in cosmetic_keywords:
-            if kw in full_text:
-                return 'cosmetic'
-        
-        for kw in device_keywords:
-            if kw in full_text:
-                return 'medical_device'
-        
-        # 默认为药品（如果没有批准文号但也不是明显的非药品）
-        return 'drug'
+        return determine_category(approval_number, name, manufacturer, self._STRICT_MODE)
     
     def _extract_price(self, goods: Dict[str, Any]) -> Optional[float]:
         """
         提取价格 - 优先使用最低价
         """
-        # 药师帮返回minprice和maxprice
-        price_fields = [
-            'minprice', 'minPrice', 'price', 'salePrice', 'sellPrice', 
-            'retailPrice', 'goodsPrice', 'unitPrice', 'showPrice'
-        ]
-        
-        for field in price_fields:
-            price = goods.get(field)
-            if price is not None:
-                try:
-                    # 处理价格字符串
-                    if isinstance(price, str):
-                        price = price.replace('¥', '').replace('￥', '').replace('元', '').strip()
-                    return float(price)
-                except (ValueError, TypeError):
-                    continue
-        
-        return None
+        return extract_price(goods)
     
     def _has_more_pages(self, data: Dict[str, Any], current_page: int) -> bool:
         """
@@ -467,7 +490,7 @@ class YsbangSpider(BaseDrugSpider):
         # 尝试从响应中获取分页信息
         inner_data = data.get('data', data)
         
-        if isinstance(inner_data, dict):
+        if hasattr(inner_data, 'get'):  # 字典或 msgspec 结构体
             total_pages = inner_data.get('totalPages') or inner_data.get('pages')
             if total_pages:
                 return current_page < int(total_pages)
@@ -485,13 +508,6 @@ class YsbangSpider(BaseDrugSpider):
         # 默认继续爬取
         return True
     
-    def _create_next_page_request(self, response: Response, next_page: int) -> Optional[Request]:
-        """
-        创建下一页请求
-        """
-        keyword = response.meta.get('keyword', '感冒')
-        return self._create_search_request(keyword, next_page)
-    
     def parse(self, response: Response) -> Iterator[DrugItem]:
         """
         默认解析方法（兼容基类）
@@ -5,6 +5,8 @@ API路径自动提取工具
 """
 import re
 import requests
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 from typing import List, Set
 from urllib.parse import urljoin
 
@@ -18,23 +20,45 @@ class APIExtractor:
         apis = extractor.extract_all()
     """
     
+    # JS中的API路径（一个正则一次扫描）：
+    # versioned 带版本号的API路径 /xxx/xxx/v123，api /api/xxx，base baseURL配置
+    _JS_API_PATTERN = re.compile(r'''
+        ["'](?P<versioned>/[\w-]+/[\w-]+/[\w/]+/v\d+)["']
+        | ["'](?P<api>/api/[^"']{1,100})["']
+        | baseURL["']?\s*[:=]\s*["'](?P<base>[^"']+)["']
+    ''', re.X)
+    
+    # baseURL 的值本身是API路径时（如 baseURL: '/api/v1'）同样记录（长度上限与 api 分组的过滤一致），
+    # 合并正则中该字符串已作为 base 匹配，不会再匹配 versioned/api 分组
+    _API_PATH = re.compile(r'/[\w-]+/[\w-]+/[\w/]+/v\d+|/api/[^"\']{1,94}')
+    
+    # 流式下载JS文件的块大小，以及相邻块之间保留的重叠字符数（避免跨块的路径被截断）
+    JS_CHUNK_SIZE = 65536
+    JS_CHUNK_OVERLAP = 256
+    
+    # 并行下载JS文件的线程数（连接池大小与之匹配，保持长连接复用）
+    JS_FETCH_WORKERS = 8
+    
     def __init__(self, base_url: str):
         self.base_url = base_url
         self.session = requests.Session()
         self.session.headers.update({
             'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
         })
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=16)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
     
     def extract_all(self) -> List[str]:
         """提取所有API路径"""
         # 1. 获取主页，找到JS文件
         js_urls = self._find_js_files()
         
-        # 2. 从每个JS文件提取API
+        # 2. 并行下载各JS文件并提取API
         all_apis = set()
-        for js_url in js_urls:
-            apis = self._extract_from_js(js_url)
-            all_apis.update(apis)
+        with ThreadPoolExecutor(max_workers=self.JS_FETCH_WORKERS) as executor:
+            for apis in executor.map(self._extract_from_js, js_urls):
+                all_apis.update(apis)
         
         return sorted(all_apis)
     
@@ -59,27 +83,33 @@ class APIExtractor:
             return []
     
     def _extract_from_js(self, js_url: str) -> Set[str]:
-        """从单个JS文件提取API路径"""
+        """
+        从单个JS文件提取API路径
+        
+        JS文件流式下载、逐块扫描，不把整个文件读入内存
+        """
         apis = set()
         try:
-            resp = self.session.get(js_url, timeout=30)
-            content = resp.text
-            
-            # 模式1: 带版本号的API路径 /xxx/xxx/v123
-            pattern1 = r'["\']/([\w-]+/[\w-]+/[\w/]+/v\d+)["\']'
-            for match in re.findall(pattern1, content):
-                apis.add(f'/{match}')
-            
-            # 模式2: /api/xxx 格式
-            pattern2 = r'["\'](/api/[^"\']+)["\']'
-            for match in re.findall(pattern2, content):
-                if len(match) < 100:
-                    apis.add(match)
-            
-            # 模式3: baseURL配置
-            pattern3 = r'baseURL["\']?\s*[:=]\s*["\']([^"\']+)["\']'
-            for match in re.findall(pattern3, content):
-                print(f"发现baseURL: {match}")
+            with self.session.get(js_url, timeout=30, stream=True) as resp:
+                if resp.encoding is None:
+                    resp.encoding = 'utf-8'
+                
+                buffer = ''
+                for chunk in resp.iter_content(chunk_size=self.JS_CHUNK_SIZE, decode_unicode=True):
+                    buffer += chunk
+                    last_end = 0
+                    for match in self._JS_API_PATTERN.finditer(buffer):
+                        kind = match.lastgroup
+                        value = match.group(kind)
+                        if kind == 'base':
+                            print(f"发现baseURL: {value}")
+                            if self._API_PATH.fullmatch(value):
+                                apis.add(value)
+                        elif kind == 'versioned' or len(value) < 100:
+                            apis.add(value)
+                        last_end = match.end()
+                    # 保留末尾未匹配的部分，与下一块拼接后继续扫描
+                    buffer = buffer[max(last_end, len(buffer) - self.JS_CHUNK_OVERLAP):]
             
         except Exception as e:
             print(f"解析JS失败 {js_url}: {e}")
@@ -2,12 +2,13 @@
 自动登录工具
 使用Selenium模拟浏览器登录药师帮，自动获取Token
 """
-import json
 import time
 import os
 from datetime import datetime
 from typing import Optional, Dict, Tuple
 
+import orjson
+
 
 class AutoLoginService:
     """
@@ -20,6 +21,12 @@ class AutoLoginService:
     TOKEN_CACHE_FILE = '.token_cache.json'
     LOGIN_URL = 'https://dian.ysbang.cn/#/login'
     
+    # 登录后等待页面跳转的最长时间（秒）
+    LOGIN_TIMEOUT = 10
+    
+    # ChromeDriver 路径（首次登录时解析，之后复用，避免每次联网检查和下载）
+    _driver_path: Optional[str] = None
+    
     def __init__(self):
         self.driver = None
     
@@ -35,6 +42,13 @@ class AutoLoginService:
         Returns:
             (成功, 消息, {token, cookies})
         """
+        # 先直接调用登录接口（约几百毫秒，无需启动浏览器），
+        # 未获取到Token（如需要验证码、接口变化）时再用浏览器模拟登录
+        token, cookie_dict = self._http_login(phone, password)
+        if token:
+            self._save_token(token, cookie_dict)
+            return True, 'Token获取成功！', {'token': token, 'cookies': cookie_dict}
+        
         try:
             from selenium import webdriver
             from selenium.webdriver.common.by import By
@@ -42,6 +56,7 @@ class AutoLoginService:
             from selenium.webdriver.support import expected_conditions as EC
             from selenium.webdriver.chrome.options import Options
             from selenium.webdriver.chrome.service import Service
+            from selenium.common.exceptions import TimeoutException
             from webdriver_manager.chrome import ChromeDriverManager
         except ImportError:
             return False, '请先安装: pip install selenium webdriver-manager', {}
@@ -56,17 +71,21 @@ class AutoLoginService:
             options.add_argument('--disable-gpu')
             options.add_argument('--window-size=1920,1080')
             options.add_argument('--user-agent=Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36')
+            options.add_argument('--disable-blink-features=AutomationControlled')
+            # DOM 就绪即返回，不等待图片等资源加载完成
+            options.page_load_strategy = 'eager'
             
             # 启动浏览器
-            service = Service(ChromeDriverManager().install())
+            if AutoLoginService._driver_path is None:
+                AutoLoginService._driver_path = ChromeDriverManager().install()
+            service = Service(AutoLoginService._driver_path)
             self.driver = webdriver.Chrome(service=service, options=options)
             self.driver.implicitly_wait(10)
             
             # 打开登录页
             self.driver.get(self.LOGIN_URL)
-            time.sleep(2)
             
-            # 等待页面加载
+            # 等待页面加载（表单出现即可继续，无需固定等待）
             wait = WebDriverWait(self.driver, 15)
             
             # 查找并填写手机号
@@ -91,8 +110,16 @@ class AutoLoginService:
             )
             login_btn.click()
             
-            # 等待登录完成（URL变化或出现特定元素）
-            time.sleep(3)
+            # 等待登录完成（URL离开登录页或出现验证码/错误提示），超时后继续检查
+            try:
+                WebDriverWait(self.driver, self.LOGIN_TIMEOUT).until(EC.any_of(
+                    lambda driver: '/login' not in driver.current_url,
+                    EC.visibility_of_element_located(
+                        (By.CSS_SELECTOR, '.captcha, .verify-code, [class*="captcha"], .error-msg, .el-message--error')
+                    )
+                ))
+            except TimeoutException:
+                pass
             
             # 检查是否需要验证码
             try:
@@ -110,9 +137,6 @@ class AutoLoginService:
             except:
                 pass
             
-            # 等待跳转到首页
-            time.sleep(2)
-            
             # 获取Cookie和Token
             cookies = self.driver.get_cookies()
             cookie_dict = {c['name']: c['value'] for c in cookies}
@@ -146,6 +170,23 @@ class AutoLoginService:
             if self.driver:
                 self.driver.quit()
     
+    def _http_login(self, phone: str, password: str) -> Tuple[Optional[str], Dict]:
+        """
+        通过登录接口直接获取Token
+        
+        Returns:
+            (Token, Cookie字典)，登录失败时Token为None
+        """
+        try:
+            from scraper.utils.token_manager import TokenManager
+        except ImportError:
+            # 直接运行本脚本时项目根目录不在路径中，只能使用浏览器登录
+            return None, {}
+        
+        manager = TokenManager()
+        token = manager._login(phone, password)
+        return token, manager.session.cookies.get_dict()
+    
     def _save_token(self, token: str, cookies: Dict = None):
         """保存Token到缓存"""
         cache = {
@@ -153,15 +194,15 @@ class AutoLoginService:
             'cookies': cookies or {},
             'time': datetime.now().isoformat()
         }
-        with open(self.TOKEN_CACHE_FILE, 'w') as f:
-            json.dump(cache, f, ensure_ascii=False, indent=2)
+        with open(self.TOKEN_CACHE_FILE, 'wb') as f:
+            f.write(orjson.dumps(cache, option=orjson.OPT_INDENT_2))
     
     def get_cached_token(self) -> Optional[str]:
         """获取缓存的Token"""
         try:
             if os.path.exists(self.TOKEN_CACHE_FILE):
-                with open(self.TOKEN_CACHE_FILE, 'r') as f:
-                    cache = json.load(f)
+                with open(self.TOKEN_CACHE_FILE, 'rb') as f:
+                    cache = orjson.loads(f.read())
                 return cache.get('token')
         except:
             pass
@@ -0,0 +1,211 @@
+"""
+Playwright 浏览器池
+
+多次采集共用同一个浏览器进程，每次采集只创建独立的 context + page，
+避免每个关键词都冷启动一次 Chromium（进程启动 + V8 预热约 1-3 秒）
+
+用法:
+    async with BrowserPool(headless=True, max_pages=3) as pool:
+        crawler = YSBangPlaywrightCrawler(pool=pool)
+        result = await crawler.get_drug_provider_prices(keyword)
+
+同步代码中多次调用时，使用进程级共享的浏览器池（浏览器在进程退出时关闭）:
+    result = run_with_shared_pool(
+        lambda pool: YSBangPlaywrightCrawler(pool=pool).get_drug_provider_prices(keyword)
+    )
+"""
+import asyncio
+import atexit
+import logging
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+
+class BrowserPool:
+    """
+    共享浏览器池
+
+    - 浏览器只启动一次，在 close() 时关闭（崩溃或断开连接后下次获取页面时重新启动）
+    - 每次 acquire() 创建新的 context + page，相互隔离（Cookie、缓存互不影响）
+    - 同时打开的页面数受 max_pages 限制
+    """
+
+    def __init__(self, headless: bool = True, max_pages: int = 3):
+        """
+        初始化浏览器池
+
+        Args:
+            headless: 是否无头模式运行
+            max_pages: 同时打开的最大页面数
+        """
+        self.headless = headless
+        self.max_pages = max_pages
+        self.playwright = None
+        self.browser = None
+        self._semaphore = asyncio.Semaphore(max_pages)
+        self._start_lock = asyncio.Lock()
+
+    async def start(self):
+        """启动浏览器（浏览器已崩溃或断开连接时重新启动）"""
+        async with self._start_lock:
+            if self.browser:
+                if self.browser.is_connected():
+                    return
+                logger.warning("浏览器已断开连接，重新启动")
+                await self.close()
+            await self._launch()
+
+    async def _launch(self):
+        """启动 Playwright 和浏览器"""
+        from playwright.async_api import async_playwright
+
+        self.playwright = await async_playwright().start()
+
+        # 尝试使用系统 Chrome 或已安装的 Chromium
+        try:
+            self.browser = await self.playwright.chromium.launch(
+                headless=self.headless,
+                channel='chrome'  # 使用系统安装的 Chrome
+            )
+        except Exception as e:
+            logger.warning(f"无法使用系统 Chrome: {e}, 尝试使用 Playwright Chromium")
+            self.browser = await self.playwright.chromium.launch(headless=self.headless)
+
+        logger.info(f"浏览器池已启动 (max_pages={self.max_pages})")
+
+    async def close(self):
+        """关闭浏览器（浏览器已断开连接时忽略关闭失败）"""
+        if self.browser:
+            try:
+                await self.browser.close()
+            except Exception as e:
+                logger.debug(f"关闭浏览器失败: {e}")
+            self.browser = None
+        if self.playwright:
+            try:
+                await self.playwright.stop()
+            except Exception as e:
+                logger.debug(f"停止 Playwright 失败: {e}")
+            self.playwright = None
+
+    async def __aenter__(self) -> 'BrowserPool':
+        await self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def acquire(self, **context_options: Any):
+        """
+        获取一个新页面
+
+        页数达到上限时等待其他页面释放
+
+        Args:
+            **context_options: 传给 browser.new_context 的参数（viewport、user_agent 等）
+
+        Returns:
+            Page 对象，可通过 page.context 访问所属 context
+        """
+        await self._semaphore.acquire()
+        try:
+            await self.start()
+            context = await self.browser.new_context(**context_options)
+            return await context.new_page()
+        except Exception:
+            self._semaphore.release()
+            raise
+
+    async def release(self, page):
+        """释放页面（关闭其 context）"""
+        try:
+            await page.context.close()
+        except Exception as e:
+            logger.debug(f"关闭 context 失败: {e}")
+        finally:
+            self._semaphore.release()
+
+    @asynccontextmanager
+    async def page(self, **context_options: Any):
+        """以上下文管理器方式获取页面，退出时自动释放"""
+        page = await self.acquire(**context_options)
+        try:
+            yield page
+        finally:
+            await self.release(page)
+
+
+T = TypeVar('T')
+
+# 进程级共享浏览器池
+# Playwright 对象绑定在创建它的事件循环上，而每次 asyncio.run 都会新建事件循环，
+# 因此共享池运行在一个常驻的后台事件循环线程中，同步调用方把协程提交到该循环执行
+_shared_loop: Optional[asyncio.AbstractEventLoop] = None
+_shared_pools: Dict[bool, BrowserPool] = {}
+_shared_lock = threading.Lock()
+
+
+def _get_shared_loop() -> asyncio.AbstractEventLoop:
+    """获取（首次调用时启动）运行共享浏览器池的后台事件循环"""
+    global _shared_loop
+    with _shared_lock:
+        if _shared_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name='browser-pool-loop', daemon=True).start()
+            _shared_loop = loop
+            atexit.register(close_shared_pools)
+        return _shared_loop
+
+
+def run_with_shared_pool(
+    func: Callable[[BrowserPool], Awaitable[T]],
+    headless: bool = True,
+    max_pages: int = 3
+) -> T:
+    """
+    使用进程级共享的浏览器池执行协程（同步调用，阻塞直到完成）
+
+    首次调用时启动浏览器，之后的调用（包括其他线程的调用）复用同一个浏览器进程，
+    每次调用只新建 context + page
+
+    Args:
+        func: 接收浏览器池、返回协程的函数
+        headless: 是否无头模式（有头和无头各自共享一个浏览器）
+        max_pages: 首次创建浏览器池时的最大页面数
+
+    Returns:
+        协程的返回值
+    """
+    loop = _get_shared_loop()
+
+    async def runner():
+        pool = _shared_pools.get(headless)
+        if pool is None:
+            pool = _shared_pools[headless] = BrowserPool(headless=headless, max_pages=max_pages)
+        return await func(pool)
+
+    return asyncio.run_coroutine_threadsafe(runner(), loop).result()
+
+
+def close_shared_pools():
+    """关闭共享浏览器池和后台事件循环（进程退出时自动调用）"""
+    global _shared_loop
+    with _shared_lock:
+        loop, _shared_loop = _shared_loop, None
+    if loop is None:
+        return
+
+    async def close_all():
+        for pool in list(_shared_pools.values()):
+            await pool.close()
+        _shared_pools.clear()
+
+    try:
+        asyncio.run_coroutine_threadsafe(close_all(), loop).result(timeout=10)
+    except Exception as e:
+        logger.debug(f"关闭共享浏览器池失败: {e}")
+    finally:
+        loop.call_soon_threadsafe(loop.stop)
@@ -6,11 +6,122 @@ import asyncio
 import json
 import re
 import logging
-from typing import Dict, Any, Optional
-from playwright.async_api import async_playwright, Page
+from collections import deque
+from contextlib import AsyncExitStack
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Tuple
+
+import httpx
+import orjson
+from playwright.async_api import async_playwright, Browser, BrowserContext, Page, Route
+from playwright.async_api import TimeoutError as PWTimeout
 
 logger = logging.getLogger(__name__)
 
+# 批准文号格式，按商品类别分组
+_APPROVAL_FORMATS = (
+    ('drug', r'国药准字[HZSJB]\d{8}'),
+    ('medical_device', r'国械注[准进]\d+'),
+    ('cosmetic', r'卫妆准字\d+|国妆特字\d+'),
+    ('health_product', r'国食健字G?\d+|卫食健字\d+'),
+)
+
+# 全部批准文号格式合并为一个正则，一次扫描即可找到最先出现的批准文号，
+# 命中的分组名（match.lastgroup）即商品类别
+_APPROVAL_ANY = re.compile('|'.join(f'(?P<{category}>{pattern})' for category, pattern in _APPROVAL_FORMATS))
+
+# 在页面内查找批准文号的脚本（JS正则不支持 (?P<name>) 分组，使用不带分组名的合并正则），
+# 只把匹配到的批准文号传回，不必通过 page.content() 传输整个页面HTML
+_FIND_APPROVAL_JS = '''(source) => {
+    const match = document.documentElement.outerHTML.match(new RegExp(source));
+    return match ? match[0] : null;
+}'''
+_APPROVAL_JS_SOURCE = '|'.join(pattern for _, pattern in _APPROVAL_FORMATS)
+
+# API数据中常见的批准文号字段名
+_APPROVAL_FIELDS = frozenset({
+    'approvalNumber', 'approval_number', 'approvalNo',
+    'licenseNumber', 'license_number', 'licenseNo',
+    'registrationNumber', 'registration_number',
+    'certificateNumber', 'certificate_number',
+    'approvalNum', 'licenseNum', 'registrationNum',
+    'pzwh', 'pihao', 'zhunzi',  # 拼音
+})
+
+# 查找批准文号时不再深入的字段（图片、轮播、SKU、评论、推荐商品等大列表）
+_SKIP_KEYS = frozenset({
+    'images', 'banners', 'bannerList', 'skuList',
+    'commentList', 'reviewList', 'relatedProducts',
+})
+
+# 批准文号 -> 商品类别（按顺序匹配，取第一个命中的类别）
+_APPROVAL_CATEGORY = (
+    (re.compile(r'^国药准字[HZSJB]\d{8}'), 'drug'),            # 药品：国药准字
+    (re.compile(r'^国械注[准进]'), 'medical_device'),          # 医疗器械：国械注准、国械注进
+    (re.compile('妆'), 'cosmetic'),                            # 化妆品：卫妆准字、国妆特字
+    (re.compile('食健'), 'health_product'),                    # 保健品：国食健字、卫食健字
+)
+
+# 详情页只需要 /wholesale-drug/ 接口，图片、字体、媒体、样式表和统计脚本直接中止请求
+_BLOCKED_TYPES = frozenset({'image', 'media', 'font', 'stylesheet'})
+_TRACKERS = re.compile(r'google-analytics|doubleclick|googletagmanager|gtag|hm\.baidu|cnzz')
+
+
+@lru_cache(maxsize=4096)
+def _match_approval(text: str) -> Optional[Tuple[str, str]]:
+    """
+    匹配字段值中的批准文号
+    
+    同一批次中同一药品的多个SKU、多个接口常返回相同的批准文号，结果缓存后重复的值不再跑正则
+    
+    Returns:
+        (批准文号, 商品类别) 或 None
+    """
+    match = _APPROVAL_ANY.search(text)
+    return (match.group(0), match.lastgroup) if match else None
+
+
+@lru_cache(maxsize=4096)
+def _determine_category_by_approval(approval_number: str) -> str:
+    """
+    根据批准文号判断商品类别（最可靠的方法）
+    
+    提取流程中类别已随批准文号一起得出，本函数供单独判断已有的批准文号使用
+    
+    批准文号格式：
+    - 国药准字H/Z/S/J/B + 8位数字 = 药品
+    - 国械注准/进 = 医疗器械
+    - 卫妆准字/国妆特字 = 化妆品
+    - 国食健字/卫食健字 = 保健品
+    
+    Returns:
+        category: drug, medical_device, cosmetic, health_product, unknown
+    """
+    for pattern, category in _APPROVAL_CATEGORY:
+        if pattern.search(approval_number):
+            return category
+    
+    return 'unknown'
+
+
+async def _block_resources(route: Route):
+    """上下文级请求过滤：中止不需要的资源请求，其余照常放行"""
+    request = route.request
+    if request.resource_type in _BLOCKED_TYPES or _TRACKERS.search(request.url):
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+def _write_debug(drug_id: int, captured_apis: list):
+    """保存拦截到的API数据到文件（调试用）"""
+    try:
+        with open(f'debug_api_{drug_id}.json', 'wb') as f:
+            f.write(orjson.dumps(captured_apis, option=orjson.OPT_INDENT_2))
+        logger.info(f"API数据已保存到 debug_api_{drug_id}.json")
+    except Exception as e:
+        logger.debug(f"保存API数据失败: {e}")
+
 
 class CategoryExtractor:
     """
@@ -19,23 +130,48 @@ class CategoryExtractor:
     通过Playwright访问药品详情页，拦截API请求，提取批准文号和商品类别
     """
     
-    def __init__(self, token: str = None):
+    # 浏览器启动参数（Cloud Run兼容性）
+    BROWSER_ARGS = ['--no-sandbox', '--disable-dev-shm-usage']
+    
+    # 药品批发列表接口（按drugId查询，返回数据包含批准文号时无需打开详情页）
+    DETAIL_API_URL = 'https://dian.ysbang.cn/wholesale-drug/sales/getWholesaleListForPc/v4270'
+    
+    # 接口请求超时（秒）
+    API_TIMEOUT = 10
+    
+    # 详情页导航超时（毫秒）
+    NAV_TIMEOUT = 5000
+    
+    # 页面打开后等待批准文号API响应的最长时间（秒）
+    API_WAIT_TIMEOUT = 10
+    
+    def __init__(self, token: str = None, debug: bool = False):
+        """
+        Args:
+            token: 认证token
+            debug: 是否保存拦截到的API数据到 debug_api_<drug_id>.json（调试用）
+        """
         self.token = token
-        self.captured_apis = []
+        self.debug = debug
+        self._storage_state = None  # 登录状态（包含Token Cookie，新建浏览器上下文时加载）
     
     async def extract_category_from_detail(
         self,
         drug_id: int,
         headless: bool = True,
-        timeout: int = 30000
+        timeout: int = 30000,
+        extract_detail: bool = False
     ) -> Dict[str, Any]:
         """
-        从详情页提取商品类别和批准文号
+        从详情页提取商品类别和批准文号（单次调用，启动独立的浏览器）
+        
+        批量提取请使用 run_batch，整批只启动一次浏览器
         
         Args:
             drug_id: 药品ID
             headless: 是否无头模式
             timeout: 超时时间（毫秒）
+            extract_detail: 是否提取页面标题等详细信息（多一次与浏览器的通信，默认不提取）
             
         Returns:
             {
@@ -48,60 +184,111 @@ class CategoryExtractor:
                 'error': str
             }
         """
-        result = {
-            'success': False,
-            'drug_id': drug_id,
-            'category': None,
-            'approval_number': None,
-            'detail': {},
-            'api_data': {},
-            'error': None
-        }
-        
         try:
+            # 先直接请求接口，拿到批准文号就不必启动浏览器
+            client = self._new_api_client()
+            if client is not None:
+                async with client:
+                    result = await self._try_api_fast(client, drug_id)
+                if result:
+                    return result
+            
             async with async_playwright() as p:
-                # 启动浏览器
-                browser = await p.chromium.launch(
-                    headless=headless,
-                    args=['--no-sandbox', '--disable-dev-shm-usage']  # Cloud Run兼容性
-                )
-                
-                context = await browser.new_context(
-                    user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
-                )
-                
-                page = await context.new_page()
-                
-                # 设置请求拦截
-                await page.route('**/*', self._handle_route)
-                
-                # 访问详情页
-                detail_url = f'https://dian.ysbang.cn/goods/detail/{drug_id}'
-                
+                browser = await p.chromium.launch(headless=headless, args=self.BROWSER_ARGS)
                 try:
-                    await page.goto(detail_url, timeout=timeout)
-                    await page.wait_for_load_state('networkidle', timeout=timeout)
-                    
-                    # 等待页面加载完成
-                    await asyncio.sleep(2)
-                    
-                    # 提取页面信息
-                    result.update(await self._extract_page_info(page))
-                    result['success'] = True
-                    
-                except Exception as e:
-                    logger.error(f"页面加载失败 {detail_url}: {e}")
-                    result['error'] = f"页面加载失败: {str(e)}"
-                
+                    context = await self._new_context(browser)
+                    return await self._extract_on_context(context, drug_id, timeout, extract_detail)
                 finally:
                     await browser.close()
-                    
         except Exception as e:
             logger.error(f"提取类别失败 drug_id={drug_id}: {e}")
-            result['error'] = f"提取失败: {str(e)}"
+            result = self._empty_result(drug_id)
+            result['error'] = str(e)
+            return result
+    
+    async def run_batch(
+        self,
+        drug_ids: list,
+        headless: bool = True,
+        max_concurrent: int = 3,
+        timeout: int = 30000,
+        extract_detail: bool = False
+    ) -> list:
+        """
+        批量提取商品类别
         
-        return result
-        result = {
+        整批只启动一个浏览器，并预先创建 max_concurrent 个已设置Token、已安装请求过滤的
+        浏览器上下文放入池中；每个药品从池中取一个上下文新开页面，完成后关闭页面、归还上下文，
+        避免每个药品都冷启动一次Chromium或重建上下文；
+        有token时每个药品先直接请求接口，接口中已有批准文号的药品不再打开页面
+        
+        Args:
+            drug_ids: 药品ID列表
+            headless: 是否无头模式
+            max_concurrent: 最大并发数
+            timeout: 单个详情页的超时时间（毫秒）
+            extract_detail: 是否提取页面标题等详细信息（多一次与浏览器的通信，默认不提取）
+            
+        Returns:
+            提取结果列表，与 drug_ids 顺序一致（提取失败的药品 success 为 False，error 为错误信息）
+        """
+        async with AsyncExitStack() as stack:
+            # 整批共用一个HTTP客户端（长连接复用）请求接口，未拿到批准文号的药品再用浏览器
+            client = self._new_api_client()
+            if client is not None:
+                await stack.enter_async_context(client)
+            p = await stack.enter_async_context(async_playwright())
+            browser = await p.chromium.launch(headless=headless, args=self.BROWSER_ARGS)
+            stack.push_async_callback(browser.close)
+            
+            # 上下文池的大小即最大并发数
+            workers = max(max_concurrent, 1)
+            pool = await self._make_pool(browser, workers)
+            
+            # 生产者/消费者：待处理队列有长度上限，无论多少个药品ID，
+            # 同时存在的只有 workers 个工作协程和有限个排队的ID
+            results = [None] * len(drug_ids)
+            queue = asyncio.Queue(maxsize=workers * 2)
+            
+            async def produce():
+                for item in enumerate(drug_ids):
+                    await queue.put(item)
+                for _ in range(workers):
+                    await queue.put(None)
+            
+            async def work():
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        return
+                    index, drug_id = item
+                    try:
+                        result = await self._try_api_fast(client, drug_id) if client else None
+                        if result is None:
+                            context = await pool.get()
+                            try:
+                                result = await self._extract_on_context(
+                                    context, drug_id, timeout, extract_detail
+                                )
+                            finally:
+                                pool.put_nowait(context)
+                        results[index] = result
+                    except Exception as e:
+                        # 单个药品失败只记录在对应位置，不影响其他结果
+                        logger.error(f"提取类别失败 drug_id={drug_id}: {e}")
+                        results[index] = self._empty_result(drug_id)
+                        results[index]['error'] = str(e)
+            
+            try:
+                await asyncio.gather(produce(), *(work() for _ in range(workers)))
+                return results
+            finally:
+                while not pool.empty():
+                    await pool.get_nowait().close()
+    
+    def _empty_result(self, drug_id: int) -> Dict[str, Any]:
+        """初始的提取结果"""
+        return {
             'success': False,
             'drug_id': drug_id,
             'category': None,
@@ -110,228 +297,287 @@ class CategoryExtractor:
             'api_data': {},
             'error': None
         }
+    
+    def _new_api_client(self) -> Optional[httpx.AsyncClient]:
+        """
+        创建携带Token的HTTP客户端（HTTP/2，同一域名的请求复用一个连接）
+        
+        未安装 h2 时使用 HTTP/1.1
+        
+        Returns:
+            HTTP客户端；没有token或创建失败时返回None（跳过接口直连，只用浏览器提取）
+        """
+        if not self.token:
+            return None
+        
+        options = {
+            'headers': {
+                'Content-Type': 'application/json',
+                'Origin': 'https://dian.ysbang.cn',
+                'Referer': 'https://dian.ysbang.cn/',
+                'Token': self.token,
+                'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'
+            },
+            'cookies': {'Token': self.token},
+            'timeout': self.API_TIMEOUT,
+        }
+        try:
+            return httpx.AsyncClient(http2=True, **options)
+        except ImportError:
+            logger.debug("未安装 h2，接口请求使用 HTTP/1.1")
+        try:
+            return httpx.AsyncClient(**options)
+        except Exception as e:
+            logger.warning(f"创建HTTP客户端失败，只使用浏览器提取: {e}")
+            return None
+    
+    async def _try_api_fast(self, client: httpx.AsyncClient, drug_id: int) -> Optional[Dict[str, Any]]:
+        """
+        直接请求药品批发接口提取批准文号（无需页面渲染）
         
+        Returns:
+            提取结果；接口失败或返回数据中没有批准文号时返回None，由调用方改用浏览器提取
+        """
         try:
-            async with async_playwright() as p:
-                browser = await p.chromium.launch(headless=headless)
-                context = await browser.new_context()
-                
-                # 设置token
-                if self.token:
-                    await context.add_cookies([{
-                        'name': 'Token',
-                        'value': self.token,
-                        'domain': 'dian.ysbang.cn',
-                        'path': '/'
-                    }])
-                
-                page = await context.new_page()
+            resp = await client.post(self.DETAIL_API_URL, json={'drugId': drug_id, 'page': 1, 'pageSize': 1})
+            if resp.status_code != 200:
+                return None
+            
+            body = resp.content
+            # 与拦截响应相同：原始文本中没有批准文号时不解析JSON
+            if b'\\u' not in body and not _APPROVAL_ANY.search(body.decode('utf-8', 'ignore')):
+                return None
+            data = orjson.loads(body)
+            # 只接受属于该药品的批准文号（接口未按drugId过滤时，其他药品的批准文号不可信）
+            hit = self._find_approval_number(data, drug_id)
+        except Exception as e:
+            logger.debug(f"接口提取失败 drug_id={drug_id}: {e}")
+            return None
+        
+        if not hit:
+            return None
+        
+        result = self._empty_result(drug_id)
+        result['approval_number'], result['category'] = hit
+        result['api_data'] = data
+        result['api_url'] = self.DETAIL_API_URL
+        result['success'] = True
+        logger.info(f"✅ 接口找到批准文号: {result['approval_number']} -> {result['category']}")
+        return result
+    
+    def _get_storage_state(self) -> Optional[Dict[str, Any]]:
+        """
+        获取包含Token Cookie的登录状态
+        
+        首次调用时构建并记住，之后新建上下文直接加载，不再逐个上下文添加Cookie；
+        以字典传给 Playwright，Token 不写入磁盘文件
+        
+        Returns:
+            登录状态字典，没有token时返回None
+        """
+        if not self.token:
+            return None
+        
+        if self._storage_state is None:
+            self._storage_state = {
+                'cookies': [{
+                    'name': 'Token',
+                    'value': self.token,
+                    'domain': 'dian.ysbang.cn',
+                    'path': '/'
+                }],
+                'origins': []
+            }
+        
+        return self._storage_state
+    
+    async def _new_context(self, browser: Browser) -> BrowserContext:
+        """创建浏览器上下文：加载Token登录状态并安装请求过滤"""
+        context = await browser.new_context(
+            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36',
+            storage_state=self._get_storage_state()
+        )
+        
+        # 过滤图片、字体等资源，只加载页面脚本和接口请求
+        await context.route('**/*', _block_resources)
+        
+        return context
+    
+    async def _make_pool(self, browser: Browser, k: int) -> asyncio.Queue:
+        """创建包含 k 个浏览器上下文的上下文池"""
+        pool = asyncio.Queue()
+        for _ in range(max(k, 1)):
+            pool.put_nowait(await self._new_context(browser))
+        return pool
+    
+    async def _extract_on_context(
+        self,
+        context: BrowserContext,
+        drug_id: int,
+        timeout: int = 30000,
+        extract_detail: bool = False
+    ) -> Dict[str, Any]:
+        """
+        在浏览器上下文中新开页面，访问详情页并提取类别，完成后关闭页面
+        
+        Args:
+            context: 已设置Token的浏览器上下文
+            drug_id: 药品ID
+            timeout: 超时时间（毫秒）
+            extract_detail: 是否提取页面标题等详细信息（多一次与浏览器的通信，默认不提取）
+        """
+        result = self._empty_result(drug_id)
+        
+        page = None
+        try:
+            page = await context.new_page()
+            
+            # 拦截API请求，解析到第一个含批准文号的响应后立即通知，之后的响应不再解析
+            # （拦截结果保存在本次调用的局部变量中，并发提取的页面互不干扰）
+            found: Dict[str, Any] = {}
+            captured: List[Dict[str, Any]] = []  # 仅调试模式下保存全部响应
+            done = asyncio.Event()
+            
+            async def handle_response(response):
+                """拦截API响应并查找批准文号"""
+                if done.is_set() and not self.debug:
+                    return
                 
-                # 拦截API请求
-                self.captured_apis = []
+                url = response.url
                 
-                async def handle_response(response):
-                    """拦截并记录API响应"""
-                    url = response.url
-                    
-                    # 只关注药师帮的API
-                    if 'dian.ysbang.cn' in url and '/wholesale-drug/' in url:
-                        try:
-                            if response.status == 200:
-                                data = await response.json()
-                                self.captured_apis.append({
+                # 只关注药师帮的JSON接口
+                if 'dian.ysbang.cn' in url and '/wholesale-drug/' in url:
+                    if 'json' not in (response.headers.get('content-type') or ''):
+                        return
+                    try:
+                        if response.status == 200:
+                            body = await response.body()
+                            logger.debug(f"拦截API: {url}")
+                            if self.debug:
+                                captured.append({
                                     'url': url,
-                                    'data': data
+                                    'data': orjson.loads(body)
                                 })
-                                logger.debug(f"拦截API: {url}")
-                        except:
-                            pass
-                
-                page.on('response', handle_response)
-                
-                # 访问详情页
-                url = f'https://dian.ysbang.cn/#/drug/{drug_id}'
-                logger.info(f"访问详情页: {url}")
-                
-                await page.goto(url, wait_until='networkidle', timeout=timeout)
-                
-                # 等待页面加载完成 - 检查是否有药品详情内容
-                try:
-                    # 等待药品名称元素出现（根据实际页面结构调整）
-                    await page.wait_for_selector('text=/.*/', timeout=5000)
-                    await asyncio.sleep(3)  # 额外等待API请求完成
-                    logger.info("页面加载完成")
-                except:
-                    logger.warning("等待页面元素超时，继续...")
-                    await asyncio.sleep(5)  # 多等待一会儿
-                
-                # 分析拦截到的API数据
-                logger.info(f"拦截到 {len(self.captured_apis)} 个API请求")
-                
-                # 保存所有拦截到的API URL（用于调试）
-                result['captured_api_urls'] = [api['url'] for api in self.captured_apis]
-                
-                # 保存所有API数据到文件（调试用）
-                try:
-                    import json
-                    with open(f'debug_api_{drug_id}.json', 'w', encoding='utf-8') as f:
-                        json.dump(self.captured_apis, f, ensure_ascii=False, indent=2)
-                    logger.info(f"API数据已保存到 debug_api_{drug_id}.json")
-                except:
-                    pass
-                
-                for api in self.captured_apis:
-                    api_url = api['url']
-                    api_data = api['data']
-                    
-                    logger.debug(f"分析API: {api_url}")
-                    
-                    # 查找批准文号字段
-                    approval = self._find_approval_number(api_data)
-                    if approval:
-                        result['approval_number'] = approval
-                        result['category'] = self._determine_category_by_approval(approval)
-                        result['api_data'] = api_data
-                        result['api_url'] = api_url
-                        logger.info(f"✅ 找到批准文号: {approval} -> {result['category']}")
-                        break
-                
-                # 如果API中没有找到，尝试从页面内容中提取
-                if not result['approval_number']:
-                    content = await page.content()
-                    approval = self._extract_approval_from_html(content)
-                    if approval:
-                        result['approval_number'] = approval
-                        result['category'] = self._determine_category_by_approval(approval)
-                        logger.info(f"✅ 从HTML提取批准文号: {approval} -> {result['category']}")
-                
-                # 提取其他详细信息
+                            if done.is_set():
+                                return
+                            # 先在原始响应文本中查找批准文号，不含批准文号的响应（大多数）不解析JSON；
+                            # 中文被转义为 \uXXXX 时无法直接匹配，照常解析
+                            if b'\\u' not in body and not _APPROVAL_ANY.search(body.decode('utf-8', 'ignore')):
+                                return
+                            data = orjson.loads(body)
+                            hit = self._find_approval_number(data)
+                            if hit:
+                                found.update(approval=hit, api_data=data, url=url)
+                                done.set()
+                    except:
+                        pass
+            
+            page.on('response', handle_response)
+            
+            # 访问详情页
+            url = f'https://dian.ysbang.cn/#/drug/{drug_id}'
+            logger.info(f"访问详情页: {url}")
+            
+            # 导航只等到服务器开始响应，且超时很短：需要的数据来自API响应，
+            # 不必等页面或第三方资源加载完成，导航超时也继续等待API
+            try:
+                await page.goto(url, wait_until='commit', timeout=min(timeout, self.NAV_TIMEOUT))
+            except PWTimeout:
+                logger.debug(f"导航超时，继续等待API: {url}")
+            
+            # 等待含批准文号的API响应到达，超时后改为从页面HTML中提取
+            try:
+                await asyncio.wait_for(done.wait(), timeout=self.API_WAIT_TIMEOUT)
+                logger.info("已拦截到批准文号API")
+            except asyncio.TimeoutError:
+                logger.warning("等待API响应超时，继续...")
+            
+            if self.debug:
+                # 保存所有拦截到的API URL和数据（在线程中写文件，不阻塞其他页面）
+                logger.info(f"拦截到 {len(captured)} 个API请求")
+                result['captured_api_urls'] = [api['url'] for api in captured]
+                await asyncio.to_thread(_write_debug, drug_id, captured)
+            
+            if found:
+                result['approval_number'], result['category'] = found['approval']
+                result['api_data'] = found['api_data']
+                result['api_url'] = found['url']
+                logger.info(f"✅ 找到批准文号: {result['approval_number']} -> {result['category']}")
+            
+            # 如果API中没有找到，尝试从页面内容中提取（在页面内匹配，只传回匹配结果）
+            if not result['approval_number']:
+                approval = await page.evaluate(_FIND_APPROVAL_JS, _APPROVAL_JS_SOURCE)
+                hit = self._extract_approval_from_html(approval) if approval else None
+                if hit:
+                    result['approval_number'], result['category'] = hit
+                    logger.info(f"✅ 从HTML提取批准文号: {result['approval_number']} -> {result['category']}")
+            
+            # 提取其他详细信息（需要时才提取）
+            if extract_detail:
                 result['detail'] = await self._extract_detail_info(page)
-                
-                result['success'] = True
-                
-                await browser.close()
-                
+            
+            result['success'] = True
+            
         except Exception as e:
-            logger.error(f"提取类别失败: {e}")
+            logger.error(f"提取类别失败 drug_id={drug_id}: {e}")
             result['error'] = str(e)
+        finally:
+            if page is not None:
+                await page.close()
         
         return result
     
-    def _find_approval_number(self, data: Any, path: str = '') -> Optional[str]:
+    def _find_approval_number(self, data: Any, drug_id: int = None) -> Optional[Tuple[str, str]]:
         """
-        递归查找批准文号字段
+        查找批准文号字段
+        
+        用队列按层遍历JSON（不递归，没有逐层的函数调用开销），离根最近的批准文号优先
         
         Args:
             data: API返回的数据
-            path: 当前路径（用于调试）
+            drug_id: 药品ID（可选），提供时只接受所在商品（自身或最近的上层字典）的 drugId
+                     与之相同的批准文号
             
         Returns:
-            批准文号或None
+            (批准文号, 商品类别) 或 None，类别由匹配批准文号的正则分组直接得出
         """
-        if isinstance(data, dict):
-            # 检查常见的批准文号字段名
-            approval_fields = [
-                'approvalNumber', 'approval_number', 'approvalNo',
-                'licenseNumber', 'license_number', 'licenseNo',
-                'registrationNumber', 'registration_number',
-                'certificateNumber', 'certificate_number',
-                'approvalNum', 'licenseNum', 'registrationNum',
-                'pzwh', 'pihao', 'zhunzi',  # 拼音
-            ]
+        # 队列元素：(节点, 所在商品的drugId)
+        queue = deque([(data, None)])
+        while queue:
+            node, owner_id = queue.popleft()
             
-            for field in approval_fields:
-                if field in data:
-                    value = data[field]
-                    if value and isinstance(value, str) and len(value) > 5:
-                        # 验证是否是有效的批准文号格式
-                        if self._is_valid_approval_number(value):
-                            logger.debug(f"找到批准文号字段: {path}.{field} = {value}")
-                            return value
+            if isinstance(node, dict):
+                owner_id = node.get('drugId', owner_id)
+                # 只检查当前字典中存在的批准文号字段（通常一个都没有）
+                if drug_id is None or str(owner_id) == str(drug_id):
+                    for field in node.keys() & _APPROVAL_FIELDS:
+                        value = node[field]
+                        if isinstance(value, str) and len(value) > 5:
+                            # 验证是否是有效的批准文号格式，同时得到类别
+                            hit = _match_approval(value)
+                            if hit:
+                                if logger.isEnabledFor(logging.DEBUG):
+                                    logger.debug(f"找到批准文号字段: {field} = {value}")
+                                return hit
+                
+                # 继续查找下一层（跳过图片、评论等不含批准文号的字段）
+                for key, value in node.items():
+                    if key not in _SKIP_KEYS and isinstance(value, (dict, list)):
+                        queue.append((value, owner_id))
             
-            # 递归查找
-            for key, value in data.items():
-                result = self._find_approval_number(value, f"{path}.{key}")
-                if result:
-                    return result
-        
-        elif isinstance(data, list):
-            for i, item in enumerate(data):
-                result = self._find_approval_number(item, f"{path}[{i}]")
-                if result:
-                    return result
+            elif isinstance(node, list):
+                queue.extend((item, owner_id) for item in node if isinstance(item, (dict, list)))
         
         return None
     
     def _is_valid_approval_number(self, text: str) -> bool:
         """验证是否是有效的批准文号格式"""
-        patterns = [
-            r'国药准字[HZSJB]\d{8}',
-            r'国械注准\d+',
-            r'国械注进\d+',
-            r'卫妆准字\d+',
-            r'国妆特字\d+',
-            r'国食健字G?\d+',
-            r'卫食健字\d+',
-        ]
-        
-        for pattern in patterns:
-            if re.search(pattern, text):
-                return True
-        
-        return False
-    
-    def _extract_approval_from_html(self, html: str) -> Optional[str]:
-        """从HTML内容中提取批准文号"""
-        patterns = [
-            r'国药准字[HZSJB]\d{8}',
-            r'国械注准\d+',
-            r'国械注进\d+',
-            r'卫妆准字\d+',
-            r'国妆特字\d+',
-            r'国食健字G?\d+',
-            r'卫食健字\d+',
-        ]
-        
-        for pattern in patterns:
-            match = re.search(pattern, html)
-            if match:
-                return match.group(0)
-        
-        return None
+        return _APPROVAL_ANY.search(text) is not None
     
-    def _determine_category_by_approval(self, approval_number: str) -> str:
-        """
-        根据批准文号判断商品类别（最可靠的方法）
-        
-        批准文号格式：
-        - 国药准字H/Z/S/J/B + 8位数字 = 药品
-        - 国械注准/进 = 医疗器械
-        - 卫妆准字/国妆特字 = 化妆品
-        - 国食健字/卫食健字 = 保健品
-        
-        Returns:
-            category: drug, medical_device, cosmetic, health_product
-        """
-        approval = approval_number.upper()
-        
-        # 药品：国药准字
-        if re.match(r'国药准字[HZSJB]\d{8}', approval):
-            return 'drug'
-        
-        # 医疗器械：国械注准、国械注进
-        if re.match(r'国械注[准进]', approval):
-            return 'medical_device'
-        
-        # 化妆品：卫妆准字、国妆特字
-        if '妆' in approval:
-            return 'cosmetic'
-        
-        # 保健品：国食健字、卫食健字
-        if '食健' in approval:
-            return 'health_product'
-        
-        return 'unknown'
+    def _extract_approval_from_html(self, html: str) -> Optional[Tuple[str, str]]:
+        """从HTML内容中提取批准文号，返回 (批准文号, 商品类别) 或 None"""
+        match = _APPROVAL_ANY.search(html)
+        return (match.group(0), match.lastgroup) if match else None
     
     async def _extract_detail_info(self, page: Page) -> Dict[str, Any]:
         """提取详情页的其他信息"""
@@ -356,7 +602,8 @@ class CategoryExtractor:
 def extract_category_sync(
     drug_id: int,
     token: str = None,
-    headless: bool = True
+    headless: bool = True,
+    extract_detail: bool = False
 ) -> Dict[str, Any]:
     """
     同步版本的类别提取（方便调用）
@@ -365,19 +612,47 @@ def extract_category_sync(
         drug_id: 药品ID
         token: 认证token
         headless: 是否无头模式
+        extract_detail: 是否提取页面标题等详细信息
         
     Returns:
         提取结果
     """
     extractor = CategoryExtractor(token)
-    return asyncio.run(extractor.extract_category_from_detail(drug_id, headless))
+    return asyncio.run(extractor.extract_category_from_detail(drug_id, headless, extract_detail=extract_detail))
+
+
+def extract_categories_sync(
+    drug_ids: list,
+    token: str = None,
+    headless: bool = True,
+    max_concurrent: int = 3,
+    extract_detail: bool = False
+) -> list:
+    """
+    同步版本的批量类别提取
+    
+    整批共用一个事件循环、一个Playwright驱动进程和一个浏览器，
+    提取多个药品时不要循环调用 extract_category_sync
+    
+    Args:
+        drug_ids: 药品ID列表
+        token: 认证token
+        headless: 是否无头模式
+        max_concurrent: 最大并发数
+        extract_detail: 是否提取页面标题等详细信息
+        
+    Returns:
+        提取结果列表
+    """
+    return asyncio.run(batch_extract_categories(drug_ids, token, headless, max_concurrent, extract_detail))
 
 
 async def batch_extract_categories(
     drug_ids: list,
     token: str = None,
     headless: bool = True,
-    max_concurrent: int = 3
+    max_concurrent: int = 3,
+    extract_detail: bool = False
 ) -> list:
     """
     批量提取商品类别
@@ -387,23 +662,13 @@ async def batch_extract_categories(
         token: 认证token
         headless: 是否无头模式
         max_concurrent: 最大并发数
+        extract_detail: 是否提取页面标题等详细信息
         
     Returns:
         提取结果列表
     """
     extractor = CategoryExtractor(token)
-    
-    # 使用信号量控制并发
-    semaphore = asyncio.Semaphore(max_concurrent)
-    
-    async def extract_with_limit(drug_id):
-        async with semaphore:
-            return await extractor.extract_category_from_detail(drug_id, headless)
-    
-    tasks = [extract_with_limit(drug_id) for drug_id in drug_ids]
-    results = await asyncio.gather(*tasks, return_exceptions=True)
-    
-    return results
+    return await extractor.run_batch(drug_ids, headless, max_concurrent, extract_detail=extract_detail)
 
 
 if __name__ == '__main__':
@@ -411,11 +676,11 @@ if __name__ == '__main__':
     import sys
     
     if len(sys.argv) < 2:
-        print("用法: python category_extractor.py <drug_id>")
+        print("用法: python category_extractor.py <drug_id> [drug_id ...]")
         print("示例: python category_extractor.py 138595")
         sys.exit(1)
     
-    drug_id = int(sys.argv[1])
+    drug_ids = [int(arg) for arg in sys.argv[1:]]
     
     # 读取token
     try:
@@ -425,19 +690,28 @@ if __name__ == '__main__':
         token = None
         print("⚠️  未找到token，可能无法访问详情页")
     
-    print(f"正在提取 drugId={drug_id} 的类别信息...")
+    print(f"正在提取 drugId={', '.join(map(str, drug_ids))} 的类别信息...")
     print("=" * 70)
     
-    result = extract_category_sync(drug_id, token, headless=False)
-    
-    print(f"\n结果:")
-    print(f"  成功: {result['success']}")
-    print(f"  类别: {result['category']}")
-    print(f"  批准文号: {result['approval_number']}")
-    
-    if result['api_data']:
-        print(f"\n拦截到的API数据:")
-        print(json.dumps(result['api_data'], ensure_ascii=False, indent=2)[:500])
+    # 多个药品ID时整批提取，只启动一次浏览器
+    if len(drug_ids) > 1:
+        results = extract_categories_sync(drug_ids, token, headless=False)
+    else:
+        results = [extract_category_sync(drug_ids[0], token, headless=False)]
     
-    if result['error']:
-        print(f"\n错误: {result['error']}")
+    for result in results:
+        if isinstance(result, Exception):
+            print(f"\n错误: {result}")
+            continue
+        
+        print(f"\n结果 drugId={result['drug_id']}:")
+        print(f"  成功: {result['success']}")
+        print(f"  类别: {result['category']}")
+        print(f"  批准文号: {result['approval_number']}")
+        
+        if result['api_data']:
+            print(f"\n拦截到的API数据:")
+            print(json.dumps(result['api_data'], ensure_ascii=False, indent=2)[:500])
+        
+        if result['error']:
+            print(f"\n错误: {result['error']}")
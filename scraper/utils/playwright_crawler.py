@@ -9,15 +9,48 @@ Playwright 浏览器自动化爬虫
 3. 支持搜索结果页和药品详情页两种模式
 """
 import asyncio
-import json
+import io
 import logging
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 from datetime import datetime
 
+import orjson
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+from scraper.utils.browser_pool import BrowserPool, run_with_shared_pool
+from scraper.utils.price_cache import cached_crawl
+
 logger = logging.getLogger(__name__)
 
 
+class _ApiResponse(dict):
+    """
+    拦截到的 API 响应
+
+    拦截时只保存原始响应体（raw），首次读取 'data' 时才解析 JSON 并缓存，
+    解析不在页面导航期间进行；无法解析或不是 JSON 对象的响应体视为空字典
+    """
+
+    def __missing__(self, key):
+        if key != 'data':
+            raise KeyError(key)
+        try:
+            data = orjson.loads(self['raw'])
+        except orjson.JSONDecodeError as e:
+            logger.debug(f"解析 API 响应失败: {e}")
+            data = {}
+        if not isinstance(data, dict):
+            logger.debug(f"API 响应不是 JSON 对象: {type(data).__name__}")
+            data = {}
+        self['data'] = data
+        return data
+
+
 class YSBangPlaywrightCrawler:
     """
     药师帮 Playwright 爬虫
@@ -30,20 +63,72 @@ class YSBangPlaywrightCrawler:
     3. 从 API 响应中提取供应商价格信息
     """
     
-    def __init__(self, token: str = None, headless: bool = True):
+    # 浏览器上下文参数
+    CONTEXT_OPTIONS = {
+        'viewport': {'width': 1920, 'height': 1080},
+        'user_agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+    }
+    
+    # 纯 API 拦截不需要的资源类型，直接中止请求以节省带宽和解析时间
+    # XHR/fetch/document/script 保持放行，保证页面能正常发出 API 请求
+    BLOCKED_RESOURCE_TYPES = frozenset({
+        'font', 'image', 'media', 'stylesheet', 'beacon',
+        'websocket', 'other', 'imageset', 'texttrack'
+    })
+    
+    # 统计和广告域名，无论资源类型（脚本、XHR 等）都直接中止
+    BLOCKED_URL_PATTERN = re.compile(r'google-analytics|googletagmanager|doubleclick|hm\.baidu|cnzz|umeng')
+    
+    # 关注的 API 端点
+    API_PATTERN = re.compile(
+        r'(getWholesaleListForPc'         # 供应商列表（包含价格）
+        r'|facetWholesaleList'            # 供应商聚合列表
+        r'|getRegularSearchPurchaseList'  # 搜索结果
+        r'|getHotWholesalesForProvider'   # 供应商热销商品
+        r'|getDrugDetail)'                # 药品详情
+    )
+    
+    # 包含价格列表的 API，页面打开后等待其中任意一个响应到达即可开始提取
+    PROVIDER_API = 'getWholesaleListForPc'        # 供应商列表
+    SEARCH_API = 'getRegularSearchPurchaseList'   # 搜索结果（每项为一种药品）
+    PRICE_API_PATTERN = re.compile(f'{PROVIDER_API}|{SEARCH_API}')
+    
+    # 等待价格 API 响应的最长时间（秒），超时后从页面 DOM 提取
+    API_WAIT_TIMEOUT = 10
+    
+    # 供应商列表响应体超过该大小（字节）且已安装 ijson 时流式解析，
+    # 逐个取出商品，不把整个响应解析为字典
+    STREAM_PARSE_THRESHOLD = 64 * 1024
+    
+    # 流式解析时依次尝试的商品列表路径（与 _extract_items_from_response 的查找顺序一致）
+    STREAM_ITEM_PREFIXES = ('data.list.item', 'data.wholesales.item', 'data.items.item', 'data.records.item', 'data.item')
+    
+    def __init__(
+        self,
+        token: str = None,
+        headless: bool = True,
+        pool: 'BrowserPool' = None,
+        api_filter: 're.Pattern' = None
+    ):
         """
         初始化爬虫
         
         Args:
             token: 登录Token（可选，如果不提供则从缓存读取）
             headless: 是否无头模式运行
+            pool: 共享浏览器池（可选，提供时复用池中的浏览器，不再单独启动）
+            api_filter: 需要记录的 API URL 正则（可选，默认 API_PATTERN），
+                不匹配的响应在拦截时直接丢弃，不读取响应体
         """
         self.token = token or self._get_cached_token()
         self.headless = headless
+        self.pool = pool
+        self.api_filter = api_filter or self.API_PATTERN
         self.browser = None
         self.context = None
         self.page = None
         self._api_responses = []  # 存储拦截到的 API 响应
+        self._price_api_event = None  # 拦截到价格 API 响应时触发
     
     def _get_cached_token(self) -> str:
         """获取缓存的Token"""
@@ -51,8 +136,8 @@ class YSBangPlaywrightCrawler:
         cache_file = '.token_cache.json'
         try:
             if os.path.exists(cache_file):
-                with open(cache_file, 'r') as f:
-                    cache = json.load(f)
+                with open(cache_file, 'rb') as f:
+                    cache = orjson.loads(f.read())
                 return cache.get('token', '')
         except:
             pass
@@ -60,28 +145,39 @@ class YSBangPlaywrightCrawler:
     
     async def _init_browser(self):
         """初始化浏览器"""
-        from playwright.async_api import async_playwright
-        
-        self.playwright = await async_playwright().start()
         self._api_responses = []  # 重置 API 响应列表
+        self._price_api_event = asyncio.Event()
         
-        # 尝试使用系统 Chrome 或已安装的 Chromium
-        try:
-            self.browser = await self.playwright.chromium.launch(
-                headless=self.headless,
-                channel='chrome'  # 使用系统安装的 Chrome
-            )
-        except Exception as e:
-            logger.warning(f"无法使用系统 Chrome: {e}, 尝试使用 Playwright Chromium")
-            self.browser = await self.playwright.chromium.launch(headless=self.headless)
+        if self.pool:
+            # 从浏览器池获取页面，浏览器由池统一管理
+            self.page = await self.pool.acquire(**self.CONTEXT_OPTIONS)
+            self.context = self.page.context
+        else:
+            from playwright.async_api import async_playwright
+            
+            self.playwright = await async_playwright().start()
+            
+            # 尝试使用系统 Chrome 或已安装的 Chromium
+            try:
+                self.browser = await self.playwright.chromium.launch(
+                    headless=self.headless,
+                    channel='chrome'  # 使用系统安装的 Chrome
+                )
+            except Exception as e:
+                logger.warning(f"无法使用系统 Chrome: {e}, 尝试使用 Playwright Chromium")
+                self.browser = await self.playwright.chromium.launch(headless=self.headless)
+            
+            # 创建上下文
+            self.context = await self.browser.new_context(**self.CONTEXT_OPTIONS)
+            self.page = await self.context.new_page()
         
-        # 创建上下文，设置Cookie
-        self.context = await self.browser.new_context(
-            viewport={'width': 1920, 'height': 1080},
-            user_agent='Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
-        )
+        await self._configure_context()
         
-        # 设置Token Cookie
+        # 设置 API 请求拦截
+        await self._setup_api_interception()
+    
+    async def _configure_context(self):
+        """配置浏览器上下文：设置Token Cookie，屏蔽无关资源"""
         if self.token:
             await self.context.add_cookies([{
                 'name': 'Token',
@@ -90,10 +186,15 @@ class YSBangPlaywrightCrawler:
                 'path': '/'
             }])
         
-        self.page = await self.context.new_page()
-        
-        # 设置 API 请求拦截
-        await self._setup_api_interception()
+        await self.context.route('**/*', self._block_unneeded_resources)
+    
+    async def _block_unneeded_resources(self, route):
+        """中止图片、字体、样式及统计广告等请求，只放行页面与 API 所需的资源"""
+        request = route.request
+        if request.resource_type in self.BLOCKED_RESOURCE_TYPES or self.BLOCKED_URL_PATTERN.search(request.url):
+            await route.abort()
+        else:
+            await route.continue_()
     
     async def _setup_api_interception(self):
         """设置 API 请求拦截，捕获供应商价格数据"""
@@ -106,32 +207,42 @@ class YSBangPlaywrightCrawler:
             if 'dian.ysbang.cn' not in url:
                 return
             
-            # 关注的 API 端点
-            api_patterns = [
-                'getWholesaleListForPc',      # 供应商列表（包含价格）
-                'facetWholesaleList',          # 供应商聚合列表
-                'getRegularSearchPurchaseList', # 搜索结果
-                'getHotWholesalesForProvider',  # 供应商热销商品
-                'getDrugDetail',               # 药品详情
-            ]
-            
-            if any(pattern in url for pattern in api_patterns):
+            if self.api_filter.search(url):
+                # 只读取原始响应体，JSON 在提取价格时才解析，不占用导航期间的事件循环
                 try:
                     body = await response.body()
-                    data = json.loads(body.decode('utf-8'))
-                    self._api_responses.append({
-                        'url': url,
-                        'data': data,
-                        'timestamp': datetime.now().isoformat()
-                    })
-                    logger.debug(f"拦截到 API: {url[:80]}...")
                 except Exception as e:
-                    logger.debug(f"解析 API 响应失败: {e}")
+                    logger.debug(f"读取 API 响应失败: {e}")
+                    return
+                entry = _ApiResponse(
+                    url=url,
+                    raw=body,
+                    timestamp=datetime.now().isoformat()
+                )
+                self._api_responses.append(entry)
+                logger.debug(f"拦截到 API: {url[:80]}...")
+                if self.PRICE_API_PATTERN.search(url):
+                    self._price_api_event.set()
         
         self.page.on('response', handle_response)
     
+    async def _wait_for_price_api(self):
+        """等待价格 API 响应到达（最多 API_WAIT_TIMEOUT 秒），超时后继续，由 DOM 提取兜底"""
+        try:
+            await asyncio.wait_for(self._price_api_event.wait(), timeout=self.API_WAIT_TIMEOUT)
+        except asyncio.TimeoutError:
+            logger.info("等待价格 API 响应超时，继续...")
+    
     async def _close_browser(self):
         """关闭浏览器"""
+        if self.pool:
+            # 归还页面给浏览器池，浏览器保持运行
+            if self.page:
+                await self.pool.release(self.page)
+            self.page = None
+            self.context = None
+            return
+        
         if self.page:
             await self.page.close()
         if self.context:
@@ -186,7 +297,8 @@ class YSBangPlaywrightCrawler:
                 url = f'https://dian.ysbang.cn/#/indexContent?searchkey={keyword}'
             
             logger.info(f"访问页面: {url}")
-            await self.page.goto(url, wait_until='networkidle', timeout=30000)
+            # DOM 就绪即可，不等待网络空闲（统计、长连接等请求与采集无关）
+            await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
             
             # 等待商品卡片加载
             try:
@@ -196,13 +308,14 @@ class YSBangPlaywrightCrawler:
                 results['error'] = '页面加载超时，可能需要登录'
                 return results
             
-            await asyncio.sleep(2)  # 等待数据完全加载
+            # 等待价格 API 响应到达
+            await self._wait_for_price_api()
             
-            # 滚动页面加载更多供应商
-            await self._scroll_to_load_all(max_providers)
-            
-            # 等待更多 API 响应
-            await asyncio.sleep(1)
+            # API 已返回足够的供应商时无需滚动加载
+            if self._api_item_count() < max_providers:
+                await self._scroll_to_load_all(max_providers)
+                # 等待更多 API 响应
+                await asyncio.sleep(1)
             
             # 优先从拦截的 API 响应中提取数据
             provider_prices = self._extract_prices_from_api_responses(keyword)
@@ -236,6 +349,50 @@ class YSBangPlaywrightCrawler:
         
         return results
     
+    async def get_many(
+        self,
+        items: List[Tuple[str, Optional[int]]],
+        concurrency: int = 5,
+        max_providers: int = 50
+    ) -> List[Dict[str, Any]]:
+        """
+        并发获取多个药品的供应商价格
+        
+        所有药品共用一个浏览器，每个药品使用独立的爬虫实例和 context + page
+        （拦截到的 API 响应各自保存，互不混淆），同时进行的页面数不超过 concurrency
+        
+        Args:
+            items: (关键词, 药品ID) 列表，药品ID可为 None
+            concurrency: 最大并发页面数
+            max_providers: 每个药品的最大供应商数量
+            
+        Returns:
+            与 items 顺序一致的结果列表，每项同 get_drug_provider_prices 的返回值
+        """
+        if self.pool is None:
+            async with BrowserPool(headless=self.headless, max_pages=concurrency) as pool:
+                return await self._gather_many(pool, items, concurrency, max_providers)
+        return await self._gather_many(self.pool, items, concurrency, max_providers)
+    
+    async def _gather_many(
+        self,
+        pool: BrowserPool,
+        items: List[Tuple[str, Optional[int]]],
+        concurrency: int,
+        max_providers: int
+    ) -> List[Dict[str, Any]]:
+        """在指定浏览器池中并发采集多个药品"""
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def crawl_one(keyword, drug_id):
+            async with semaphore:
+                crawler = YSBangPlaywrightCrawler(
+                    token=self.token, headless=self.headless, pool=pool, api_filter=self.api_filter
+                )
+                return await crawler.get_drug_provider_prices(keyword, drug_id=drug_id, max_providers=max_providers)
+        
+        return await asyncio.gather(*(crawl_one(keyword, drug_id) for keyword, drug_id in items))
+    
     def _extract_prices_from_api_responses(self, keyword: str) -> List[Dict[str, Any]]:
         """
         从拦截的 API 响应中提取供应商价格
@@ -251,12 +408,10 @@ class YSBangPlaywrightCrawler:
         
         for response in self._api_responses:
             url = response.get('url', '')
-            data = response.get('data', {})
             
             # 处理 getWholesaleListForPc 响应（供应商列表）
             if 'getWholesaleListForPc' in url:
-                items = self._extract_items_from_response(data)
-                for item in items:
+                for item in self._wholesale_items(response):
                     provider_info = self._parse_wholesale_item(item)
                     if provider_info and provider_info.get('provider_name') not in seen_providers:
                         seen_providers.add(provider_info.get('provider_name'))
@@ -264,8 +419,7 @@ class YSBangPlaywrightCrawler:
             
             # 处理 getRegularSearchPurchaseList 响应（搜索结果）
             elif 'getRegularSearchPurchaseList' in url:
-                items = self._extract_items_from_response(data)
-                for item in items:
+                for item in self._wholesale_items(response):
                     # 这个 API 返回的是聚合数据，包含 drug 字段
                     drug = item.get('drug', item)
                     provider_info = self._parse_drug_item(drug)
@@ -275,7 +429,7 @@ class YSBangPlaywrightCrawler:
             # 处理 facetWholesaleList 响应
             elif 'facetWholesaleList' in url:
                 # 这个 API 返回供应商聚合信息
-                result = data.get('data', {})
+                result = response['data'].get('data', {})
                 if isinstance(result, dict):
                     wholesales = result.get('wholesales', [])
                     for item in wholesales:
@@ -287,6 +441,42 @@ class YSBangPlaywrightCrawler:
         logger.info(f"从 API 响应中提取了 {len(provider_prices)} 个供应商价格")
         return provider_prices
     
+    def _wholesale_items(self, response: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        价格列表响应中的商品（首次调用时解析，结果保存在响应的 'items' 中）
+
+        统计商品数和提取价格共用同一次解析；不是字典的列表元素被忽略
+        """
+        items = response.get('items')
+        if items is None:
+            items = [item for item in self._iter_wholesale_items(response) if isinstance(item, dict)]
+            response['items'] = items
+        return items
+    
+    def _iter_wholesale_items(self, response: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        逐个取出供应商列表响应中的商品
+        
+        响应体较大且已安装 ijson 时流式解析，每次只构建一个商品字典；
+        否则（或流式解析没有找到商品时）解析整个响应后查找商品列表
+        """
+        raw = response.get('raw')
+        if ijson is not None and 'data' not in response and raw and len(raw) > self.STREAM_PARSE_THRESHOLD:
+            found = False
+            try:
+                for prefix in self.STREAM_ITEM_PREFIXES:
+                    for item in ijson.items(io.BytesIO(raw), prefix, use_float=True):
+                        found = True
+                        yield item
+                    if found:
+                        return
+            except ijson.JSONError as e:
+                logger.debug(f"流式解析 API 响应失败: {e}")
+                if found:
+                    return
+        
+        yield from self._extract_items_from_response(response['data'])
+    
     def _extract_items_from_response(self, data: Dict[str, Any]) -> List[Dict[str, Any]]:
         """从 API 响应中提取商品列表"""
         result = data.get('data', data)
@@ -400,8 +590,20 @@ class YSBangPlaywrightCrawler:
             logger.debug(f"解析药品数据失败: {e}")
             return None
     
-    async def _scroll_to_load_all(self, max_items: int = 50):
-        """滚动页面加载更多商品"""
+    def _api_item_count(self, api: str = PROVIDER_API) -> int:
+        """
+        已拦截的某个价格 API（默认供应商列表）响应中的商品总数
+
+        在需要判断是否继续滚动时才解析响应，每个响应只解析一次
+        """
+        return sum(len(self._wholesale_items(r)) for r in self._api_responses if api in r['url'])
+    
+    async def _scroll_to_load_all(self, max_items: int = 50, api: str = PROVIDER_API):
+        """
+        滚动页面加载更多商品
+        
+        页面卡片数或 api 响应中的商品数达到 max_items 时停止
+        """
         last_count = 0
         scroll_attempts = 0
         max_scroll_attempts = 10
@@ -423,6 +625,9 @@ class YSBangPlaywrightCrawler:
             # 滚动到页面底部
             await self.page.evaluate('window.scrollTo(0, document.body.scrollHeight)')
             await asyncio.sleep(1)
+            
+            if self._api_item_count(api) >= max_items:
+                break
         
         logger.info(f"滚动加载完成，共 {last_count} 个商品卡片")
     
@@ -598,15 +803,15 @@ class YSBangPlaywrightCrawler:
             url = f'https://dian.ysbang.cn/#/indexContent?searchkey={keyword}'
             logger.info(f"访问搜索页面: {url}")
             
-            await self.page.goto(url, wait_until='networkidle', timeout=30000)
+            await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
             await self.page.wait_for_selector('.all-goods-wrapper', timeout=15000)
-            await asyncio.sleep(2)
+            await self._wait_for_price_api()
             
-            # 滚动加载更多
-            await self._scroll_to_load_all(max_items)
-            
-            # 等待更多 API 响应
-            await asyncio.sleep(1)
+            # API 已返回足够的商品时无需滚动加载
+            if self._api_item_count(self.SEARCH_API) < max_items:
+                await self._scroll_to_load_all(max_items, self.SEARCH_API)
+                # 等待更多 API 响应
+                await asyncio.sleep(1)
             
             # 从 API 响应中提取数据
             all_prices = self._extract_prices_from_api_responses(keyword)
@@ -698,13 +903,13 @@ class YSBangPlaywrightCrawler:
                 # 直接访问药品详情页
                 url = f'https://dian.ysbang.cn/#/drug/{drug_id}'
                 logger.info(f"访问药品详情页: {url}")
-                await self.page.goto(url, wait_until='networkidle', timeout=30000)
-                await asyncio.sleep(2)
+                await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
+                await self._wait_for_price_api()
             else:
                 # 在搜索页面直接提取数据，不点击进入详情页
                 url = f'https://dian.ysbang.cn/#/indexContent?searchkey={keyword}'
                 logger.info(f"访问搜索页面: {url}")
-                await self.page.goto(url, wait_until='networkidle', timeout=30000)
+                await self.page.goto(url, wait_until='domcontentloaded', timeout=30000)
                 
                 # 等待商品卡片加载
                 try:
@@ -713,7 +918,7 @@ class YSBangPlaywrightCrawler:
                     results['error'] = '页面加载超时，可能需要登录'
                     return results
                 
-                await asyncio.sleep(2)
+                await self._wait_for_price_api()
             
             # 获取药品名称
             try:
@@ -723,11 +928,11 @@ class YSBangPlaywrightCrawler:
             except:
                 results['drug_name'] = keyword
             
-            # 滚动页面加载更多供应商
-            await self._scroll_to_load_all(max_providers)
-            
-            # 等待 API 响应
-            await asyncio.sleep(1)
+            # API 已返回足够的供应商时无需滚动加载
+            if self._api_item_count() < max_providers:
+                await self._scroll_to_load_all(max_providers)
+                # 等待 API 响应
+                await asyncio.sleep(1)
             
             # 从 API 响应中提取供应商价格
             provider_prices = self._extract_prices_from_api_responses(keyword)
@@ -769,7 +974,13 @@ class YSBangPlaywrightCrawler:
         return results
 
 
-def crawl_drug_prices_sync(keyword: str, drug_id: int = None, token: str = None, headless: bool = True) -> Dict[str, Any]:
+def crawl_drug_prices_sync(
+    keyword: str,
+    drug_id: int = None,
+    token: str = None,
+    headless: bool = True,
+    force_refresh: bool = False
+) -> Dict[str, Any]:
     """
     同步方式爬取药品价格
     
@@ -778,15 +989,54 @@ def crawl_drug_prices_sync(keyword: str, drug_id: int = None, token: str = None,
         drug_id: 药品ID（强烈建议提供，可获取该药品的所有供应商价格）
         token: 登录Token
         headless: 是否无头模式
+        force_refresh: 忽略缓存的采集结果，重新采集
+        
+    Returns:
+        爬取结果（有效期内的重复查询直接返回缓存结果）
+    """
+    return cached_crawl(
+        ('prices', keyword, drug_id),
+        lambda: run_with_shared_pool(
+            lambda pool: YSBangPlaywrightCrawler(token=token, headless=headless, pool=pool)
+            .get_drug_provider_prices(keyword, drug_id=drug_id),
+            headless
+        ),
+        force_refresh
+    )
+
+
+def crawl_many_drug_prices_sync(
+    items: List[Tuple[str, Optional[int]]],
+    token: str = None,
+    concurrency: int = 3,
+    headless: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    同步方式并发爬取多个药品的价格
+    
+    Args:
+        items: (关键词, 药品ID) 列表，药品ID可为 None
+        token: 登录Token
+        concurrency: 最大并发页面数
+        headless: 是否无头模式
         
     Returns:
-        爬取结果
+        与 items 顺序一致的爬取结果列表
     """
-    crawler = YSBangPlaywrightCrawler(token=token, headless=headless)
-    return asyncio.run(crawler.get_drug_provider_prices(keyword, drug_id=drug_id))
+    return run_with_shared_pool(
+        lambda pool: YSBangPlaywrightCrawler(token=token, headless=headless, pool=pool)
+        .get_many(items, concurrency=concurrency),
+        headless
+    )
 
 
-def search_and_crawl_sync(keyword: str, token: str = None, max_items: int = 10, headless: bool = True) -> Dict[str, Any]:
+def search_and_crawl_sync(
+    keyword: str,
+    token: str = None,
+    max_items: int = 10,
+    headless: bool = True,
+    force_refresh: bool = False
+) -> Dict[str, Any]:
     """
     同步方式搜索并爬取所有供应商价格
     
@@ -795,15 +1045,30 @@ def search_and_crawl_sync(keyword: str, token: str = None, max_items: int = 10,
         token: 登录Token
         max_items: 最大处理商品数量
         headless: 是否无头模式
+        force_refresh: 忽略缓存的采集结果，重新采集
         
     Returns:
-        爬取结果
+        爬取结果（有效期内的重复查询直接返回缓存结果）
     """
-    crawler = YSBangPlaywrightCrawler(token=token, headless=headless)
-    return asyncio.run(crawler.search_and_get_all_prices(keyword, max_items))
+    return cached_crawl(
+        ('search', keyword, None, max_items),
+        lambda: run_with_shared_pool(
+            lambda pool: YSBangPlaywrightCrawler(token=token, headless=headless, pool=pool)
+            .search_and_get_all_prices(keyword, max_items),
+            headless
+        ),
+        force_refresh
+    )
 
 
-def crawl_drug_detail_sync(keyword: str, drug_id: int = None, token: str = None, max_providers: int = 100, headless: bool = True) -> Dict[str, Any]:
+def crawl_drug_detail_sync(
+    keyword: str,
+    drug_id: int = None,
+    token: str = None,
+    max_providers: int = 100,
+    headless: bool = True,
+    force_refresh: bool = False
+) -> Dict[str, Any]:
     """
     同步方式获取单个药品的所有供应商价格
     
@@ -815,15 +1080,23 @@ def crawl_drug_detail_sync(keyword: str, drug_id: int = None, token: str = None,
         token: 登录Token
         max_providers: 最大供应商数量
         headless: 是否无头模式
+        force_refresh: 忽略缓存的采集结果，重新采集
         
     Returns:
-        爬取结果，包含:
+        爬取结果（有效期内的重复查询直接返回缓存结果），包含:
         - drug_name: 药品名称
         - providers: 供应商价格列表（按价格排序）
         - price_stats: 价格统计（最低、最高、平均）
     """
-    crawler = YSBangPlaywrightCrawler(token=token, headless=headless)
-    return asyncio.run(crawler.get_drug_detail_prices(keyword, drug_id=drug_id, max_providers=max_providers))
+    return cached_crawl(
+        ('detail', keyword, drug_id, max_providers),
+        lambda: run_with_shared_pool(
+            lambda pool: YSBangPlaywrightCrawler(token=token, headless=headless, pool=pool)
+            .get_drug_detail_prices(keyword, drug_id=drug_id, max_providers=max_providers),
+            headless
+        ),
+        force_refresh
+    )
 
 
 if __name__ == '__main__':
@@ -896,11 +1169,11 @@ def crawl_search_results_sync(keyword: str, token: str = None, max_items: int =
         - items: 药品列表，每个包含 name, drug_id 等信息
         - total: 总数
     """
-    async def search_only():
-        crawler = YSBangPlaywrightCrawler(token=token, headless=headless)
+    async def search_only(pool):
+        crawler = YSBangPlaywrightCrawler(token=token, headless=headless, pool=pool)
         
         try:
-            await crawler.start()
+            await crawler._init_browser()
             
             # 搜索药品
             await crawler.page.goto('https://dian.ysbang.cn/', wait_until='networkidle')
@@ -976,6 +1249,6 @@ def crawl_search_results_sync(keyword: str, token: str = None, max_items: int =
             logger.error(f"搜索失败: {e}")
             return {'success': False, 'error': str(e)}
         finally:
-            await crawler.close()
+            await crawler._close_browser()
     
-    return asyncio.run(search_only())
+    return run_with_shared_pool(search_only, headless)
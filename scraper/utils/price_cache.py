@@ -0,0 +1,133 @@
+"""
+采集结果缓存
+
+按 (采集方式, 关键词, 药品ID, 数量上限) 缓存成功的采集结果，有效期内的重复查询
+直接返回缓存，不再启动浏览器、不再访问药师帮
+
+已安装 diskcache 时缓存保存在磁盘（.price_cache 目录，进程重启后仍有效），
+未安装时保存在进程内存中（最多 PRICE_CACHE_MAX_ENTRIES 条，写入时清理过期条目）
+
+读出的结果是缓存的副本，调用方修改结果不影响缓存
+
+用法:
+    result = cached_crawl(
+        ('detail', keyword, drug_id, max_providers),
+        lambda: crawl(...),
+        force_refresh=False
+    )
+"""
+import copy
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+try:
+    import diskcache
+except ImportError:
+    diskcache = None
+
+logger = logging.getLogger(__name__)
+
+# 缓存目录和有效期（秒）
+PRICE_CACHE_DIR = '.price_cache'
+PRICE_CACHE_TTL = 600
+
+# 内存缓存的最大条目数（超出后淘汰最早写入的）
+PRICE_CACHE_MAX_ENTRIES = 1000
+
+_cache: Any = None
+# 缓存键 → (过期时间, 结果)，按写入顺序排列
+_memory_cache: 'OrderedDict[str, Tuple[float, Dict[str, Any]]]' = OrderedDict()
+_lock = threading.Lock()
+
+
+def _get_cache():
+    """获取 diskcache 缓存（首次使用时打开），未安装 diskcache 时返回 None"""
+    global _cache
+    if diskcache is None:
+        return None
+    with _lock:
+        if _cache is None:
+            _cache = diskcache.Cache(PRICE_CACHE_DIR)
+        return _cache
+
+
+def cache_key(*parts: Any) -> str:
+    """由采集参数生成缓存键"""
+    return hashlib.blake2b('|'.join(map(str, parts)).encode('utf-8'), digest_size=16).hexdigest()
+
+
+def get_cached(key: str) -> Optional[Dict[str, Any]]:
+    """读取未过期的缓存结果，不存在或已过期时返回 None"""
+    cache = _get_cache()
+    if cache is not None:
+        return cache.get(key)
+
+    with _lock:
+        entry = _memory_cache.get(key)
+        if entry is None:
+            return None
+        expire_at, value = entry
+        if expire_at < time.monotonic():
+            del _memory_cache[key]
+            return None
+        return copy.deepcopy(value)
+
+
+def set_cached(key: str, value: Dict[str, Any], expire: int = PRICE_CACHE_TTL):
+    """写入缓存结果"""
+    cache = _get_cache()
+    if cache is not None:
+        cache.set(key, value, expire=expire)
+        return
+
+    now = time.monotonic()
+    value = copy.deepcopy(value)
+    with _lock:
+        # 清理过期条目，再按容量淘汰最早写入的条目
+        for expired in [k for k, (expire_at, _) in _memory_cache.items() if expire_at < now]:
+            del _memory_cache[expired]
+        _memory_cache[key] = (now + expire, value)
+        _memory_cache.move_to_end(key)
+        while len(_memory_cache) > PRICE_CACHE_MAX_ENTRIES:
+            _memory_cache.popitem(last=False)
+
+
+def clear_cache():
+    """清空全部缓存结果"""
+    cache = _get_cache()
+    if cache is not None:
+        cache.clear()
+    with _lock:
+        _memory_cache.clear()
+
+
+def cached_crawl(
+    key_parts: Tuple[Any, ...],
+    crawl: Callable[[], Dict[str, Any]],
+    force_refresh: bool = False,
+    expire: int = PRICE_CACHE_TTL
+) -> Dict[str, Any]:
+    """
+    优先返回缓存结果，没有缓存时执行采集，采集成功才写入缓存
+
+    Args:
+        key_parts: 决定采集结果的参数（采集方式、关键词、药品ID等）
+        crawl: 执行采集的函数
+        force_refresh: 为 True 时忽略缓存重新采集
+        expire: 缓存有效期（秒）
+    """
+    key = cache_key(*key_parts)
+    if not force_refresh:
+        result = get_cached(key)
+        if result is not None:
+            logger.debug(f"命中采集结果缓存: {key_parts}")
+            return result
+
+    result = crawl()
+    if result.get('success'):
+        set_cached(key, result, expire)
+    return result
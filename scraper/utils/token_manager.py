@@ -8,6 +8,7 @@ import os
 import time
 from datetime import datetime, timedelta
 from typing import Optional, Dict
+import orjson
 import requests
 
 
@@ -211,7 +212,8 @@ class TokenRefreshMiddleware:
     def process_response(self, request, response, spider):
         """检测Token过期并刷新"""
         try:
-            data = json.loads(response.text)
+            # 直接解析响应字节，无需先解码为 response.text
+            data = orjson.loads(response.body)
             if data.get('code') == '40020':
                 spider.logger.warning("Token过期，尝试刷新...")
                 
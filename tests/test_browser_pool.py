@@ -0,0 +1,126 @@
+"""
+浏览器池测试（使用替身浏览器，不启动 Chromium）
+"""
+import asyncio
+import sys
+import types
+
+import pytest
+
+from scraper.utils.browser_pool import BrowserPool
+
+
+class StubContext:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+
+    async def new_page(self):
+        return types.SimpleNamespace(context=self)
+
+    async def close(self):
+        self.closed = True
+
+
+class StubBrowser:
+    def __init__(self):
+        self.connected = True
+        self.fail_new_context = False
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_context(self, **options):
+        if self.fail_new_context:
+            raise RuntimeError('new_context failed')
+        return StubContext(self)
+
+    async def close(self):
+        self.connected = False
+
+
+class StubPlaywright:
+    def __init__(self):
+        self.launched = []
+        self.chromium = self
+
+    async def launch(self, **options):
+        browser = StubBrowser()
+        self.launched.append(browser)
+        return browser
+
+    async def stop(self):
+        pass
+
+
+@pytest.fixture
+def playwright(monkeypatch):
+    """用替身替换 playwright.async_api.async_playwright"""
+    stub = StubPlaywright()
+
+    class Starter:
+        async def start(self):
+            return stub
+
+    module = types.ModuleType('playwright.async_api')
+    module.async_playwright = Starter
+    monkeypatch.setitem(sys.modules, 'playwright', types.ModuleType('playwright'))
+    monkeypatch.setitem(sys.modules, 'playwright.async_api', module)
+    return stub
+
+
+class TestBrowserPool:
+    """
+    页面获取、释放与并发页面数限制
+    """
+
+    def test_acquire_release_semaphore(self, playwright):
+        """页数达到上限时等待，释放后可继续获取，全部释放后恢复计数"""
+        async def scenario():
+            pool = BrowserPool(max_pages=2)
+            first = await pool.acquire()
+            second = await pool.acquire()
+
+            third = asyncio.ensure_future(pool.acquire())
+            await asyncio.sleep(0)
+            assert not third.done()
+
+            await pool.release(first)
+            third_page = await asyncio.wait_for(third, 1)
+
+            await pool.release(second)
+            await pool.release(third_page)
+            assert first.context.closed and third_page.context.closed
+            assert pool._semaphore._value == 2
+            assert len(playwright.launched) == 1
+            await pool.close()
+
+        asyncio.run(scenario())
+
+    def test_failed_acquire_releases_slot(self, playwright):
+        """创建页面失败时归还并发名额"""
+        async def scenario():
+            pool = BrowserPool(max_pages=1)
+            await pool.start()
+            pool.browser.fail_new_context = True
+
+            with pytest.raises(RuntimeError):
+                await pool.acquire()
+
+            assert pool._semaphore._value == 1
+
+        asyncio.run(scenario())
+
+    def test_relaunch_after_disconnect(self, playwright):
+        """浏览器断开连接后，下次获取页面时重新启动"""
+        async def scenario():
+            pool = BrowserPool()
+            async with pool.page():
+                pass
+            playwright.launched[0].connected = False
+
+            async with pool.page() as page:
+                assert page.context.browser is playwright.launched[1]
+            assert len(playwright.launched) == 2
+
+        asyncio.run(scenario())
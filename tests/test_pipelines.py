@@ -0,0 +1,329 @@
+"""
+数据库存储管道测试
+"""
+import pytest
+from scrapy.exceptions import DropItem
+from scrapy.utils.test import get_crawler
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import sessionmaker
+from twisted.internet import defer
+
+import migrate_merge_duplicate_drugs
+import scraper.pipelines as pipelines
+import scraper.reclean as reclean
+from app.models import DRUG_UNIQUE_INDEX, Base, Drug, PriceRecord
+from app.services.alert_service import PriceAlert
+from scraper.items import DrugItem
+from scraper.pipelines import (
+    RAW_ITEMS_TABLE, DataCleaningPipeline, DatabasePipeline, RawItemStagingPipeline
+)
+
+
+def make_item(name='阿莫西林胶囊', price=12.5, **fields):
+    """构造已清洗、验证的数据项"""
+    item = {
+        'name': name,
+        'price': price,
+        'source_url': f'https://example.com/{name}',
+        'source_name': '测试来源',
+        'specification': '0.25g*24粒',
+        'manufacturer': '某药厂',
+    }
+    item.update(fields)
+    return item
+
+
+@pytest.fixture
+def open_pipeline(monkeypatch):
+    """
+    打开 DatabasePipeline 的工厂函数
+
+    批量写入改为在当前线程同步执行（测试中没有运行 reactor 线程池）
+    """
+    monkeypatch.setattr(pipelines, 'deferToThread', lambda f, *args: defer.maybeDeferred(f, *args))
+    opened = []
+
+    def _open(database_url='sqlite://', batch_size=DatabasePipeline.BATCH_SIZE):
+        monkeypatch.setattr(pipelines, 'DATABASE_URL', database_url)
+        pipeline = DatabasePipeline.from_crawler(get_crawler())
+        pipeline.BATCH_SIZE = batch_size
+        pipeline.open_spider(None)
+        opened.append(pipeline)
+        return pipeline
+
+    yield _open
+    for pipeline in opened:
+        pipeline.session.remove()
+
+
+def result_of(d):
+    """取出已触发的 Deferred 的结果（失败时为 Failure）"""
+    results = []
+    d.addBoth(results.append)
+    return results[0]
+
+
+def price_count(pipeline):
+    """管道数据库中的价格记录数"""
+    return query(pipeline, select(func.count()).select_from(PriceRecord))[0][0]
+
+
+def query(pipeline, statement):
+    """在管道的数据库中执行查询"""
+    session = pipeline.session()
+    try:
+        return session.execute(statement).all()
+    finally:
+        pipeline.session.remove()
+
+
+class TestBatchWrite:
+    """
+    数据项缓存后按批次写入，关闭爬虫时写入剩余数据项
+    """
+
+    def test_flush_at_batch_size(self, open_pipeline):
+        """缓冲区达到 BATCH_SIZE 时批量写入"""
+        pipeline = open_pipeline(batch_size=3)
+        items = [make_item(f'药品{i}') for i in range(3)]
+
+        assert pipeline.process_item(items[0], None) is items[0]
+        assert pipeline.process_item(items[1], None) is items[1]
+        assert price_count(pipeline) == 0
+
+        assert result_of(pipeline.process_item(items[2], None)) is items[2]
+        assert price_count(pipeline) == 3
+        assert pipeline._buffer == []
+
+    def test_remainder_written_on_close(self, open_pipeline):
+        """未满一批的数据项在关闭爬虫时写入"""
+        pipeline = open_pipeline(batch_size=3)
+        for i in range(4):
+            pipeline.process_item(make_item(f'药品{i}'), None)
+        assert price_count(pipeline) == 3
+
+        result_of(pipeline.close_spider(None))
+
+        assert price_count(pipeline) == 4
+        assert pipeline._saved == 4
+
+    def test_upsert_fills_approval_number_and_category(self, open_pipeline):
+        """已有药品没有批准文号、类别为默认值时由新数据项补充"""
+        pipeline = open_pipeline(batch_size=1)
+        pipeline.process_item(make_item('医用外科口罩', approval_number=''), None)
+        pipeline.process_item(make_item(
+            '医用外科口罩', approval_number='国械注准20153140528', category='medical_device'
+        ), None)
+        # 已有的批准文号不会被覆盖
+        pipeline.process_item(make_item('医用外科口罩', approval_number='国械注准00000000000'), None)
+
+        drugs = query(pipeline, select(Drug.approval_number, Drug.category))
+        assert drugs == [('国械注准20153140528', 'medical_device')]
+        assert price_count(pipeline) == 3
+
+
+class TestDrugCache:
+    """
+    已缓存且无需更新的药品不再执行 upsert
+    """
+
+    @staticmethod
+    def count_drug_upserts(pipeline):
+        """统计 drugs 表的 INSERT 语句数"""
+        statements = []
+
+        @event.listens_for(pipeline.engine, 'before_cursor_execute')
+        def _record(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith('INSERT INTO drugs'):
+                statements.append(statement)
+
+        return statements
+
+    def test_cache_hit_skips_upsert(self, open_pipeline):
+        """同一药品再次写入时使用缓存的药品ID"""
+        pipeline = open_pipeline(batch_size=1)
+        upserts = self.count_drug_upserts(pipeline)
+
+        pipeline.process_item(make_item(approval_number='国药准字H12345678'), None)
+        pipeline.process_item(make_item(approval_number='国药准字H12345678', price=13), None)
+
+        assert len(upserts) == 1
+        assert query(pipeline, select(PriceRecord.drug_id)) == [(1,), (1,)]
+
+    def test_cache_miss_runs_upsert(self, open_pipeline):
+        """新药品或需要补充批准文号的已缓存药品执行 upsert"""
+        pipeline = open_pipeline(batch_size=1)
+        upserts = self.count_drug_upserts(pipeline)
+
+        pipeline.process_item(make_item(), None)
+        pipeline.process_item(make_item(approval_number='国药准字H12345678'), None)
+        pipeline.process_item(make_item('感冒灵颗粒'), None)
+
+        assert len(upserts) == 3
+        assert pipeline._drug_cache[('阿莫西林胶囊', '0.25g*24粒', '某药厂')][1] == '国药准字H12345678'
+        assert len(pipeline._drug_cache) == 2
+
+    def test_rollback_clears_cache(self, open_pipeline):
+        """事务回滚后清空缓存，不保留本事务新建的药品ID"""
+        pipeline = open_pipeline()
+        pipeline._write_rows([make_item('药品A')])
+        assert len(pipeline._drug_cache) == 1
+
+        with pytest.raises(Exception):
+            pipeline._write_rows([make_item('药品B', price=None)])
+
+        assert len(pipeline._drug_cache) == 0
+        assert query(pipeline, select(Drug.name)) == [('药品A',)]
+
+
+class TestDrugUniqueKey:
+    """
+    规格、厂家为 NULL 的已有药品与采集管道写入的空字符串视为同一药品
+    """
+
+    def test_upsert_matches_null_columns(self, open_pipeline):
+        """已有药品的厂家为 NULL 时，重新采集不插入重复药品"""
+        pipeline = open_pipeline()
+        session = pipeline.session()
+        session.add(Drug(name='阿莫西林胶囊', specification='0.25g*24粒', manufacturer=None))
+        session.commit()
+        pipeline.session.remove()
+
+        pipeline.process_item(make_item(manufacturer='', approval_number='国药准字H12345678'), None)
+        pipeline.close_spider(None)
+
+        drugs = query(pipeline, select(Drug.id, Drug.manufacturer, Drug.approval_number))
+        assert drugs == [(1, None, '国药准字H12345678')]
+        assert query(pipeline, select(PriceRecord.drug_id)) == [(1,)]
+
+    @staticmethod
+    def legacy_database(path):
+        """建表时没有唯一索引、已有重复药品的数据库"""
+        engine = create_engine(f'sqlite:///{path}')
+        Base.metadata.create_all(engine)
+        DRUG_UNIQUE_INDEX.drop(engine)
+        session = sessionmaker(bind=engine)()
+        session.add_all([
+            Drug(id=1, name='感冒灵颗粒', specification='10g*9袋', manufacturer=None),
+            Drug(id=2, name='感冒灵颗粒', specification='10g*9袋', manufacturer='', approval_number='国药准字Z44021940'),
+        ])
+        session.add(PriceRecord(drug_id=2, price=15, source_url='https://example.com/2', source_name='测试来源'))
+        session.add(PriceAlert(drug_id=2, drug_name='感冒灵颗粒', alert_type='price_change'))
+        session.commit()
+        session.close()
+        engine.dispose()
+
+    def test_open_spider_rejects_duplicates(self, open_pipeline, tmp_path):
+        """已有重复药品时打开爬虫报错，不修改已有数据"""
+        self.legacy_database(tmp_path / 'legacy.db')
+
+        with pytest.raises(RuntimeError, match='migrate_merge_duplicate_drugs'):
+            open_pipeline(f'sqlite:///{tmp_path / "legacy.db"}')
+
+    def test_migration_merges_duplicates(self, open_pipeline, tmp_path):
+        """迁移脚本合并重复药品，价格记录和告警转移到保留的药品"""
+        self.legacy_database(tmp_path / 'legacy.db')
+
+        migrate_merge_duplicate_drugs.migrate(str(tmp_path / 'legacy.db'))
+        pipeline = open_pipeline(f'sqlite:///{tmp_path / "legacy.db"}')
+
+        assert query(pipeline, select(Drug.id, Drug.approval_number)) == [(1, '国药准字Z44021940')]
+        assert query(pipeline, select(PriceRecord.drug_id)) == [(1,)]
+        assert query(pipeline, select(PriceAlert.drug_id)) == [(1,)]
+
+
+class TestBatchWriteFailure:
+    """
+    批次写入失败时逐条重试，只有无法写入的数据项被丢弃并计入统计
+    """
+
+    def test_failed_row_counted_as_dropped(self, open_pipeline):
+        """批次中其他数据项失败时，触发写入的数据项正常返回，失败项计入统计"""
+        pipeline = open_pipeline(batch_size=3)
+        items = [make_item('药品A'), make_item('药品B', price=None), make_item('药品C')]
+
+        results = [pipeline.process_item(item, None) for item in items]
+
+        assert result_of(results[2]) is items[2]
+        assert price_count(pipeline) == 2
+        assert pipeline.stats.get_value('item_dropped_count') == 1
+
+    def test_failed_trigger_item_dropped(self, open_pipeline):
+        """触发写入的数据项自身写入失败时以 DropItem 结束，不重复计入统计"""
+        pipeline = open_pipeline(batch_size=2)
+        pipeline.process_item(make_item('药品A'), None)
+
+        result = result_of(pipeline.process_item(make_item('药品B', price=None), None))
+
+        assert result.check(DropItem)
+        assert price_count(pipeline) == 1
+        assert pipeline.stats.get_value('item_dropped_count') is None
+
+    def test_failed_row_on_close_counted(self, open_pipeline):
+        """关闭爬虫时写入剩余数据项，失败项计入统计"""
+        pipeline = open_pipeline()
+        pipeline.process_item(make_item('药品A', price=None), None)
+        pipeline.process_item(make_item('药品B'), None)
+
+        result_of(pipeline.close_spider(None))
+
+        assert price_count(pipeline) == 1
+        assert pipeline.stats.get_value('item_dropped_count') == 1
+
+
+class TestRawItemStaging:
+    """
+    原始数据项暂存到 raw_drug_items，供离线重新清洗
+    """
+
+    def test_raw_items_written_as_text(self, open_pipeline):
+        """数据项按批写入暂存表，字段保存为原始文本，关闭爬虫时写入剩余数据项"""
+        open_pipeline()  # 替换 deferToThread 和 DATABASE_URL
+        pipeline = RawItemStagingPipeline()
+        pipeline.BATCH_SIZE = 2
+        pipeline.open_spider(None)
+
+        items = [
+            DrugItem(name=' 阿莫西林 ', price='¥12.50元'),
+            DrugItem(name='感冒灵', price=9.8),
+            DrugItem(name='布洛芬'),
+        ]
+        for item in items:
+            assert pipeline.process_item(item, None) is item
+        with pipeline.engine.connect() as conn:
+            assert conn.execute(select(func.count()).select_from(RAW_ITEMS_TABLE)).scalar() == 2
+
+        result_of(pipeline.close_spider(None))
+
+        with pipeline.engine.connect() as conn:
+            rows = conn.execute(select(RAW_ITEMS_TABLE.c.name, RAW_ITEMS_TABLE.c.price)).all()
+        assert rows == [(' 阿莫西林 ', '¥12.50元'), ('感冒灵', '9.8'), ('布洛芬', '')]
+
+    def test_reclean_requires_staging_table(self, monkeypatch):
+        """暂存表不存在且未指定导出文件时给出明确错误"""
+        monkeypatch.setattr(reclean, 'DATABASE_URL', 'sqlite://')
+
+        with pytest.raises(ValueError, match='raw_drug_items'):
+            reclean.reclean()
+
+
+class TestCleanDataframe:
+    """
+    按列批量清洗与逐条清洗规则一致
+    """
+
+    def test_matches_process_item(self):
+        """clean_dataframe 的结果与 process_item 逐条清洗一致"""
+        pd = pytest.importorskip('pandas')
+        items = [
+            {'name': '  阿莫西林  胶囊@# ', 'price': '¥12.50元', 'specification': ' 0.25G*24粒 ',
+             'manufacturer': ' 某  药厂 ', 'dosage_form': '胶囊', 'source_name': ' 测试 来源 '},
+            {'name': '感冒灵颗粒', 'price': '9.8', 'specification': '10ML*9袋',
+             'manufacturer': '', 'dosage_form': '', 'source_name': '测试来源'},
+        ]
+
+        cleaned = DataCleaningPipeline.clean_dataframe(pd.DataFrame(items))
+
+        expected = [DataCleaningPipeline().process_item(dict(item), None) for item in items]
+        for column in ('name', 'price', 'specification', 'manufacturer', 'source_name'):
+            assert cleaned[column].tolist() == [item[column] for item in expected]
@@ -0,0 +1,56 @@
+"""
+Playwright 爬虫 API 响应解析测试（不启动浏览器）
+"""
+import orjson
+
+from scraper.utils import playwright_crawler
+from scraper.utils.playwright_crawler import YSBangPlaywrightCrawler, _ApiResponse
+
+PROVIDER_URL = 'https://dian.ysbang.cn/wholesale-drug/sales/getWholesaleListForPc/v4270'
+SEARCH_URL = 'https://dian.ysbang.cn/wholesale-drug/sales/getRegularSearchPurchaseList/v4230'
+
+
+def api_response(url, payload):
+    """拦截时保存的响应（只有原始响应体）"""
+    return _ApiResponse(url=url, raw=orjson.dumps(payload), timestamp='')
+
+
+def wholesale(name, provider, price):
+    return {'drugname': name, 'abbreviation': provider, 'price': price}
+
+
+class TestApiResponseParsing:
+    """
+    商品数按 API 统计，每个响应只解析一次
+    """
+
+    def test_count_and_extract_parse_once(self, monkeypatch):
+        """统计商品数与提取价格共用一次解析"""
+        crawler = YSBangPlaywrightCrawler(token='test')
+        crawler._api_responses = [
+            api_response(PROVIDER_URL, {'data': {'list': [wholesale('阿莫西林', '甲', '12.5'), wholesale('阿莫西林', '乙', '13')]}}),
+            api_response(SEARCH_URL, {'data': [{'drug': {'drugName': '阿莫西林', 'minprice': '10'}}]}),
+        ]
+        loads = []
+        real_loads = orjson.loads
+        monkeypatch.setattr(playwright_crawler.orjson, 'loads', lambda raw: loads.append(raw) or real_loads(raw))
+
+        assert crawler._api_item_count() == 2
+        assert crawler._api_item_count(crawler.SEARCH_API) == 1
+        prices = crawler._extract_prices_from_api_responses('阿莫西林')
+
+        assert [p['provider_name'] for p in prices[:2]] == ['甲', '乙']
+        assert len(prices) == 3
+        assert len(loads) == 2
+
+    def test_non_object_payload_ignored(self):
+        """响应体是合法 JSON 但不是对象时视为没有商品"""
+        crawler = YSBangPlaywrightCrawler(token='test')
+        crawler._api_responses = [
+            api_response(PROVIDER_URL, [1, 2, 3]),
+            api_response(PROVIDER_URL, {'data': {'list': [1, wholesale('阿莫西林', '甲', '12.5')]}}),
+            _ApiResponse(url=PROVIDER_URL, raw=b'not json', timestamp=''),
+        ]
+
+        assert crawler._api_item_count() == 1
+        assert len(crawler._extract_prices_from_api_responses('阿莫西林')) == 1
@@ -0,0 +1,116 @@
+"""
+采集结果缓存测试（内存缓存）
+"""
+import pytest
+
+from scraper.utils import price_cache
+from scraper.utils.price_cache import cache_key, cached_crawl, get_cached, set_cached
+
+
+@pytest.fixture(autouse=True)
+def memory_cache(monkeypatch):
+    """不使用 diskcache，每个测试使用空的内存缓存"""
+    monkeypatch.setattr(price_cache, 'diskcache', None)
+    price_cache.clear_cache()
+    yield
+    price_cache.clear_cache()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可手动推进的单调时钟"""
+    now = [1000.0]
+    monkeypatch.setattr(price_cache.time, 'monotonic', lambda: now[0])
+    return now
+
+
+class Crawler:
+    """记录调用次数的采集函数"""
+
+    def __init__(self, success=True):
+        self.calls = 0
+        self.success = success
+
+    def __call__(self):
+        self.calls += 1
+        return {'success': self.success, 'providers': [{'price': 10.0}], 'calls': self.calls}
+
+
+class TestCachedCrawl:
+    """
+    有效期内的重复查询返回缓存结果
+    """
+
+    def test_repeat_query_uses_cache(self):
+        """第二次查询不再执行采集"""
+        crawl = Crawler()
+
+        first = cached_crawl(('detail', '阿莫西林', 1), crawl)
+        second = cached_crawl(('detail', '阿莫西林', 1), crawl)
+
+        assert crawl.calls == 1
+        assert second == first
+
+    def test_force_refresh_bypasses_cache(self):
+        """force_refresh 时重新采集并更新缓存"""
+        crawl = Crawler()
+        cached_crawl(('detail', '阿莫西林', 1), crawl)
+
+        result = cached_crawl(('detail', '阿莫西林', 1), crawl, force_refresh=True)
+
+        assert crawl.calls == 2 and result['calls'] == 2
+        assert cached_crawl(('detail', '阿莫西林', 1), crawl)['calls'] == 2
+
+    def test_failed_result_not_cached(self):
+        """采集失败的结果不写入缓存"""
+        crawl = Crawler(success=False)
+
+        cached_crawl(('detail', '阿莫西林', 1), crawl)
+        cached_crawl(('detail', '阿莫西林', 1), crawl)
+
+        assert crawl.calls == 2
+        assert get_cached(cache_key('detail', '阿莫西林', 1)) is None
+
+    def test_ttl_expiry(self, clock):
+        """超过有效期后重新采集"""
+        crawl = Crawler()
+        cached_crawl(('detail', '阿莫西林', 1), crawl, expire=600)
+
+        clock[0] += 599
+        cached_crawl(('detail', '阿莫西林', 1), crawl, expire=600)
+        assert crawl.calls == 1
+
+        clock[0] += 2
+        cached_crawl(('detail', '阿莫西林', 1), crawl, expire=600)
+        assert crawl.calls == 2
+
+    def test_result_is_copy(self):
+        """修改返回的结果不影响缓存"""
+        result = cached_crawl(('detail', '阿莫西林', 1), Crawler())
+        result['providers'].clear()
+
+        assert cached_crawl(('detail', '阿莫西林', 1), Crawler())['providers'] == [{'price': 10.0}]
+
+
+class TestMemoryCacheBound:
+    """
+    内存缓存写入时清理过期条目，条目数不超过上限
+    """
+
+    def test_expired_entries_pruned_on_write(self, clock):
+        """写入新条目时删除已过期的其他条目"""
+        set_cached('a', {'success': True}, expire=10)
+        clock[0] += 11
+
+        set_cached('b', {'success': True}, expire=10)
+
+        assert list(price_cache._memory_cache) == ['b']
+
+    def test_max_entries(self, monkeypatch):
+        """超出上限时淘汰最早写入的条目"""
+        monkeypatch.setattr(price_cache, 'PRICE_CACHE_MAX_ENTRIES', 3)
+        for key in 'abcd':
+            set_cached(key, {'success': True})
+
+        assert list(price_cache._memory_cache) == ['b', 'c', 'd']
+        assert get_cached('a') is None
@@ -0,0 +1,49 @@
+"""
+药师帮商品类别判断测试
+"""
+import pytest
+from hypothesis import given, strategies as st, settings
+
+from scraper.spiders._ysbang_fast import determine_category
+
+
+class TestDetermineCategory:
+    """
+    根据批准文号前缀和名称关键词判断产品类别
+    """
+
+    @pytest.mark.parametrize('approval_number, expected', [
+        ('国药准字H20003263', 'drug'),
+        ('国药准字z44021940', 'drug'),
+        ('国械注准20153140528', 'medical_device'),
+        ('国械注进20162641234', 'medical_device'),
+        ('卫妆准字29-XK-2563', 'cosmetic'),
+        ('国妆特字G20150123', 'cosmetic'),
+        ('化妆品生产许可证', 'cosmetic'),
+        ('国药准字H2000326', 'drug'),  # 文号不完整时按名称判断，默认为药品
+    ])
+    def test_approval_number_prefix(self, approval_number, expected):
+        """测试各类批准文号前缀（包括"卫妆"和"化妆"两种化妆品文号）"""
+        assert determine_category(approval_number, '阿莫西林胶囊', '某药厂') == expected
+
+    @pytest.mark.parametrize('name, expected', [
+        ('珍珠霜', 'cosmetic'),
+        ('医用外科口罩', 'medical_device'),
+        ('口罩 面膜', 'cosmetic'),  # 化妆品关键词优先
+        ('感冒灵颗粒', 'drug'),
+    ])
+    def test_name_keywords(self, name, expected):
+        """测试没有批准文号时按名称关键词判断"""
+        assert determine_category('', name, '') == expected
+
+    @given(
+        prefix=st.sampled_from(['国药准字', '国械注', '卫妆准字', '国妆特字', '化妆', '']),
+        suffix=st.text(alphabet='HZSJBhz0123456789准进妆 ', max_size=12),
+        name=st.sampled_from(['阿莫西林', '面膜', '口罩', '']),
+    )
+    @settings(max_examples=200)
+    def test_prefix_check_matches_strict_regex(self, prefix, suffix, name):
+        """测试前缀比较与正则严格匹配的判断结果一致"""
+        approval_number = prefix + suffix
+        assert (determine_category(approval_number, name, '')
+                == determine_category(approval_number, name, '', strict=True))
@@ -0,0 +1,117 @@
+"""
+药师帮爬虫 API 响应解析测试
+
+已安装 msgspec 时按结构体解码，否则用 orjson 解析为字典，两种方式的解析结果应一致
+"""
+import orjson
+import pytest
+from scrapy.http import Request, TextResponse
+
+from scraper.spiders import ysbang_spider
+from scraper.spiders.ysbang_spider import YsbangSpider
+
+SEARCH_URL = 'https://dian.ysbang.cn/wholesale-drug/sales/getRegularSearchPurchaseListForPc/v5430'
+
+SEARCH_PAGE = {
+    'code': '40001',
+    'message': '成功',
+    'data': {
+        'list': [
+            {
+                'elementType': 0,
+                'drug': {
+                    'drugId': 4363,
+                    'drugName': '999 感冒灵颗粒 10g*9袋',
+                    'factory': '华润三九医药股份有限公司',
+                    'specification': '10g*9袋',
+                    'unit': '盒',
+                    'minprice': '13.50',
+                    'maxprice': '15.92',
+                    'approvalNumber': '国药准字Z44021940',
+                },
+            },
+            # drug 为空对象时使用外层字段；值为 null 的字段视为空
+            {
+                'drug': {},
+                'goodsName': '医用外科口罩',
+                'spec': '10只',
+                'unit': None,
+                'manufacturer': '某器械厂',
+                'minprice': None,
+                'price': '¥5.00元',
+                'registerNo': '国械注准20153140528',
+            },
+            # 没有价格的商品被跳过
+            {'drug': {'drugName': '无价格商品'}},
+        ],
+        'total': 60,
+        'pageSize': 20,
+    },
+}
+
+
+@pytest.fixture(params=['msgspec', 'orjson'])
+def decoder(request, monkeypatch):
+    """msgspec 结构体解码或 orjson 字典解析"""
+    if request.param == 'msgspec':
+        pytest.importorskip('msgspec')
+        assert ysbang_spider._RESPONSE_DECODER is not None
+    else:
+        monkeypatch.setattr(ysbang_spider, '_RESPONSE_DECODER', None)
+    return request.param
+
+
+def parse(spider, payload, page=1):
+    """解析一页搜索结果，返回药品数据项"""
+    request = Request(SEARCH_URL, meta={'page': page, 'request_type': 'search'})
+    response = TextResponse(SEARCH_URL, body=orjson.dumps(payload), request=request)
+    return [dict(item) for item in spider.parse_search_results(response)]
+
+
+class TestParseApiResponse:
+    """
+    搜索结果解析与最后一页判断
+    """
+
+    def test_search_page(self, decoder):
+        """提取商品字段；不足一页时记为最后一页"""
+        spider = YsbangSpider(token='test', keyword='感冒')
+
+        items = parse(spider, SEARCH_PAGE, page=3)
+
+        assert [(i['name'], i['price'], i['specification'], i['manufacturer'],
+                 i['approval_number'], i['category'], i['source_url']) for i in items] == [
+            ('999 感冒灵颗粒 10g*9袋', '13.5', '10g*9袋/盒', '华润三九医药股份有限公司',
+             '国药准字Z44021940', 'drug', 'https://dian.ysbang.cn/#/drug/4363'),
+            ('医用外科口罩', '5.0', '10只', '某器械厂',
+             '国械注准20153140528', 'medical_device', SEARCH_URL),
+        ]
+        assert spider._last_page == 3
+
+    def test_full_page_uses_total(self, decoder):
+        """满一页时按总数判断是否为最后一页"""
+        entry = SEARCH_PAGE['data']['list'][0]
+        payload = {**SEARCH_PAGE, 'data': {'list': [entry] * 20, 'total': 60}}
+        spider = YsbangSpider(token='test', keyword='感冒')
+
+        assert len(parse(spider, payload, page=2)) == 20
+        assert spider._last_page is None
+
+        assert len(parse(spider, payload, page=3)) == 20
+        assert spider._last_page == 3
+
+    @pytest.mark.parametrize('data', [{}, None, [], {'list': []}])
+    def test_empty_page_marks_last_page(self, decoder, data):
+        """没有数据的页面记为最后一页，之后的页面不再解析"""
+        spider = YsbangSpider(token='test', keyword='感冒')
+
+        assert parse(spider, {'code': '0', 'message': '', 'data': data}, page=2) == []
+        assert spider._last_page == 2
+        assert parse(spider, SEARCH_PAGE, page=4) == []
+
+    def test_token_error(self, decoder):
+        """Token 失效时不提取数据"""
+        spider = YsbangSpider(token='test', keyword='感冒')
+
+        assert parse(spider, {'code': '40020', 'message': 'token失效', 'data': SEARCH_PAGE['data']}) == []
+        assert spider._last_page is None
@@ -3,7 +3,7 @@
 1. 检测并标注商品类别
 2. 标注异常价格
 """
-import sqlite3
+from app.models import open_sqlite
 from app.services.crawl_service import CrawlService
 
 def detect_category(name: str) -> str:
@@ -32,7 +32,7 @@ def detect_category(name: str) -> str:
 
 def update_categories():
     """更新商品类别"""
-    conn = sqlite3.connect('pharma_prices.db')
+    conn = open_sqlite('pharma_prices.db')
     cursor = conn.cursor()
     
     print("正在更新商品类别...")